@@ -1,7 +1,11 @@
 from google.adk.agents import LlmAgent
+from google.adk.apps import App
 
-from misstea.constants import AGENT_MODEL
+from misstea.logger import LoggingPlugin
+from misstea.models import get_model
+from misstea.streaming import StreamingPlugin
 from misstea.tools import (
+    call_agents_parallel,
     call_calculator_agent,
     call_coding_agent,
     call_filesystem_agent,
@@ -12,7 +16,9 @@ from misstea.tools import (
     call_outlook_agent,
     call_terraform_agent,
     call_web_scraper_agent,
+    get_agent_output,
 )
+from misstea.tracing import TracingPlugin
 from misstea.utils import get_current_date, get_current_time
 
 root_agent: LlmAgent = LlmAgent(
@@ -35,15 +41,18 @@ root_agent: LlmAgent = LlmAgent(
             * To read, write, or modify files, use coding_agent.
             * To write blog posts, use interactive_blogger_agent.
             * To get the contents of a web page, use web_scraper_agent.
+            * When a question needs several agents and their calls do not depend on each other, use call_agents_parallel to call them all at once.
+            * To use the output of an earlier agent call again, use get_agent_output instead of calling the agent again.
 
         Constraints:
             * Do not return code samples from terraform.com.
     """,
-    model=AGENT_MODEL,
+    model=get_model("root"),
     name="multi_tool_agent",
     tools=[
         get_current_date,
         get_current_time,
+        call_agents_parallel,
         call_calculator_agent,
         call_coding_agent,
         call_filesystem_agent,
@@ -54,5 +63,12 @@ root_agent: LlmAgent = LlmAgent(
         call_outlook_agent,
         call_terraform_agent,
         call_web_scraper_agent,
+        get_agent_output,
     ],
 )
+
+app = App(
+    name="misstea",
+    root_agent=root_agent,
+    plugins=[TracingPlugin(), StreamingPlugin(), LoggingPlugin()],
+)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from google.adk.runners import InMemoryRunner, Runner
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+BATCH_USER_ID = "batch"
+
+
+def read_prompts(input_path: Path) -> List[Dict[str, str]]:
+    """Read the prompts of a batch.
+
+    Each line is a JSON object with a "prompt" key and an optional "id" key, the id
+    defaults to the line number.
+
+    Args:
+        input_path (Path): Path of the input JSONL file.
+
+    Returns:
+        List[Dict[str, str]]: The prompts, each with an "id" and "prompt" key.
+
+    Raises:
+        ValueError: If a line has no prompt or ids are not unique.
+
+    """
+    prompts = []
+    with input_path.open() as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("prompt"):
+                raise ValueError(f"Line {line_number} of {input_path} has no prompt.")
+            prompts.append(
+                {"id": str(record.get("id", line_number)), "prompt": record["prompt"]}
+            )
+
+    ids = [x["id"] for x in prompts]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"The ids in {input_path} are not unique.")
+    return prompts
+
+
+def read_completed(output_path: Path) -> set[str]:
+    """Return the ids of prompts that already succeeded in a previous run.
+
+    A final line that was only partially written, e.g. because the process was
+    killed, is removed from the file.
+
+    Args:
+        output_path (Path): Path of the output JSONL file.
+
+    Returns:
+        set[str]: The ids of successful prompts.
+
+    """
+    completed = set()
+    if not output_path.exists():
+        return completed
+
+    with output_path.open("rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[: data.rfind(b"\n") + 1]
+
+    for line in data.splitlines():
+        record = json.loads(line)
+        if record.get("status") == "success":
+            completed.add(record["id"])
+    return completed
+
+
+async def run_prompt(runner: Runner, prompt: Dict[str, str]) -> Dict[str, Any]:
+    """Run a prompt in a new session, which is deleted afterwards.
+
+    Args:
+        runner (Runner): The runner of the root agent.
+        prompt (Dict[str, str]): The prompt, with an "id" and "prompt" key.
+
+    Returns:
+        Dict[str, Any]: The result, with the status and final response of the agent.
+
+    """
+    start = time.monotonic()
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id=BATCH_USER_ID
+    )
+    result: Dict[str, Any] = {"id": prompt["id"], "prompt": prompt["prompt"]}
+    events = 0
+    response = None
+    try:
+        async for event in runner.run_async(
+            user_id=BATCH_USER_ID,
+            session_id=session.id,
+            new_message=types.Content(
+                role="user", parts=[types.Part.from_text(text=prompt["prompt"])]
+            ),
+        ):
+            events += 1
+            if event.is_final_response() and event.content and event.content.parts:
+                response = "".join(x.text or "" for x in event.content.parts)
+        result.update({"status": "success", "response": response})
+    except Exception as e:
+        logger.warning(f"Prompt {prompt['id']} failed: {e!r}")
+        result.update({"status": "failure", "error": repr(e)})
+    finally:
+        await runner.session_service.delete_session(
+            app_name=runner.app_name, user_id=BATCH_USER_ID, session_id=session.id
+        )
+
+    result.update(
+        {"events": events, "duration_seconds": round(time.monotonic() - start, 3)}
+    )
+    return result
+
+
+def _write(f: TextIO, result: Dict[str, Any]) -> None:
+    # Flushed per line, so a crash loses at most the prompts still in flight
+    f.write(json.dumps(result) + "\n")
+    f.flush()
+
+
+async def run_batch(
+    input_path: Path,
+    output_path: Path,
+    concurrency: int = 4,
+    runner: Optional[Runner] = None,
+) -> Dict[str, Any]:
+    """Run the prompts of a JSONL file through the root agent.
+
+    Prompts run concurrently, each in its own session. Results are appended to the
+    output file as soon as they finish, prompts that already succeeded according to
+    the output file are skipped, so a run that stopped can be resumed.
+
+    Args:
+        input_path (Path): Path of the input JSONL file, see `read_prompts()`.
+        output_path (Path): Path of the output JSONL file.
+        concurrency (int): Number of prompts to run at the same time.
+        runner (Optional[Runner]): The runner to use, defaults to one for the root agent.
+
+    Returns:
+        Dict[str, Any]: Summary of the run.
+
+    """
+    if runner is None:
+        from misstea.agent import app
+
+        runner = InMemoryRunner(app=app)
+
+    prompts = read_prompts(input_path)
+    completed = read_completed(output_path)
+    pending = [x for x in prompts if x["id"] not in completed]
+    logger.info(
+        f"Running {len(pending)} prompts ({len(prompts) - len(pending)} already completed) with concurrency {concurrency}."
+    )
+
+    queue: asyncio.Queue[Dict[str, str]] = asyncio.Queue()
+    for prompt in pending:
+        queue.put_nowait(prompt)
+    durations = []
+    failed = 0
+    start = time.monotonic()
+
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    with output_path.open("a") as f:
+
+        async def worker() -> None:
+            nonlocal failed
+            while not queue.empty():
+                result = await run_prompt(runner, queue.get_nowait())
+                _write(f, result)
+                durations.append(result["duration_seconds"])
+                failed += result["status"] != "success"
+                logger.info(
+                    f"[{len(durations)}/{len(pending)}] Prompt {result['id']}: {result['status']} in {result['duration_seconds']} seconds."
+                )
+
+        await asyncio.gather(*[worker() for _ in range(max(concurrency, 1))])
+
+    elapsed = time.monotonic() - start
+    durations.sort()
+    return {
+        "total": len(prompts),
+        "skipped": len(prompts) - len(pending),
+        "succeeded": len(pending) - failed,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 1),
+        "prompts_per_minute": round(len(pending) / elapsed * 60, 1) if elapsed else 0,
+        "p50_seconds": durations[len(durations) // 2] if durations else 0,
+        "p95_seconds": durations[int(len(durations) * 0.95)] if durations else 0,
+    }
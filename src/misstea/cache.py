@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import cache
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from misstea.constants import AGENT_CACHE_MAX_BYTES, AGENT_CACHE_TTLS, CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def normalise_question(question: str) -> str:
+    """Normalise a question so trivially different phrasings share a cache entry.
+
+    Args:
+        question (str): The question passed to an agent.
+
+    Returns:
+        str: The question in lower case with collapsed whitespace and no trailing punctuation.
+
+    """
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.!").strip().lower()
+
+
+def get_cache_ttl(agent_name: str) -> int:
+    """Return the number of seconds responses from an agent are cached for.
+
+    Can be overridden per agent with a `MISSTEA_CACHE_TTL_<AGENT_NAME>` environment variable.
+
+    Args:
+        agent_name (str): The name of the agent.
+
+    Returns:
+        int: The TTL in seconds, 0 if responses from the agent are not cached.
+
+    """
+    env_ttl = os.getenv(f"MISSTEA_CACHE_TTL_{agent_name.upper()}")
+    if env_ttl is not None:
+        return int(env_ttl)
+    return AGENT_CACHE_TTLS.get(agent_name, 0)
+
+
+class ResponseCache:
+    """SQLite backed cache of sub-agent responses."""
+
+    def __init__(self, path: Path, max_bytes: int = AGENT_CACHE_MAX_BYTES):
+        """Open (and create if required) a response cache.
+
+        Args:
+            path (Path): Path of the SQLite database file.
+            max_bytes (int): Total size of cached responses beyond which the least recently used are evicted.
+
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent_name TEXT NOT NULL,
+                question TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._con.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._con.commit()
+
+    @staticmethod
+    def _key(agent_name: str, question: str) -> str:
+        return hashlib.sha256(
+            f"{agent_name}\x00{normalise_question(question)}".encode()
+        ).hexdigest()
+
+    def get(self, agent_name: str, question: str) -> Tuple[bool, Any]:
+        """Look up a cached response.
+
+        Args:
+            agent_name (str): The name of the agent.
+            question (str): The question passed to the agent.
+
+        Returns:
+            Tuple[bool, Any]: Whether the response was cached and, if so, the response.
+
+        """
+        key = self._key(agent_name, question)
+        now = time.time()
+        with self._lock:
+            row = self._con.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", [key]
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._con.execute("DELETE FROM responses WHERE key = ?", [key])
+                    self._con.commit()
+                self.misses[agent_name] += 1
+                return False, None
+
+            self._con.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", [now, key]
+            )
+            self._con.commit()
+            self.hits[agent_name] += 1
+        logger.debug(f"Cache hit for {agent_name} agent.")
+        return True, json.loads(row[0])
+
+    def set(self, agent_name: str, question: str, value: Any, ttl: int) -> None:
+        """Store a response, evicting the least recently used responses if the cache is full.
+
+        Args:
+            agent_name (str): The name of the agent.
+            question (str): The question passed to the agent.
+            value (Any): The JSON serialisable response.
+            ttl (int): Number of seconds the response is valid for.
+
+        """
+        serialised = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    self._key(agent_name, question),
+                    agent_name,
+                    normalise_question(question),
+                    serialised,
+                    len(serialised),
+                    now + ttl,
+                    now,
+                ],
+            )
+            self._evict()
+            self._con.commit()
+
+    def _evict(self) -> None:
+        self._con.execute("DELETE FROM responses WHERE expires_at < ?", [time.time()])
+        total_size = self._con.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        evict_keys = []
+        for key, size in self._con.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total_size <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            total_size -= size
+        logger.debug(f"Evicting {len(evict_keys)} responses from cache.")
+        self._con.executemany("DELETE FROM responses WHERE key = ?", evict_keys)
+
+    def invalidate(self, agent_name: str | None = None) -> int:
+        """Delete cached responses.
+
+        Args:
+            agent_name (str | None): Only delete responses from this agent. If None, delete all responses.
+
+        Returns:
+            int: The number of deleted responses.
+
+        """
+        with self._lock:
+            if agent_name is None:
+                cursor = self._con.execute("DELETE FROM responses")
+            else:
+                cursor = self._con.execute(
+                    "DELETE FROM responses WHERE agent_name = ?", [agent_name]
+                )
+            self._con.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size of the cache.
+
+        Returns:
+            Dict[str, Any]: Hits, misses and hit ratio per agent plus totals.
+
+        """
+        with self._lock:
+            entries, size = self._con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        agents = {
+            agent_name: {
+                "hits": self.hits[agent_name],
+                "misses": self.misses[agent_name],
+                "hit_ratio": self.hits[agent_name]
+                / (self.hits[agent_name] + self.misses[agent_name]),
+            }
+            for agent_name in sorted(set(self.hits) | set(self.misses))
+        }
+        return {
+            "agents": agents,
+            "hits": self.hits.total(),
+            "misses": self.misses.total(),
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+
+@cache
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache.
+
+    Returns:
+        ResponseCache: The response cache stored in CACHE_DIR.
+
+    """
+    return ResponseCache(CACHE_DIR / "responses.sqlite")
@@ -0,0 +1,332 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ["auto", "off", "record", "replay"]
+_CALLBACKS = [
+    "before_model_callback",
+    "after_model_callback",
+    "before_tool_callback",
+    "after_tool_callback",
+]
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was not recorded."""
+
+
+def get_cassette_mode() -> str:
+    """Return the cassette mode selected by the `MISSTEA_CASSETTE_MODE` environment variable.
+
+    "auto" (the default) replays recorded traffic and records anything missing,
+    "record" calls everything live and overwrites the cassette, "replay" never
+    calls anything live and "off" disables cassettes.
+
+    Returns:
+        str: The cassette mode.
+
+    Raises:
+        ValueError: If `MISSTEA_CASSETTE_MODE` is not a known mode.
+
+    """
+    mode = os.getenv("MISSTEA_CASSETTE_MODE", "auto").lower()
+    if mode not in CASSETTE_MODES:
+        raise ValueError(
+            f"MISSTEA_CASSETTE_MODE must be one of {', '.join(CASSETTE_MODES)}. Got `{mode}`."
+        )
+    return mode
+
+
+def _hash(value: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _request_key(agent_name: str, llm_request: LlmRequest) -> str:
+    contents = []
+    for content in llm_request.contents:
+        parts = []
+        for part in content.parts or []:
+            part = part.model_dump(mode="json", exclude_none=True)
+            # Function call IDs are random, so they'd never match between runs
+            for key in ["function_call", "function_response"]:
+                if key in part:
+                    part[key].pop("id", None)
+            parts.append(part)
+        contents.append({"role": content.role, "parts": parts})
+    return _hash({"agent": agent_name, "contents": contents})
+
+
+def _tool_key(agent_name: str, tool_name: str, args: Dict[str, Any]) -> str:
+    return _hash({"agent": agent_name, "tool": tool_name, "args": args})
+
+
+class Cassette:
+    """Recording of the model and tool traffic of agents, stored as a JSON file.
+
+    Model responses are keyed by the agent and the contents of the request, tool
+    responses by the agent, tool and arguments. Repeated identical requests are
+    replayed in the order they were recorded.
+    """
+
+    def __init__(self, path: Path, mode: str = "auto"):
+        """Load (if it exists) a cassette.
+
+        Args:
+            path (Path): Path of the cassette file.
+            mode (str): One of "auto", "record" or "replay", see `get_cassette_mode()`.
+
+        """
+        self.path = path
+        self.mode = mode
+        self.recordings: Dict[str, Dict[str, List[Any]]] = {
+            "models": {},
+            "tools": {},
+            "toolsets": {},
+        }
+        if mode != "record" and path.exists():
+            self.recordings.update(json.loads(path.read_text()))
+        self.modified = False
+        self._replayed: Counter[str] = Counter()
+        self._pending: Dict[tuple[str, str], str] = {}
+        self._replayed_calls: set[str] = set()
+
+    def _replay(self, kind: str, key: str, description: str) -> Optional[Any]:
+        if self.mode != "record" and (recorded := self.recordings[kind].get(key)):
+            value = recorded[self._replayed[key] % len(recorded)]
+            self._replayed[key] += 1
+            return value
+        if self.mode == "replay":
+            raise CassetteMissError(f"No recording of {description} in {self.path}.")
+        return None
+
+    def _record(self, kind: str, key: str, value: Any, replace: bool = False) -> None:
+        if replace:
+            self.recordings[kind][key] = [value]
+        else:
+            self.recordings[kind].setdefault(key, []).append(value)
+        self.modified = True
+
+    def save(self) -> None:
+        """Write the cassette to disk, if anything was recorded."""
+        if not self.modified:
+            return
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path.parent, delete=False, suffix=".json"
+        ) as f:
+            json.dump(self.recordings, f, indent=2, sort_keys=True)
+            f.write("\n")
+        Path(f.name).replace(self.path)
+        self.modified = False
+
+    def before_model_callback(
+        self, *, callback_context: Any, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        """Return the recorded response to a model request, if there is one.
+
+        Returns:
+            Optional[LlmResponse]: The recorded response, None to call the model.
+
+        """
+        key = _request_key(callback_context.agent_name, llm_request)
+        recorded = self._replay(
+            "models", key, f"a model request by {callback_context.agent_name}"
+        )
+        if recorded is not None:
+            # Validated from JSON so base64 encoded bytes, e.g. thought signatures, are decoded
+            return LlmResponse.model_validate_json(json.dumps(recorded))
+        self._pending[callback_context.invocation_id, callback_context.agent_name] = key
+        return None
+
+    def after_model_callback(
+        self, *, callback_context: Any, llm_response: LlmResponse
+    ) -> None:
+        """Record the response to a live model request."""
+        if llm_response.partial:
+            return
+        key = self._pending.pop(
+            (callback_context.invocation_id, callback_context.agent_name), None
+        )
+        if key is not None:
+            self._record(
+                "models", key, llm_response.model_dump(mode="json", exclude_none=True)
+            )
+
+    def before_tool_callback(
+        self,
+        *,
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: Any,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the recorded response of a tool call, if there is one.
+
+        Returns:
+            Optional[Dict[str, Any]]: The recorded response, None to call the tool.
+
+        """
+        key = _tool_key(tool_context.agent_name, tool.name, args)
+        recorded = self._replay("tools", key, f"a call to {tool.name}")
+        if recorded is None:
+            return None
+        # After tool callbacks still run for replayed calls, they mustn't be recorded again
+        self._replayed_calls.add(tool_context.function_call_id)
+        return recorded["response"]
+
+    def after_tool_callback(
+        self,
+        *,
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: Any,
+        tool_response: Any,
+    ) -> None:
+        """Record the response of a live tool call."""
+        if tool_context.function_call_id in self._replayed_calls:
+            self._replayed_calls.discard(tool_context.function_call_id)
+            return
+        key = _tool_key(tool_context.agent_name, tool.name, args)
+        # Round trip through JSON, so replayed responses match what was recorded.
+        # Responses are wrapped like ADK does for non-dicts, so they're never falsy
+        # and always short-circuit the tool when replayed.
+        response = json.loads(json.dumps(tool_response, default=str))
+        if not isinstance(response, dict) or not response:
+            response = {"result": response}
+        self._record("tools", key, {"tool": tool.name, "response": response})
+
+
+class _ReplayTool(BaseTool):
+    """Tool with a recorded declaration, calls to it are always replayed."""
+
+    def __init__(self, declaration: Dict[str, Any]):
+        self.declaration = types.FunctionDeclaration.model_validate(declaration)
+        super().__init__(
+            name=self.declaration.name or "",
+            description=self.declaration.description or "",
+        )
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        return self.declaration
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: Any) -> Any:  # noqa: ARG002
+        raise CassetteMissError(f"No recording of a call to {self.name}.")
+
+
+class _CassetteToolset(BaseToolset):
+    """Records the tool declarations of a toolset, e.g. MCP, so replays don't connect to it."""
+
+    def __init__(self, cassette: Cassette, key: str, toolset: BaseToolset):
+        super().__init__()
+        self.cassette = cassette
+        self.key = key
+        self.toolset = toolset
+
+    async def get_tools(
+        self, readonly_context: Optional[ReadonlyContext] = None
+    ) -> List[BaseTool]:
+        declarations = self.cassette._replay(
+            "toolsets", self.key, f"the tools of {self.key}"
+        )
+        if declarations is not None:
+            return [_ReplayTool(x) for x in declarations]
+
+        tools = await self.toolset.get_tools_with_prefix(readonly_context)
+        self.cassette._record(
+            "toolsets",
+            self.key,
+            [
+                declaration.model_dump(mode="json", exclude_none=True)
+                for x in tools
+                if (declaration := x._get_declaration()) is not None
+            ],
+            replace=True,
+        )
+        return tools
+
+    async def close(self) -> None:
+        await self.toolset.close()
+
+
+def _iter_llm_agents(agent: BaseAgent) -> Iterator[LlmAgent]:
+    if isinstance(agent, LlmAgent):
+        yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _iter_llm_agents(sub_agent)
+
+
+def _as_list(callback: Any) -> List[Any]:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+@contextmanager
+def use_cassette(
+    agent: BaseAgent, path: Path, mode: Optional[str] = None
+) -> Iterator[Optional[Cassette]]:
+    """Record or replay the model and tool traffic of an agent and its sub-agents.
+
+    Works with any runner, including `AgentEvaluator`, as it installs agent
+    callbacks rather than a plugin. The callbacks are removed and the cassette is
+    saved when the block exits.
+
+    Args:
+        agent (BaseAgent): The root of the agent tree.
+        path (Path): Path of the cassette file.
+        mode (Optional[str]): The cassette mode, defaults to `get_cassette_mode()`.
+
+    Yields:
+        Optional[Cassette]: The cassette, None if the mode is "off".
+
+    """
+    mode = mode or get_cassette_mode()
+    if mode == "off":
+        yield None
+        return
+
+    cassette = Cassette(path, mode)
+    originals = []
+    for llm_agent in _iter_llm_agents(agent):
+        originals.append(
+            (llm_agent, {k: getattr(llm_agent, k) for k in [*_CALLBACKS, "tools"]})
+        )
+        # Replayed responses short-circuit the agent's own callbacks, and live
+        # responses are recorded before the agent's callbacks change them
+        for name in _CALLBACKS:
+            setattr(
+                llm_agent,
+                name,
+                [getattr(cassette, name), *_as_list(getattr(llm_agent, name))],
+            )
+        llm_agent.tools = [
+            _CassetteToolset(cassette, f"{llm_agent.name}/{i}", x)
+            if isinstance(x, BaseToolset)
+            else x
+            for i, x in enumerate(llm_agent.tools)
+        ]
+
+    try:
+        yield cassette
+    finally:
+        for llm_agent, attributes in originals:
+            for name, value in attributes.items():
+                setattr(llm_agent, name, value)
+        cassette.save()
+        logger.debug(f"Cassette {path}: {cassette._replayed.total()} replayed.")
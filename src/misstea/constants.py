@@ -1,7 +1,52 @@
 import os
 from pathlib import Path
 
+AGENT_CACHE_MAX_BYTES = int(
+    os.getenv("MISSTEA_CACHE_MAX_BYTES", 100 * 1024 * 1024)
+)  # Least recently used responses are evicted beyond this size
+AGENT_CACHE_TTLS = {
+    "github": 60 * 60,
+    "google_search": 6 * 60 * 60,
+    "terraform": 7 * 24 * 60 * 60,
+}  # Seconds, agents not listed (e.g. side-effecting outlook and coding) are never cached
 AGENT_MODEL = "gemini-2.5-flash"  # https://ai.google.dev/gemini-api/docs/models#gemini-2.5-flash-preview
+AGENT_MODELS = {
+    "calculator": "gemini-2.5-flash-lite",
+    "web_scraper": "gemini-2.5-flash-lite",
+}  # Agents and LoopAgent stages not listed use AGENT_MODEL, see misstea.models
+AGENT_TIMEOUT_SECONDS = {
+    "calculator": 60,
+    "google_search": 120,
+    "image_generator": 180,
+    "interactive_blogger": 900,
+    "web_scraper": 180,
+}  # Agents not listed use DEFAULT_AGENT_TIMEOUT_SECONDS
+CACHE_DIR = Path(os.getenv("MISSTEA_CACHE_DIR", Path.home() / ".cache" / "misstea"))
+CODE_INDEX_MAX_FILE_BYTES = 1024**2  # Larger files are not indexed by search_code
+CODE_INDEX_PATH = Path(
+    os.getenv("MISSTEA_CODE_INDEX", CACHE_DIR / "code_index.sqlite")
+)  # Full-text index used by search_code
+DEFAULT_AGENT_TIMEOUT_SECONDS = 300
+DIRECTORY_IGNORE_PATTERNS = [
+    ".git/",
+    ".idea/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    ".tox/",
+    ".venv/",
+    "__pycache__/",
+    "node_modules/",
+    "target/",
+    "venv/",
+    "*.pyc",
+    ".DS_Store",
+]  # .gitignore syntax, skipped when walking directories in addition to .gitignore files
+LIST_DIRECTORY_LIMIT = 500  # Entries per page returned by list_directory_contents
+LLM_MAX_CONCURRENCY = int(os.getenv("MISSTEA_LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_RETRIES = int(os.getenv("MISSTEA_LLM_MAX_RETRIES", 5))  # Retries on HTTP 429
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("MISSTEA_LLM_REQUESTS_PER_MINUTE", 1000))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("MISSTEA_LLM_TOKENS_PER_MINUTE", 1_000_000))
 MEETING_ROOMS = [
     {"name": "Airflow", "screen": True},
     {"name": "Arcus", "screen": False},
@@ -10,7 +55,39 @@ MEETING_ROOMS = [
     {"name": "Python", "screen": True},
     {"name": "PyTorch", "screen": True},
 ]
+MODEL_CONFIG_PATH = Path(
+    os.getenv(
+        "MISSTEA_MODEL_CONFIG", Path.home() / ".config" / "misstea" / "models.toml"
+    )
+)
 MY_EMAIL_ADDRESS = os.environ["MY_EMAIL_ADDRESS"]
 OUTLOOK_TOKEN_PATH = Path(
     __file__
 ).parent.parent.parent  # i.e in root directory of this repo
+PARQUET_ROW_LIMIT = 100  # Default rows returned by read_file for Parquet files
+PROFILE_DATASET_SAMPLE_BYTES = 256 * 1024**2  # Files larger than this are sampled
+PROFILE_DATASET_SAMPLE_ROWS = 1_000_000  # Rows profiled when sampling
+QUERY_FILES_MAX_BYTES = 100_000  # Size of the rows returned by query_files
+QUERY_FILES_MAX_ROWS = 1000  # Default rows returned by query_files
+QUERY_FILES_TIMEOUT_SECONDS = int(os.getenv("MISSTEA_QUERY_FILES_TIMEOUT_SECONDS", 60))
+READ_DIRECTORY_MAX_BYTES = int(
+    os.getenv("MISSTEA_READ_DIRECTORY_MAX_BYTES", 400_000)
+)  # Default budget of read_directory, about 100k tokens
+READ_DIRECTORY_THREADS = 8  # Files read_directory reads at the same time
+SEARCH_CODE_LIMIT = 20  # Default results returned by search_code
+SESSION_DB_PATH = Path(os.getenv("MISSTEA_SESSION_DB", CACHE_DIR / "sessions.sqlite"))
+SESSION_MAX_EVENTS = int(
+    os.getenv("MISSTEA_SESSION_MAX_EVENTS", 1000)
+)  # Most recent events loaded with a session, 0 loads all of them
+SESSION_TTL_SECONDS = int(
+    os.getenv("MISSTEA_SESSION_TTL_SECONDS", 30 * 24 * 60 * 60)
+)  # Sessions not updated for this long are deleted, 0 keeps them forever
+STATE_BLOB_MAX_BYTES = int(
+    os.getenv("MISSTEA_STATE_BLOB_MAX_BYTES", 1024 * 1024 * 1024)
+)  # Least recently used blobs are deleted beyond this size
+STATE_SPILL_THRESHOLD_BYTES = int(
+    os.getenv("MISSTEA_STATE_SPILL_BYTES", 16 * 1024)
+)  # Session state values larger than this are stored in the blob store
+TOOL_MAX_THREADS = int(
+    os.getenv("MISSTEA_TOOL_MAX_THREADS", 16)
+)  # Threads that blocking tools, e.g. Outlook and DuckDB, run in
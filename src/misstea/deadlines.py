@@ -0,0 +1,68 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from misstea.constants import AGENT_TIMEOUT_SECONDS, DEFAULT_AGENT_TIMEOUT_SECONDS
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "misstea_deadline", default=None
+)
+
+
+def get_agent_timeout(agent_name: str) -> float:
+    """Return the number of seconds a call to an agent may take.
+
+    Can be overridden per agent with a `MISSTEA_TIMEOUT_<AGENT_NAME>` environment variable.
+
+    Args:
+        agent_name (str): The name of the agent.
+
+    Returns:
+        float: The timeout in seconds.
+
+    """
+    env_timeout = os.getenv(f"MISSTEA_TIMEOUT_{agent_name.upper()}")
+    if env_timeout is not None:
+        return float(env_timeout)
+    return AGENT_TIMEOUT_SECONDS.get(agent_name, DEFAULT_AGENT_TIMEOUT_SECONDS)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """Set a deadline for the enclosed block, it cannot be later than an enclosing deadline.
+
+    The deadline is stored in a context variable, so it propagates to everything
+    called from the block, including tools run by sub-agents.
+
+    Args:
+        seconds (float): Number of seconds from now.
+
+    Yields:
+        float: The number of seconds until the effective deadline.
+
+    """
+    new_deadline = time.monotonic() + seconds
+    if (current := _deadline.get()) is not None:
+        new_deadline = min(new_deadline, current)
+    token = _deadline.set(new_deadline)
+    try:
+        yield new_deadline - time.monotonic()
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """Return the number of seconds until the current deadline.
+
+    Args:
+        default (Optional[float]): Returned if there is no deadline.
+
+    Returns:
+        Optional[float]: Seconds until the deadline, 0 if it has passed.
+
+    """
+    if (current := _deadline.get()) is None:
+        return default
+    return max(current - time.monotonic(), 0.0)
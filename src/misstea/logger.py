@@ -1,5 +1,21 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
 import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+# Invocation ID of the turn being handled, included in every log record
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "misstea_correlation_id", default=None
+)
+_listener: Optional[QueueListener] = None
 
 
 class CustomFormatter(logging.Formatter):
@@ -7,6 +23,7 @@ class CustomFormatter(logging.Formatter):
 
     def __init__(self, logging_level):
         """Initialise a custom logger."""
+        super().__init__()
         self.logging_level = logging_level
 
         grey = "\x1b[38;20m"
@@ -28,6 +45,9 @@ class CustomFormatter(logging.Formatter):
             logging.ERROR: red + log_format + reset,
             logging.CRITICAL: bold_red + log_format + reset,
         }
+        self._formatters = {
+            level: logging.Formatter(fmt) for level, fmt in self.FORMATS.items()
+        }
 
     def format(self, record: logging.LogRecord) -> str:
         """Set the format of a log record.
@@ -36,24 +56,146 @@ class CustomFormatter(logging.Formatter):
             str: The formatted log record.
 
         """
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._formatters.get(record.levelno, self._formatters[logging.INFO])
         return formatter.format(record)
 
 
-def configure_console_logging(verbosity: int):
-    """Initialise a logger with the specified log level."""
+class JsonFormatter(logging.Formatter):
+    """Formats log records as JSON objects, one per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a log record as JSON.
+
+        Returns:
+            str: The formatted log record.
+
+        """
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Adds the correlation ID of the current turn to log records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Set `correlation_id` on a log record.
+
+        Returns:
+            bool: Always True, no records are dropped.
+
+        """
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class LoggingPlugin(BasePlugin):
+    """ADK plugin that sets the correlation ID of log records for each turn.
+
+    The ID is the invocation ID of the turn, sub-agents called via AgentTool log
+    with the ID of the turn that called them.
+    """
+
+    def __init__(self):
+        """Initialise the logging plugin."""
+        super().__init__(name="misstea_logging")
+        self._turns: set[str] = set()
+
+    async def before_run_callback(self, *, invocation_context: Any) -> None:
+        """Set the correlation ID, unless this is a turn of a sub-agent."""
+        if _correlation_id.get() is None:
+            _correlation_id.set(invocation_context.invocation_id)
+            self._turns.add(invocation_context.invocation_id)
+
+    async def after_run_callback(self, *, invocation_context: Any) -> None:
+        """Clear the correlation ID at the end of the turn that set it."""
+        if invocation_context.invocation_id in self._turns:
+            self._turns.discard(invocation_context.invocation_id)
+            _correlation_id.set(None)
+
+
+class _QueueHandler(QueueHandler):
+    """Queue handler that keeps the traceback of a record separate from its message."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Format the message and traceback of a log record, so it can be queued.
+
+        `QueueHandler.prepare()` merges the traceback into the message, this keeps it
+        in `exc_text`, so the JSON formatter can log it as a separate field.
+
+        Returns:
+            logging.LogRecord: A copy of the log record.
+
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        # The traceback references the frames of the exception, don't keep them alive
+        record.exc_info = None
+        return record
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_console_logging(verbosity: int, log_format: Optional[str] = None):
+    """Initialise a logger with the specified log level.
+
+    Records are put on a queue and written to the console by a background thread,
+    so logging never blocks the event loop. Records below the log level are
+    dropped before their message is formatted.
+
+    Args:
+        verbosity (int): 0 logs INFO and above, 1 or more logs DEBUG.
+        log_format (Optional[str]): "text" or "json", defaults to the `MISSTEA_LOG_FORMAT` environment variable, otherwise "text".
+
+    """
+    global _listener
     logger = logging.getLogger("")
     logger.propagate = True
-    logger.setLevel(logging.DEBUG)  # handlers filter the level
 
     # Override via env var
     if os.getenv("LOG_LEVEL") == "DEBUG":
         loglevel = logging.DEBUG
     else:
         loglevel = logging.INFO if verbosity == 0 else max(2 - verbosity, 0) * 10
+    logger.setLevel(loglevel)
 
+    log_format = log_format or os.getenv("MISSTEA_LOG_FORMAT", "text")
     console_handler = logging.StreamHandler()
     console_handler.setLevel(loglevel)
-    console_handler.setFormatter(CustomFormatter(logging_level=loglevel))
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(
+        JsonFormatter() if log_format == "json" else CustomFormatter(loglevel)
+    )
+
+    _stop_listener()
+    for handler in [x for x in logger.handlers if isinstance(x, QueueHandler)]:
+        logger.removeHandler(handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.setLevel(loglevel)
+    queue_handler.addFilter(CorrelationIdFilter())
+    _listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+    queue_handler.listener = _listener
+    _listener.start()
+    logger.addHandler(queue_handler)
+
+
+# Flush records still on the queue when the process exits
+atexit.register(_stop_listener)
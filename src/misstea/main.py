@@ -1,27 +1,117 @@
 import asyncio
+import importlib.util
 import logging
+import os
 import shutil
 from pathlib import Path
 
 import click
-import nest_asyncio
 import uvicorn
 from google.adk.cli.cli import run_cli
 from google.adk.cli.fast_api import get_fast_api_app
 
 from misstea import agent  # noqa: F401
+from misstea.batch import run_batch
 from misstea.logger import configure_console_logging
+from misstea.sessions import get_session_service_uri
+from misstea.streaming import stream_sub_agents
+from misstea.sub_agents import preload_agents
+from misstea.tracing import TRACE_PATH, summarize_traces
 
-nest_asyncio.apply()
+logger = logging.getLogger(__name__)
 
 
 @click.command()
 @click.argument("command", default="web", nargs=1)
+@click.argument("args", nargs=-1)
 @click.option("-p", "--port", help="Port to run web interface on.", default=9876)
+@click.option(
+    "--host",
+    help="Host to bind to, `serve` only.",
+    default="127.0.0.1",
+    show_default=True,
+)
+@click.option(
+    "--workers",
+    help="Number of worker processes, `serve` only. Defaults to the WEB_CONCURRENCY environment variable, otherwise 1.",
+    default=lambda: int(os.getenv("WEB_CONCURRENCY", 1)),
+    type=int,
+)
+@click.option(
+    "--loop",
+    help="Event loop implementation, `serve` only. `auto` uses uvloop if it is installed, it isn't a dependency of misstea, otherwise asyncio.",
+    default="auto",
+    show_default=True,
+    type=click.Choice(["auto", "asyncio", "uvloop"]),
+)
+@click.option(
+    "--http",
+    help="HTTP protocol implementation, `serve` only. `auto` uses httptools if it is installed, it isn't a dependency of misstea, otherwise h11.",
+    default="auto",
+    show_default=True,
+    type=click.Choice(["auto", "h11", "httptools"]),
+)
+@click.option(
+    "--timeout-keep-alive",
+    help="Seconds to keep idle connections open, `serve` only.",
+    default=30,
+    show_default=True,
+)
+@click.option(
+    "--timeout-graceful-shutdown",
+    help="Seconds to wait for in-flight requests on shutdown, `serve` only.",
+    default=60,
+    show_default=True,
+)
+@click.option(
+    "-c",
+    "--concurrency",
+    help="Number of prompts to run at the same time, `batch` only.",
+    default=4,
+    show_default=True,
+)
+@click.option(
+    "-o",
+    "--output",
+    help="Output JSONL file, `batch` only. Defaults to the input file with a `.results.jsonl` suffix.",
+    default=None,
+    type=click.Path(path_type=Path),
+)
+@click.option(
+    "--preload",
+    help="Comma-separated sub-agents to load at startup (or 'all'). Defaults to the MISSTEA_PRELOAD_AGENTS environment variable, otherwise sub-agents are loaded on first use.",
+    default=None,
+)
+@click.option(
+    "--log-format",
+    help="Format of log records. `json` writes one object per line, with the invocation ID of the turn as `correlation_id`. Defaults to the MISSTEA_LOG_FORMAT environment variable, otherwise `text`.",
+    default=None,
+    type=click.Choice(["text", "json"]),
+)
 @click.option("-v", "--verbosity", help="Verbosity.", default=0, count=True)
-def cli(command: str, port: int, verbosity: int) -> None:
-    """Provide the main CLI entry point for MissTea."""
-    configure_console_logging(verbosity)
+def cli(
+    command: str,
+    args: tuple[str, ...],
+    port: int,
+    host: str,
+    workers: int,
+    loop: str,
+    http: str,
+    timeout_keep_alive: int,
+    timeout_graceful_shutdown: int,
+    concurrency: int,
+    output: Path | None,
+    preload: str | None,
+    log_format: str | None,
+    verbosity: int,
+) -> None:
+    """Provide the main CLI entry point for MissTea.
+
+    Raises:
+        UsageError: If the arguments for the command are invalid.
+
+    """
+    configure_console_logging(verbosity, log_format)
     logging.getLogger("google_adk.google.adk.tools.base_authenticated_tool").setLevel(
         logging.ERROR
     )
@@ -35,10 +125,19 @@ def cli(command: str, port: int, verbosity: int) -> None:
     if egg_paths != []:
         shutil.rmtree(egg_paths[0])
 
+    # `serve` workers warm up in their own processes, see misstea.server
+    if command != "serve":
+        preload_agents(
+            [x.strip() for x in preload.split(",") if x.strip()] if preload else None
+        )
+
     if command == "web":
         app = get_fast_api_app(
-            agents_dir=Path(__file__).parent.parent.absolute().__str__(), web=True
+            agents_dir=Path(__file__).parent.parent.absolute().__str__(),
+            session_service_uri=get_session_service_uri(),
+            web=True,
         )
+        stream_sub_agents(app)
         config = uvicorn.Config(
             app,
             host="127.0.0.1",
@@ -47,11 +146,63 @@ def cli(command: str, port: int, verbosity: int) -> None:
         )
         server = uvicorn.Server(config)
         server.run()
+    elif command == "serve":
+        # Workers are separate processes, so settings are passed on through the environment
+        os.environ["MISSTEA_VERBOSITY"] = str(verbosity)
+        if log_format:
+            os.environ["MISSTEA_LOG_FORMAT"] = log_format
+        if preload:
+            os.environ["MISSTEA_PRELOAD_AGENTS"] = preload
+        # uvicorn falls back silently, so say which implementations are used
+        for option, module, fallback in [
+            (loop, "uvloop", "asyncio"),
+            (http, "httptools", "h11"),
+        ]:
+            if option == "auto" and importlib.util.find_spec(module) is None:
+                logger.info(f"{module} is not installed, using {fallback}.")
+        uvicorn.run(
+            "misstea.server:create_app",
+            factory=True,
+            host=host,
+            port=port,
+            workers=workers,
+            loop=loop,
+            http=http,
+            timeout_keep_alive=timeout_keep_alive,
+            timeout_graceful_shutdown=timeout_graceful_shutdown,
+        )
     elif command == "run":
         asyncio.run(
             run_cli(
                 agent_parent_dir=Path(__file__).parent.parent.absolute().__str__(),
                 agent_folder_name=Path(__file__).parent.name,
                 save_session=False,
+                session_service_uri=get_session_service_uri(),
             )
         )
+    elif command == "batch":
+        if len(args) != 1:
+            raise click.UsageError("Usage: misstea batch INPUT_JSONL [-o OUTPUT_JSONL]")
+        input_path = Path(args[0])
+        output_path = output or input_path.with_suffix(".results.jsonl")
+        summary = asyncio.run(run_batch(input_path, output_path, concurrency))
+        click.echo(f"\nResults written to {output_path}:")
+        for key, value in summary.items():
+            click.echo(f"  {key:<20} {value}")
+    elif command == "trace":
+        if args[:1] != ("summarize",):
+            raise click.UsageError("Usage: misstea trace summarize [TRACE_PATH]")
+        trace_path = Path(args[1]) if len(args) > 1 else TRACE_PATH
+        if not (summary := summarize_traces(trace_path)):
+            click.echo(
+                f"No traces in {trace_path}, set MISSTEA_TRACE=jsonl to record them."
+            )
+        for kind, rows in summary.items():
+            click.echo(f"\n{kind}:")
+            click.echo(
+                f"  {'name':<45} {'count':>6} {'errors':>6} {'p50_ms':>9} {'p95_ms':>9} {'max_ms':>9} {'tokens':>8}"
+            )
+            for row in rows:
+                click.echo(
+                    f"  {row['name']:<45} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['max_ms']:>9} {row['total_tokens']:>8}"
+                )
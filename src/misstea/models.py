@@ -0,0 +1,81 @@
+import logging
+import os
+import tomllib
+from functools import cache
+from pathlib import Path
+from typing import Dict
+
+from misstea.constants import AGENT_MODEL, AGENT_MODELS, MODEL_CONFIG_PATH
+from misstea.scheduler import Priority, ScheduledGemini
+
+logger = logging.getLogger(__name__)
+
+
+def load_model_config(path: Path = MODEL_CONFIG_PATH) -> Dict[str, str]:
+    """Load the model to use for each agent.
+
+    Models are taken from `AGENT_MODELS`, then the `[models]` table of the config
+    file, then `MISSTEA_MODEL_<AGENT_NAME>` environment variables, later sources
+    taking precedence. The `default` key sets the model of agents not listed.
+
+    Args:
+        path (Path): Path of the TOML config file, ignored if it doesn't exist.
+
+    Returns:
+        Dict[str, str]: Model names keyed by agent name, including `default`.
+
+    """
+    models = {"default": AGENT_MODEL, **AGENT_MODELS}
+    if path.exists():
+        with path.open("rb") as f:
+            models.update(tomllib.load(f).get("models", {}))
+    prefix = "MISSTEA_MODEL_"
+    models.update(
+        {
+            k.removeprefix(prefix).lower(): v
+            for k, v in os.environ.items()
+            if k.startswith(prefix) and k != "MISSTEA_MODEL_CONFIG"
+        }
+    )
+    return models
+
+
+@cache
+def get_model_config() -> Dict[str, str]:
+    """Return the model config, it is loaded once per process.
+
+    Returns:
+        Dict[str, str]: Model names keyed by agent name, including `default`.
+
+    """
+    models = load_model_config()
+    logger.debug(f"Model config: {models}")
+    return models
+
+
+def get_model_name(agent_name: str) -> str:
+    """Return the name of the model an agent uses.
+
+    Args:
+        agent_name (str): The name of the agent, e.g. "calculator" or "blog_writer".
+
+    Returns:
+        str: The model name.
+
+    """
+    models = get_model_config()
+    return models.get(agent_name, models["default"])
+
+
+def get_model(agent_name: str, priority: int = Priority.INTERACTIVE) -> ScheduledGemini:
+    """Return the model for an agent, with requests going through the scheduler.
+
+    Args:
+        agent_name (str): The name of the agent, e.g. "calculator" or "blog_writer".
+        priority (int): The scheduling priority of the agent's requests.
+
+    Returns:
+        ScheduledGemini: The model.
+
+    """
+    return ScheduledGemini(model=get_model_name(agent_name), priority=priority)
@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Any, Awaitable, Callable, TypeVar
+
+from misstea.constants import TOOL_MAX_THREADS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@cache
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool blocking tools run in, it is shared by everything in the process.
+
+    Returns:
+        ThreadPoolExecutor: The thread pool.
+
+    """
+    logger.debug(f"Starting thread pool with {TOOL_MAX_THREADS} threads.")
+    return ThreadPoolExecutor(
+        max_workers=TOOL_MAX_THREADS, thread_name_prefix="misstea-tool"
+    )
+
+
+async def run_in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call a blocking function in the thread pool, without blocking the event loop.
+
+    Context variables, such as the current deadline and trace span, are copied to
+    the thread.
+
+    Args:
+        func (Callable[..., T]): The function.
+        *args (Any): Positional arguments for the function.
+        **kwargs (Any): Keyword arguments for the function.
+
+    Returns:
+        T: The return value of the function.
+
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+def offload(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Turn a blocking function into an async function that runs in the thread pool.
+
+    The name, docstring and signature are kept, so the result can be given to an
+    agent as a tool.
+
+    Args:
+        func (Callable[..., T]): The blocking function, e.g. a tool that uses O365 or DuckDB.
+
+    Returns:
+        Callable[..., Awaitable[T]]: The async function.
+
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_in_thread(func, *args, **kwargs)
+
+    return wrapper
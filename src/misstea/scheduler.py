@@ -0,0 +1,316 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import cache
+from typing import Any, AsyncGenerator, Deque, Dict, List
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai.errors import ClientError
+
+from misstea.constants import (
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+)
+from misstea.deadlines import remaining_time
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Priority of a model request, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: int):
+        """Initialise a full token bucket.
+
+        Args:
+            per_minute (int): The refill rate, also the capacity of the bucket.
+
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def delay(self, amount: float) -> float:
+        """Return the number of seconds until `amount` tokens are available.
+
+        Args:
+            amount (float): The number of tokens required.
+
+        Returns:
+            float: Seconds to wait, 0 if the tokens are available now.
+
+        """
+        self._refill()
+        return max(min(amount, self.capacity) - self.tokens, 0) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take tokens from the bucket, a negative balance is paid back by the refill.
+
+        Args:
+            amount (float): The number of tokens, negative values return tokens.
+
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass
+class _LoopState:
+    """Queue and concurrency slots of the requests made from one event loop."""
+
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+    waiting: List[tuple[int, int]] = field(default_factory=list)
+    active: int = 0
+
+
+class LlmScheduler:
+    """Process-wide scheduler for model requests.
+
+    Requests wait in a priority queue until they are at the front, a concurrency
+    slot is free and both the request and token rate limits allow them through.
+    The rate limits are shared by the whole process. Waiters can't span event
+    loops, so every loop has its own queue and concurrency slots.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+    ):
+        """Initialise a scheduler.
+
+        Args:
+            requests_per_minute (int): Maximum requests per minute.
+            tokens_per_minute (int): Maximum (estimated) tokens per minute.
+            max_concurrency (int): Maximum number of requests in flight.
+
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.rate_limited = 0
+        self.wait_times: Deque[float] = deque(maxlen=1000)
+        self._sequence = itertools.count()
+        self._states: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, _LoopState
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def active(self) -> int:
+        """The number of requests in flight, from all event loops."""
+        return sum(x.active for x in list(self._states.values()))
+
+    def _get_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        if (state := self._states.get(loop)) is None:
+            state = self._states[loop] = _LoopState()
+        return state
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: int = Priority.INTERACTIVE, tokens: int = 0
+    ) -> AsyncGenerator[None, None]:
+        """Wait for permission to send a model request.
+
+        Args:
+            priority (int): The priority of the request.
+            tokens (int): The estimated number of tokens the request uses.
+
+        Yields:
+            None: Once the request may be sent, the slot is held until the block exits.
+
+        """
+        state = self._get_state()
+        entry = (priority, next(self._sequence))
+        queued_at = time.monotonic()
+        async with state.condition:
+            heapq.heappush(state.waiting, entry)
+            try:
+                while True:
+                    await state.condition.wait_for(
+                        lambda: (
+                            state.waiting[0] == entry
+                            and state.active < self.max_concurrency
+                        )
+                    )
+                    delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+                    if delay <= 0:
+                        break
+                    # Keep our place at the front of the queue while the buckets refill
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(state.condition.wait(), delay)
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+                state.active += 1
+            finally:
+                state.waiting.remove(entry)
+                heapq.heapify(state.waiting)
+                state.condition.notify_all()
+
+        self.wait_times.append(time.monotonic() - queued_at)
+        try:
+            yield
+        finally:
+            async with state.condition:
+                state.active -= 1
+                state.condition.notify_all()
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the actual token count of a request is known.
+
+        Args:
+            estimated_tokens (int): The tokens passed to `slot()`.
+            actual_tokens (int): The tokens reported by the model.
+
+        """
+        self.tokens.consume(actual_tokens - estimated_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue wait time and throttling metrics.
+
+        Returns:
+            Dict[str, Any]: Metrics for the most recent requests.
+
+        """
+        wait_times = sorted(self.wait_times) or [0.0]
+        return {
+            "active": self.active,
+            "waiting": sum(len(x.waiting) for x in list(self._states.values())),
+            "rate_limited": self.rate_limited,
+            "requests": len(self.wait_times),
+            "wait_p50_ms": round(wait_times[len(wait_times) // 2] * 1000, 1),
+            "wait_p95_ms": round(wait_times[int(len(wait_times) * 0.95)] * 1000, 1),
+            "wait_max_ms": round(wait_times[-1] * 1000, 1),
+        }
+
+
+@cache
+def get_scheduler() -> LlmScheduler:
+    """Return the process-wide scheduler.
+
+    Returns:
+        LlmScheduler: The scheduler configured by the LLM_* constants.
+
+    """
+    return LlmScheduler()
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Return a full-jitter exponential backoff delay.
+
+    Args:
+        attempt (int): The number of the retry, starting at 0.
+        base (float): The delay of the first retry before jitter.
+        cap (float): The maximum delay before jitter.
+
+    Returns:
+        float: Seconds to wait.
+
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))  # noqa: S311
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Estimate the number of tokens a request uses, at roughly 4 characters per token.
+
+    Args:
+        llm_request (LlmRequest): The request.
+
+    Returns:
+        int: The estimated number of tokens.
+
+    """
+    characters = len(str(llm_request.config.system_instruction or ""))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            characters += len(part.text or "")
+    return characters // 4 + 1
+
+
+class ScheduledGemini(Gemini):
+    """Gemini model whose requests go through the process-wide scheduler."""
+
+    priority: int = Priority.INTERACTIVE
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Send a request once the scheduler allows it, backing off on 429s.
+
+        Args:
+            llm_request (LlmRequest): The request.
+            stream (bool): Whether to stream the response.
+
+        Yields:
+            LlmResponse: The responses from the model.
+
+        Raises:
+            ClientError: If the request fails, or is still rate limited after LLM_MAX_RETRIES retries.
+
+        """
+        scheduler = get_scheduler()
+        estimated_tokens = estimate_tokens(llm_request)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            responded = False
+            final_responses = []
+            try:
+                async with scheduler.slot(self.priority, estimated_tokens):
+                    async for response in super().generate_content_async(
+                        llm_request, stream=stream
+                    ):
+                        if response.usage_metadata and not response.partial:
+                            scheduler.record_usage(
+                                estimated_tokens,
+                                response.usage_metadata.total_token_count or 0,
+                            )
+                        if response.partial:
+                            responded = True
+                            yield response
+                        else:
+                            final_responses.append(response)
+            except ClientError as e:
+                # Only retry if nothing has been yielded, otherwise the response would be duplicated
+                if e.code != 429 or responded or attempt == LLM_MAX_RETRIES:
+                    raise
+                scheduler.rate_limited += 1
+                delay = backoff_delay(attempt)
+                if (remaining := remaining_time()) is not None and delay > remaining:
+                    raise
+                logger.warning(
+                    f"Rate limited by {self.model}, retrying in {delay:.1f} seconds."
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            # Function calls in final responses are executed while this generator is
+            # suspended, and may call sub-agents, so they are yielded after the slot is
+            # released to avoid exhausting the concurrency limit.
+            for response in final_responses:
+                yield response
+            return
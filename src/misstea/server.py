@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from google.adk.agents import BaseAgent
+from google.adk.cli.fast_api import get_fast_api_app
+from google.adk.tools.base_toolset import BaseToolset
+
+from misstea.logger import configure_console_logging
+from misstea.sessions import get_session_service_uri
+from misstea.streaming import stream_sub_agents
+from misstea.sub_agents import get_agent, preload_agents
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("MISSTEA_WARMUP_TIMEOUT_SECONDS", 60))
+
+
+def _iter_toolsets(agent: BaseAgent) -> List[tuple[str, BaseToolset]]:
+    toolsets = [
+        (agent.name, x)
+        for x in getattr(agent, "tools", [])
+        if isinstance(x, BaseToolset)
+    ]
+    for sub_agent in agent.sub_agents:
+        toolsets.extend(_iter_toolsets(sub_agent))
+    return toolsets
+
+
+async def warm_up(readiness: Dict[str, Any]) -> None:
+    """Load the sub-agents and connect their toolsets, e.g. MCP servers.
+
+    The sub-agents in `MISSTEA_PRELOAD_AGENTS` are loaded, all of them if it is not
+    set. Toolsets that fail to connect within `WARMUP_TIMEOUT_SECONDS` are reported
+    in `readiness["errors"]` and connect on first use instead.
+
+    Args:
+        readiness (Dict[str, Any]): Updated with the progress of the warm-up.
+
+    """
+    start = time.monotonic()
+    from misstea.agent import root_agent
+
+    agent_names = preload_agents(
+        None if os.getenv("MISSTEA_PRELOAD_AGENTS") else ["all"]
+    )
+    agents = [root_agent] + [get_agent(x) for x in agent_names]
+    toolsets = [x for agent in agents for x in _iter_toolsets(agent)]
+
+    async def connect(agent_name: str, toolset: BaseToolset) -> None:
+        try:
+            tools = await asyncio.wait_for(toolset.get_tools(), WARMUP_TIMEOUT_SECONDS)
+            logger.debug(f"Connected toolset of {agent_name} with {len(tools)} tools.")
+        except Exception as e:
+            logger.warning(f"Unable to connect toolset of {agent_name}: {e!r}")
+            readiness["errors"].append(f"{agent_name}: {e!r}")
+
+    await asyncio.gather(*[connect(*x) for x in toolsets])
+    readiness.update(
+        {
+            "agents": agent_names,
+            "toolsets": len(toolsets),
+            "warmup_seconds": round(time.monotonic() - start, 2),
+            "ready": True,
+        }
+    )
+    logger.info(f"Warm-up finished in {readiness['warmup_seconds']} seconds.")
+
+
+def create_app() -> FastAPI:
+    """Create the ADK web app, called by every uvicorn worker.
+
+    Agents and toolsets are warmed up in the background once the worker starts,
+    `GET /readyz` returns 503 until this has finished. Toolsets are closed when the
+    worker shuts down. Sessions are stored in a SQLite database shared by all
+    workers, see `misstea.sessions`, and `POST /run_sse` streams the events of
+    sub-agents too, see `misstea.streaming`.
+
+    Returns:
+        FastAPI: The app.
+
+    """
+    if not logging.getLogger().handlers:
+        configure_console_logging(int(os.getenv("MISSTEA_VERBOSITY", 0)))
+
+    readiness: Dict[str, Any] = {"ready": False, "errors": []}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:  # noqa: ARG001
+        warm_up_task = asyncio.create_task(warm_up(readiness))
+        try:
+            yield
+        finally:
+            warm_up_task.cancel()
+            from misstea.agent import root_agent
+            from misstea.sub_agents import loaded_agents
+
+            for agent in [root_agent] + [get_agent(x) for x in loaded_agents()]:
+                for agent_name, toolset in _iter_toolsets(agent):
+                    try:
+                        await toolset.close()
+                    except Exception as e:
+                        logger.warning(f"Failed to close toolset of {agent_name}: {e}")
+
+    app = get_fast_api_app(
+        agents_dir=Path(__file__).parent.parent.absolute().__str__(),
+        session_service_uri=get_session_service_uri(),
+        web=True,
+        lifespan=lifespan,
+    )
+    stream_sub_agents(app)
+
+    @app.get("/readyz")
+    async def readyz() -> JSONResponse:  # noqa: RUF029
+        return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+    return app
@@ -0,0 +1,227 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+from urllib.parse import urlparse
+
+import aiosqlite
+from google.adk.cli.service_registry import get_service_registry
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.sqlite_session_service import (
+    CREATE_SCHEMA_SQL,
+    PRAGMA_FOREIGN_KEYS,
+)
+from google.adk.sessions.sqlite_session_service import (
+    SqliteSessionService as AdkSqliteSessionService,
+)
+
+from misstea.constants import SESSION_DB_PATH, SESSION_MAX_EVENTS, SESSION_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_SECONDS = 30
+MAINTENANCE_INTERVAL_SECONDS = float(
+    os.getenv("MISSTEA_SESSION_MAINTENANCE_INTERVAL_SECONDS", 60 * 60)
+)
+SESSION_SERVICE_SCHEME = "misstea"
+
+# Sessions and user states are already indexed by app and user through their primary keys
+INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS events_by_timestamp ON events (app_name, user_id, session_id, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_by_update_time ON sessions (update_time);
+"""
+
+_write_transaction: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "write_transaction", default=False
+)
+
+
+class SqliteSessionService(AdkSqliteSessionService):
+    """SQLite backed session service that can be shared by several processes.
+
+    Extends ADK's SQLite session service with WAL mode, so readers don't block the
+    writer, a busy timeout and write transactions that lock the database before
+    checking a session is not stale, so uvicorn workers can share one database.
+    Only the most recent events of a session are loaded, older ones can be paged
+    through with `list_events()`. Sessions that have not been updated within the
+    TTL are deleted in the background.
+
+    Overrides private parts of ADK's service, `test_adk_sqlite_session_service_internals`
+    checks they are still there when ADK is upgraded beyond the version pinned.
+    """
+
+    def __init__(
+        self,
+        path: Path = SESSION_DB_PATH,
+        max_events: int = SESSION_MAX_EVENTS,
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+    ):
+        """Open (and create if required) a session database.
+
+        Args:
+            path (Path): Path of the SQLite database file.
+            max_events (int): Number of recent events loaded with a session, 0 to load all.
+            ttl_seconds (int): Seconds after their last update that sessions are deleted, 0 to keep them.
+
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        super().__init__(db_path=str(path))
+        self.path = path
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self._initialised = False
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+    async def _initialise(self, db: aiosqlite.Connection) -> None:
+        # auto_vacuum only takes effect before the tables of a new database are created
+        await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.executescript(CREATE_SCHEMA_SQL + INDEXES_SQL)
+        self._initialised = True
+
+    @asynccontextmanager
+    async def _get_db_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with aiosqlite.connect(
+            self._db_connect_path,
+            uri=self._db_connect_uri,
+            timeout=BUSY_TIMEOUT_SECONDS,
+        ) as db:
+            db.row_factory = aiosqlite.Row
+            await db.execute(PRAGMA_FOREIGN_KEYS)
+            # Safe in WAL mode, a power loss can only lose the latest commits
+            await db.execute("PRAGMA synchronous=NORMAL")
+            if not self._initialised:
+                await self._initialise(db)
+            self._start_maintenance()
+            if _write_transaction.get():
+                await db.execute("BEGIN IMMEDIATE")
+            yield db
+
+    def _start_maintenance(self) -> None:
+        if not self.ttl_seconds or (
+            self._maintenance_task is not None and not self._maintenance_task.done()
+        ):
+            return
+        self._maintenance_task = asyncio.get_running_loop().create_task(
+            self._maintain()
+        )
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await self.expire_sessions()
+            except Exception as e:
+                logger.warning(f"Failed to expire sessions in {self.path}: {e!r}")
+            await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+
+    async def expire_sessions(self) -> int:
+        """Delete sessions that have not been updated within the TTL, and their events.
+
+        The space they used is returned to the file system, for databases created by
+        this service.
+
+        Returns:
+            int: The number of deleted sessions.
+
+        """
+        async with self._get_db_connection() as db:
+            cursor = await db.execute(
+                "DELETE FROM sessions WHERE update_time < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            await db.commit()
+            if cursor.rowcount:
+                # Steps through every page it frees, so it must be fetched
+                await db.execute_fetchall("PRAGMA incremental_vacuum")
+                logger.info(f"Expired {cursor.rowcount} sessions from {self.path}.")
+            return cursor.rowcount
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """Return a session with its most recent events, see `list_events()` for older ones.
+
+        Returns:
+            Optional[Session]: The session, None if it doesn't exist.
+
+        """
+        if config is None and self.max_events:
+            config = GetSessionConfig(num_recent_events=self.max_events)
+        return await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        """Persist an event, in a transaction that locks the database for writing.
+
+        Returns:
+            Event: The event.
+
+        """
+        token = _write_transaction.set(True)
+        try:
+            return await super().append_event(session=session, event=event)
+        finally:
+            _write_transaction.reset(token)
+
+    async def list_events(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        before_timestamp: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Event]:
+        """Return a page of the events of a session, e.g. those not loaded with it.
+
+        Args:
+            app_name (str): The name of the app.
+            user_id (str): The ID of the user.
+            session_id (str): The ID of the session.
+            before_timestamp (Optional[float]): Only return events before this time, pass the timestamp of the first event of the previous page.
+            limit (int): Maximum number of events to return.
+
+        Returns:
+            List[Event]: The latest events matching, oldest first.
+
+        """
+        query = "SELECT event_data FROM events WHERE app_name=? AND user_id=? AND session_id=?"
+        params: list = [app_name, user_id, session_id]
+        if before_timestamp is not None:
+            query += " AND timestamp < ?"
+            params.append(before_timestamp)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+
+        async with self._get_db_connection() as db:
+            rows = await db.execute_fetchall(query, params)
+        return [Event.model_validate_json(x["event_data"]) for x in reversed(rows)]
+
+
+def get_session_service_uri(path: Path = SESSION_DB_PATH) -> str:
+    """Register `SqliteSessionService` with ADK and return the URI to use it.
+
+    Args:
+        path (Path): Path of the SQLite database file.
+
+    Returns:
+        str: The session service URI, to pass to ADK's `run_cli()` or `get_fast_api_app()`.
+
+    """
+    get_service_registry().register_session_service(
+        SESSION_SERVICE_SCHEME,
+        lambda uri, **_: SqliteSessionService(Path(urlparse(uri).path)),
+    )
+    return f"{SESSION_SERVICE_SCHEME}://{path.absolute()}"
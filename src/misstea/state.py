@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from functools import cache, lru_cache
+from pathlib import Path
+from typing import Any, MutableMapping
+
+from misstea.constants import (
+    CACHE_DIR,
+    SESSION_TTL_SECONDS,
+    STATE_BLOB_MAX_BYTES,
+    STATE_SPILL_THRESHOLD_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+BLOB_REF_KEY = "blob_ref"
+
+
+class BlobStore:
+    """Content-addressed store of JSON serialisable values on disk.
+
+    Blobs are shared by sessions, so they are deleted once no session can still
+    use them: when they haven't been stored or read for longer than sessions are
+    kept, or when the store is full, least recently used first.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = STATE_BLOB_MAX_BYTES,
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+    ):
+        """Initialise a blob store.
+
+        Args:
+            root (Path): Directory the blobs are stored in.
+            max_bytes (int): Total size of blobs beyond which the least recently used are deleted.
+            ttl_seconds (int): Blobs not used for this long are deleted, 0 keeps them until the store is full.
+
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def put(self, serialised: str) -> str:
+        """Store a serialised value, if it is not already stored.
+
+        Args:
+            serialised (str): The JSON serialised value.
+
+        Returns:
+            str: The SHA-256 digest of the value, used to retrieve it.
+
+        """
+        data = serialised.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            path.touch()
+            return digest
+        path.parent.mkdir(exist_ok=True, parents=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            f.write(data)
+        Path(f.name).replace(path)
+        self.prune()
+        return digest
+
+    def get(self, digest: str) -> Any:
+        """Load a value from the store, raises FileNotFoundError if it was deleted.
+
+        Args:
+            digest (str): The digest returned by `put()`.
+
+        Returns:
+            Any: The deserialised value.
+
+        """
+        path = self._path(digest)
+        # The modification time records when a blob was last used
+        os.utime(path)
+        return _read_blob(path)
+
+    def prune(self) -> int:
+        """Delete expired blobs, then the least recently used until the store fits.
+
+        Returns:
+            int: The number of deleted blobs.
+
+        """
+        with self._lock:
+            blobs = []
+            for path in self.root.glob("*/*.json"):
+                try:
+                    blobs.append((path.stat(), path))
+                except FileNotFoundError:
+                    continue
+            expires_at = time.time() - self.ttl_seconds
+            total_size = sum(x.st_size for x, _ in blobs)
+            deleted = []
+            for stat, path in sorted(blobs, key=lambda x: x[0].st_mtime):
+                if total_size <= self.max_bytes and (
+                    not self.ttl_seconds or stat.st_mtime >= expires_at
+                ):
+                    break
+                path.unlink(missing_ok=True)
+                total_size -= stat.st_size
+                deleted.append(path)
+        if deleted:
+            logger.debug(f"Deleted {len(deleted)} blobs from {self.root}.")
+        return len(deleted)
+
+
+@lru_cache(maxsize=32)
+def _read_blob(path: Path) -> Any:
+    # Blobs are immutable, so recently loaded values can be reused
+    return json.loads(path.read_bytes())
+
+
+@cache
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store.
+
+    Returns:
+        BlobStore: The blob store in CACHE_DIR.
+
+    """
+    return BlobStore(CACHE_DIR / "blobs")
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Check if a session state value is a reference to a blob.
+
+    Args:
+        value (Any): A session state value.
+
+    Returns:
+        bool: True if the value is a blob reference.
+
+    """
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+def set_state_value(state: MutableMapping[str, Any], key: str, value: Any) -> None:
+    """Set a session state value, spilling large values to the blob store.
+
+    Values that serialise to more than `STATE_SPILL_THRESHOLD_BYTES` are written to
+    the blob store and only a small reference (digest, size and preview) is kept in
+    the session state, so the cost of serialising session events stays flat.
+
+    Args:
+        state (MutableMapping[str, Any]): The session state, e.g. `tool_context.state`.
+        key (str): The state key.
+        value (Any): The JSON serialisable value.
+
+    """
+    serialised = json.dumps(value)
+    if len(serialised) <= STATE_SPILL_THRESHOLD_BYTES:
+        state[key] = value
+        return
+
+    logger.debug(f"Spilling {len(serialised)} byte state value `{key}` to disk.")
+    state[key] = {
+        BLOB_REF_KEY: get_blob_store().put(serialised),
+        "size_bytes": len(serialised),
+        "preview": value[:200] if isinstance(value, str) else serialised[:200],
+    }
+
+
+def get_state_value(
+    state: MutableMapping[str, Any], key: str, default: Any = None
+) -> Any:
+    """Get a session state value, loading it from the blob store if it was spilled.
+
+    Args:
+        state (MutableMapping[str, Any]): The session state, e.g. `tool_context.state`.
+        key (str): The state key.
+        default (Any): Returned if the key is not in the state.
+
+    Returns:
+        Any: The full value, or the reference (with its preview) if the blob was deleted.
+
+    """
+    value = state.get(key, default)
+    if is_blob_ref(value):
+        try:
+            return get_blob_store().get(value[BLOB_REF_KEY])
+        except FileNotFoundError:
+            logger.warning(f"The blob of state value `{key}` was deleted.")
+    return value
@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import cache
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from google.adk.agents.run_config import StreamingMode
+from google.adk.cli.adk_web_server import RunAgentRequest
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+
+logger = logging.getLogger(__name__)
+
+# ID of the session whose client is streaming, set while a sub-agent is called
+_stream_session_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "stream_session_id", default=None
+)
+
+
+class StreamBroker:
+    """Fans the events of sub-agents out to the clients streaming a session."""
+
+    def __init__(self):
+        """Create a broker without subscribers."""
+        self._subscribers: Dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, session_id: str, event: Event) -> None:
+        """Send an event to every client streaming a session.
+
+        Args:
+            session_id (str): The ID of the session.
+            event (Event): The event.
+
+        """
+        for queue in self._subscribers.get(session_id, ()):
+            queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, session_id: str) -> Iterator[asyncio.Queue]:
+        """Receive the events published for a session while the block runs.
+
+        Args:
+            session_id (str): The ID of the session.
+
+        Yields:
+            asyncio.Queue: Queue the events are put on.
+
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[session_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[session_id].discard(queue)
+            if not self._subscribers[session_id]:
+                del self._subscribers[session_id]
+
+
+@cache
+def get_stream_broker() -> StreamBroker:
+    """Return the stream broker, it is shared by everything in the process.
+
+    Returns:
+        StreamBroker: The broker.
+
+    """
+    return StreamBroker()
+
+
+@contextmanager
+def streaming_to(session_id: Optional[str]) -> Iterator[None]:
+    """Stream the events of sub-agents called in the block to the clients of a session.
+
+    Sub-agents called by other sub-agents keep streaming to the outermost session.
+
+    Args:
+        session_id (Optional[str]): The ID of the session, None to not stream.
+
+    """
+    token = _stream_session_id.set(_stream_session_id.get() or session_id)
+    try:
+        yield
+    finally:
+        _stream_session_id.reset(token)
+
+
+class StreamingPlugin(BasePlugin):
+    """Streams the events of sub-agents, including partial text, to the client.
+
+    `AgentTool` runs sub-agents with their own runner, which inherits this plugin.
+    Within `streaming_to()` these runners stream their model responses and publish
+    every event to the `StreamBroker`.
+    """
+
+    def __init__(self):
+        """Create the plugin."""
+        super().__init__(name="streaming")
+
+    async def before_run_callback(self, *, invocation_context: Any) -> None:
+        """Turn on streaming for runs of sub-agents whose client is streaming."""
+        if _stream_session_id.get() is not None:
+            invocation_context.run_config = invocation_context.run_config.model_copy(
+                update={"streaming_mode": StreamingMode.SSE}
+            )
+
+    async def on_event_callback(
+        self,
+        *,
+        invocation_context: Any,  # noqa: ARG002
+        event: Event,
+    ) -> None:
+        """Publish an event of a sub-agent."""
+        if (session_id := _stream_session_id.get()) is not None:
+            get_stream_broker().publish(session_id, event)
+
+
+def _sse(event: Event) -> str:
+    return f"data: {event.model_dump_json(exclude_none=True, by_alias=True)}\n\n"
+
+
+async def merge_sub_agent_events(
+    body: AsyncIterator[str], session_id: str
+) -> AsyncIterator[str]:
+    """Interleave the events of sub-agents with a server-sent event stream of a run.
+
+    Args:
+        body (AsyncIterator[str]): The server-sent events of the run.
+        session_id (str): The ID of the session of the run.
+
+    Yields:
+        str: Server-sent events, of the run and of its sub-agents as they happen.
+
+    """
+    with get_stream_broker().subscribe(session_id) as queue:
+
+        async def pump() -> None:
+            try:
+                async for chunk in body:
+                    queue.put_nowait(chunk)
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.create_task(pump())
+        try:
+            while (item := await queue.get()) is not None:
+                yield _sse(item) if isinstance(item, Event) else item
+            await task
+        finally:
+            task.cancel()
+
+
+def stream_sub_agents(app: FastAPI) -> None:
+    """Make `POST /run_sse` of the ADK web app stream tokens of the root agent and sub-agents.
+
+    Responses are always streamed, events of sub-agents are sent in the same stream
+    as the root agent's, so they reach the client from whichever worker runs the
+    request.
+
+    Args:
+        app (FastAPI): The app returned by `get_fast_api_app()`.
+
+    """
+    route = next(
+        x
+        for x in app.router.routes
+        if getattr(x, "path", None) == "/run_sse" and "POST" in x.methods
+    )
+    app.router.routes.remove(route)
+    run_agent_sse = route.endpoint
+
+    @app.post("/run_sse")
+    async def run_sse(req: RunAgentRequest) -> StreamingResponse:
+        req.streaming = True
+        response = await run_agent_sse(req)
+        return StreamingResponse(
+            merge_sub_agent_events(response.body_iterator, req.session_id),
+            media_type="text/event-stream",
+        )
@@ -1,7 +1,7 @@
 from google.adk.agents import Agent
 from google.adk.code_executors import BuiltInCodeExecutor
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
 
 
 def get_calculator_agent() -> Agent:
@@ -12,7 +12,7 @@ def get_calculator_agent() -> Agent:
 
     """
     return Agent(
-        model=AGENT_MODEL,
+        model=get_model("calculator"),
         name="calculator_agent",
         code_executor=BuiltInCodeExecutor(),
         instruction="""You are a calculator agent.
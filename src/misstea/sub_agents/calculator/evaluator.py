@@ -0,0 +1,331 @@
+import ast
+import math
+import operator
+import re
+import statistics
+import sys
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+MAX_ARRAY_LENGTH = 10_000_000
+MAX_EXPONENT = 10_000
+MAX_EXPRESSION_LENGTH = 1_000
+# Integers are exact up to the number of digits Python converts to str
+MAX_INTEGER_BITS = int(sys.get_int_max_str_digits() / math.log10(2))
+MAX_RESULT_LENGTH = 10_000
+PRECISION = 50
+
+
+def _divide(left: Any, right: Any) -> Any:
+    # Dividing integers would give a float, use Decimal precision instead
+    if isinstance(left, int) and isinstance(right, int):
+        return Decimal(left) / right
+    return left / right
+
+
+def _divmod(left: Any, right: Any) -> Any:
+    # Decimal rounds towards zero, round towards negative infinity like Python
+    quotient, remainder = divmod(left, right)
+    if isinstance(remainder, Decimal) and remainder and (remainder < 0) != (right < 0):
+        quotient, remainder = quotient - 1, remainder + right
+    return quotient, remainder
+
+
+def _floor_divide(left: Any, right: Any) -> Any:
+    return _divmod(left, right)[0]
+
+
+def _modulo(left: Any, right: Any) -> Any:
+    return _divmod(left, right)[1]
+
+
+def _power(left: Any, right: Any) -> Any:
+    if isinstance(left, int) and isinstance(right, int):
+        # Integers stay exact unless the result has too many digits to print
+        digits = left.bit_length() * right * math.log10(2)
+        if right < 0 or digits > sys.get_int_max_str_digits():
+            return Decimal(left) ** right
+    return left**right
+
+
+_BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _divide,
+    ast.FloorDiv: _floor_divide,
+    ast.Mod: _modulo,
+    ast.Pow: _power,
+}
+_UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+_CONSTANTS = {
+    "e": Decimal("2.7182818284590452353602874713526624977572470936999595749669676"),
+    "pi": Decimal("3.1415926535897932384626433832795028841971693993751058209749445"),
+    "tau": Decimal("6.2831853071795864769252867665590057683943387987502116419498891"),
+}
+_PREFIXES = re.compile(
+    r"^\s*(what\s+is|what's|calculate|compute|evaluate|solve)\s*[:,]?\s*", re.I
+)
+
+
+def _float_function(func: Callable[[float], float]) -> Callable[[Decimal], Decimal]:
+    return lambda x: Decimal(repr(func(float(x))))
+
+
+def _log(x: Decimal, base: Decimal | None = None) -> Decimal:
+    return x.ln() if base is None else x.ln() / base.ln()
+
+
+def _factorial(x: Decimal) -> int:
+    if x != x.to_integral_value() or not 0 <= x <= 1000:
+        raise ValueError("factorial() is only supported for integers from 0 to 1000.")
+    return math.factorial(int(x))
+
+
+def _integers(name: str, values: tuple[Decimal, ...]) -> list[int]:
+    if any(x != x.to_integral_value() for x in values):
+        raise ValueError(f"{name}() is only supported for integers.")
+    return [int(x) for x in values]
+
+
+def _round(x: Decimal, digits: Decimal = Decimal(0)) -> Decimal:
+    # Halves are rounded away from zero, Python's round() rounds them to even
+    return x.quantize(Decimal(1).scaleb(-int(digits)), rounding=ROUND_HALF_UP)
+
+
+def _round_array(x: np.ndarray, digits: Any = 0) -> np.ndarray:
+    scale = 10.0 ** int(digits)
+    return np.sign(x) * np.floor(np.abs(x) * scale + 0.5) / scale
+
+
+# Functions on scalars, evaluated with Decimal precision, integer results are exact
+_SCALAR_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "acos": _float_function(math.acos),
+    "asin": _float_function(math.asin),
+    "atan": _float_function(math.atan),
+    "ceil": math.ceil,
+    "cos": _float_function(math.cos),
+    "degrees": _float_function(math.degrees),
+    "exp": lambda x: x.exp(),
+    "factorial": _factorial,
+    "floor": math.floor,
+    "gcd": lambda *x: math.gcd(*_integers("gcd", x)),
+    "lcm": lambda *x: math.lcm(*_integers("lcm", x)),
+    "ln": lambda x: x.ln(),
+    "log": _log,
+    "log10": lambda x: x.log10(),
+    "log2": lambda x: x.ln() / Decimal(2).ln(),
+    "max": max,
+    "min": min,
+    "radians": _float_function(math.radians),
+    "round": _round,
+    "sin": _float_function(math.sin),
+    "sqrt": lambda x: x.sqrt(),
+    "tan": _float_function(math.tan),
+}
+
+# Element-wise functions on arrays
+_ARRAY_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": np.abs,
+    "acos": np.arccos,
+    "asin": np.arcsin,
+    "atan": np.arctan,
+    "ceil": np.ceil,
+    "cos": np.cos,
+    "degrees": np.degrees,
+    "exp": np.exp,
+    "floor": np.floor,
+    "ln": np.log,
+    "log": lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base),
+    "log10": np.log10,
+    "log2": np.log2,
+    "radians": np.radians,
+    "round": _round_array,
+    "sin": np.sin,
+    "sqrt": np.sqrt,
+    "tan": np.tan,
+}
+
+# Unit-free statistics that reduce an array to a scalar
+_AGGREGATE_FUNCTIONS: Dict[str, Callable[[np.ndarray], Any]] = {
+    "count": len,
+    "max": np.max,
+    "mean": np.mean,
+    "median": np.median,
+    "min": np.min,
+    "prod": np.prod,
+    "stdev": lambda x: np.std(x, ddof=1),
+    "pstdev": np.std,
+    "sum": np.sum,
+    "variance": lambda x: np.var(x, ddof=1),
+    "pvariance": np.var,
+}
+
+
+def _to_decimal(value: Any) -> Any:
+    return Decimal(value) if isinstance(value, int) else value
+
+
+def _to_array(value: Any) -> np.ndarray:
+    return value if isinstance(value, np.ndarray) else np.asarray(float(value))
+
+
+def _range(*args: Decimal) -> np.ndarray:
+    start, stop, step = (
+        (Decimal(0), args[0], Decimal(1)) if len(args) == 1 else (*args, Decimal(1))[:3]
+    )
+    if step == 0 or abs((stop - start) / step) > MAX_ARRAY_LENGTH:
+        raise ValueError("range() is empty or too long.")
+    return np.arange(float(start), float(stop), float(step))
+
+
+class _Evaluator(ast.NodeVisitor):
+    """Evaluate a whitelisted subset of Python expressions."""
+
+    def visit(self, node: ast.AST) -> Any:
+        value = super().visit(node)
+        # Longer integers are rounded, so arithmetic on them stays fast
+        if isinstance(value, int) and value.bit_length() > MAX_INTEGER_BITS:
+            return +Decimal(value)
+        return value
+
+    def generic_visit(self, node: ast.AST) -> Any:
+        raise ValueError(f"Unsupported syntax: {type(node).__name__}.")
+
+    def visit_Expression(self, node: ast.Expression) -> Any:
+        return self.visit(node.body)
+
+    def visit_Constant(self, node: ast.Constant) -> Any:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant: {node.value!r}.")
+        # Integers are kept as int, so integer arithmetic is exact beyond PRECISION digits
+        if isinstance(node.value, int):
+            return node.value
+        return Decimal(repr(node.value))
+
+    def visit_Name(self, node: ast.Name) -> Any:
+        if node.id not in _CONSTANTS:
+            raise ValueError(f"Unknown name: {node.id}.")
+        return _CONSTANTS[node.id]
+
+    def visit_List(self, node: ast.List | ast.Tuple) -> np.ndarray:
+        values = [self.visit(x) for x in node.elts]
+        if any(isinstance(x, np.ndarray) for x in values):
+            raise ValueError("Nested lists are not supported.")
+        return np.array([float(x) for x in values])
+
+    def visit_Tuple(self, node: ast.Tuple) -> np.ndarray:
+        return self.visit_List(node)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> Any:
+        if type(node.op) not in _UNARY_OPERATORS:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}.")
+        return _UNARY_OPERATORS[type(node.op)](self.visit(node.operand))
+
+    def visit_BinOp(self, node: ast.BinOp) -> Any:
+        if type(node.op) not in _BINARY_OPERATORS:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}.")
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Pow) and np.any(
+            np.abs(_to_array(right)) > MAX_EXPONENT
+        ):
+            raise ValueError("Exponent is too large.")
+        if isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+            return _BINARY_OPERATORS[type(node.op)](_to_array(left), _to_array(right))
+        return _BINARY_OPERATORS[type(node.op)](left, right)
+
+    def visit_Call(self, node: ast.Call) -> Any:
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise ValueError(
+                "Unsupported call, only named functions without keywords are allowed."
+            )
+        name = node.func.id
+        args = [self.visit(x) for x in node.args]
+
+        if name == "range":
+            return _range(*args)
+        if any(isinstance(x, np.ndarray) for x in args):
+            # Aggregates take a single list, e.g. mean([1, 2, 3]), or several scalars
+            if name in _AGGREGATE_FUNCTIONS and len(args) == 1:
+                return _AGGREGATE_FUNCTIONS[name](args[0])
+            if name in _ARRAY_FUNCTIONS:
+                return _ARRAY_FUNCTIONS[name](*args)
+        elif name in _SCALAR_FUNCTIONS:
+            return _SCALAR_FUNCTIONS[name](*[_to_decimal(x) for x in args])
+        elif name in ["mean", "median", "stdev", "pstdev", "variance", "pvariance"]:
+            return getattr(statistics, name)([_to_decimal(x) for x in args])
+        elif name in ["sum", "prod", "count"]:
+            return {"sum": sum, "prod": math.prod, "count": len}[name](args)
+        raise ValueError(f"Unsupported function: {name}.")
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, np.ndarray):
+        if value.ndim == 0:
+            return _format(value.item())
+        if value.size > MAX_RESULT_LENGTH:
+            raise ValueError(f"Result is too long, it has {value.size} values.")
+        return "[" + ", ".join(_format(x) for x in value.tolist()) + "]"
+    if isinstance(value, (float, np.floating)):
+        if not math.isfinite(value):
+            raise ValueError(f"Result is not finite: {value}.")
+        value = Decimal(repr(float(value)))
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    value = value.normalize()
+    # Decimals beyond PRECISION digits are rounded, so are shown in scientific notation
+    if value.adjusted() >= PRECISION:
+        return str(value)
+    if value == value.to_integral_value():
+        return str(value.quantize(Decimal(1)))
+    return format(value, "f")
+
+
+def evaluate_expression(expression: str) -> str:
+    """Evaluate a mathematical expression locally, without a model call.
+
+    Supports arithmetic with arbitrary-precision decimals, common math functions,
+    constants (pi, e, tau), statistics over lists, e.g. `mean([1, 2, 3])`, and
+    element-wise evaluation over lists or ranges, e.g. `sqrt(range(1, 10))`.
+    `round()` rounds halves away from zero, e.g. `round(2.5)` is 3.
+
+    Args:
+        expression (str): The expression, optionally prefixed by "What is" or "Calculate".
+
+    Returns:
+        str: The result as plain text.
+
+    Raises:
+        ValueError: If the expression can't be parsed, is nested too deeply or uses unsupported syntax.
+
+    """
+    expression = _PREFIXES.sub("", expression).strip().rstrip("?=").strip()
+    expression = (
+        expression.replace("^", "**")
+        .replace("\u00d7", "*")
+        .replace("÷", "/")
+        .replace("\u2212", "-")
+    )
+    if not expression or len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("Expression is empty or too long.")
+
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        raise ValueError(f"Unable to parse expression: {expression}.") from e
+
+    with localcontext() as context, np.errstate(all="raise"):
+        context.prec = PRECISION
+        try:
+            return _format(_Evaluator().visit(tree))
+        except (ArithmeticError, TypeError, FloatingPointError) as e:
+            raise ValueError(f"Unable to evaluate expression: {e}") from e
+        # Deeply nested expressions, e.g. "-" * 998 + "1", exhaust the stack of the evaluator
+        except (RecursionError, MemoryError) as e:
+            raise ValueError("Unable to evaluate expression: too deeply nested.") from e
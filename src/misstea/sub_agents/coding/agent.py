@@ -1,11 +1,16 @@
 from google.adk.agents import Agent
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
+from misstea.offload import offload
 from misstea.sub_agents.coding.tools import (
+    apply_edits,
     list_directory_contents,
+    profile_dataset,
+    query_files,
     read_directory,
     read_file,
     replace_in_file,
+    search_code,
     write_to_file,
 )
 
@@ -18,14 +23,17 @@ def get_coding_agent() -> Agent:
 
     """
     return Agent(
-        model=AGENT_MODEL,
+        model=get_model("coding"),
         name="coding_agent",
         instruction="""You are a helpful coding assistant. You can:
 
         * Read, write, and modify files.
+        * Query CSV, JSON, NDJSON and Parquet files with SQL.
 
         Constraints:
-        *
+        * To answer questions about data files, such as counts, totals or the most common values, use `query_files` instead of reading the files. To get an overview of a dataset, use `profile_dataset`.
+        * To make more than one change, use `apply_edits` to make all of them in a single call.
+        * To find where something is defined or used, e.g. a dbt model or Terraform resource, use `search_code` instead of listing and reading directories.
 
         Information:
             * When looking for a file path that was manually inputted, if the path does not exist, then assume that a typo was made. Use your tools to identify where the typo was most likely made and fix it, then alert the user that you have corrected the path. For example, if directed to a directory named `/home/pslattery/workpsace/client_a` and you find that this doesn't exist, first check that `/home/pslattery/workpsace` exists, if it does not, then assess if a similarly named directory like `/home/pslattery/workspace` exists and use that instead.
@@ -35,12 +43,17 @@ def get_coding_agent() -> Agent:
                 * Non-client repositories are stored in `/home/pslattery/repos`.
                 * If asked to find a repository, assess if it relates to a client or not, then use the above information to search for the relevant directory.
         """,
+        # File system and DuckDB calls block, so they run in the thread pool
         tools=[
-            list_directory_contents,
-            read_directory,
-            read_file,
-            write_to_file,
-            replace_in_file,
+            offload(apply_edits),
+            offload(list_directory_contents),
+            offload(profile_dataset),
+            offload(query_files),
+            offload(read_directory),
+            offload(read_file),
+            offload(write_to_file),
+            offload(replace_in_file),
+            offload(search_code),
         ],
     )
 
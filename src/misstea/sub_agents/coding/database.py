@@ -0,0 +1,76 @@
+import logging
+import threading
+from functools import cache
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+# Queries only read local files. Disabling external access would also stop them from
+# reading files, so extensions such as httpfs can't be installed or loaded instead,
+# and the configuration is locked so queries can't change it
+CONFIG = {
+    "allow_community_extensions": False,
+    "autoinstall_known_extensions": False,
+    "autoload_known_extensions": False,
+    "lock_configuration": True,
+}
+
+
+@cache
+def _get_database() -> duckdb.DuckDBPyConnection:
+    logger.debug("Opening in-memory DuckDB database.")
+    return duckdb.connect(database=":memory:", config=CONFIG)
+
+
+def get_connection() -> duckdb.DuckDBPyConnection:
+    """Return a DuckDB connection for the current thread.
+
+    Connections are not thread safe, so each thread of the tool thread pool gets
+    its own cursor of one shared in-memory database. Cursors are reused, so files
+    are queried without the cost of starting DuckDB.
+
+    Returns:
+        duckdb.DuckDBPyConnection: The connection.
+
+    """
+    if (connection := getattr(_local, "connection", None)) is None:
+        connection = _local.connection = _get_database().cursor()
+    return connection
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column or table name for use in SQL.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        str: The quoted name.
+
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def check_select(sql: str) -> None:
+    """Check SQL is a single SELECT statement, the only statements queries may run.
+
+    DESCRIBE, SUMMARIZE and FROM-first queries are SELECT statements, while COPY,
+    ATTACH, INSTALL, LOAD and SET are not.
+
+    Args:
+        sql (str): The SQL.
+
+    Raises:
+        ValueError: If the SQL can't be parsed or is not a single SELECT statement.
+
+    """
+    try:
+        statements = duckdb.extract_statements(sql)
+    except duckdb.Error as e:
+        raise ValueError(str(e)) from e
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Only a single SELECT statement is allowed.")
@@ -0,0 +1,322 @@
+import difflib
+import logging
+import os
+import re
+import stat
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from misstea.sub_agents.coding.reader import detect_encoding
+
+logger = logging.getLogger(__name__)
+
+_HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+def _get_umask() -> int:
+    # The umask can only be read by setting it, so it is read once on import
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _get_umask()
+
+
+class EditError(ValueError):
+    """Raised when an edit can't be applied, no files are changed."""
+
+
+@dataclass(frozen=True)
+class Span:
+    """Replace `text[start:end]` of a file with `replacement`."""
+
+    start: int
+    end: int
+    replacement: str
+
+
+def _write_temporary(path: Path, data: bytes) -> Tuple[Path, Path]:
+    # Returns the path to replace, and the temporary file to replace it with
+    # Replacing a symbolic link itself would turn it into a regular file
+    path = Path(path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, temp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, mode)  # noqa: PTH101
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+    return path, Path(temp_path)
+
+
+def _replace_all(files: List[Tuple[Path, Path]]) -> None:
+    # Replace files with their temporary files, deleting those left on failure
+    try:
+        for path, temp_path in files:
+            temp_path.replace(path)
+    finally:
+        for _, temp_path in files:
+            temp_path.unlink(missing_ok=True)
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write a file atomically, so it is never left partially written.
+
+    The data is written to a temporary file in the same directory, which then
+    replaces the file. If the path is a symbolic link, the file it points to is
+    replaced. The permissions of an existing file are kept, new files get the
+    default permissions of the umask.
+
+    Args:
+        path (Path): The path of the file.
+        data (bytes): The contents.
+
+    """
+    _replace_all([_write_temporary(path, data)])
+
+
+def read_text(path: Path) -> Tuple[str, str]:
+    """Read a text file, keeping its line endings.
+
+    Args:
+        path (Path): The path of the file.
+
+    Returns:
+        Tuple[str, str]: The contents and the encoding, so the file can be written back in the same encoding.
+
+    """
+    data = path.read_bytes()
+    try:
+        return data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        encoding = detect_encoding(data)
+        return data.decode(encoding), encoding
+
+
+def _read_text(path: Path) -> Tuple[str, str]:
+    try:
+        return read_text(path)
+    except UnicodeDecodeError as e:
+        raise EditError(f"{path}: Unable to decode the file: {e}") from e
+
+
+def _line_offsets(text: str) -> List[int]:
+    # Offset of the start of every line, plus the end of the text
+    offsets = [0]
+    for line in text.splitlines(keepends=True):
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def _newline(text: str) -> str:
+    return "\r\n" if "\r\n" in text else "\n"
+
+
+def _replace_spans(text: str, edit: dict) -> List[Span]:
+    search = edit["search"]
+    if not search:
+        raise EditError("search must not be empty.")
+    expected = int(edit.get("count", 1))
+    spans = []
+    start = text.find(search)
+    while start != -1:
+        spans.append(Span(start, start + len(search), edit.get("replace", "")))
+        start = text.find(search, start + len(search))
+    if len(spans) != expected:
+        raise EditError(
+            f"Expected {expected} occurrence(s) of {search!r}, found {len(spans)}."
+        )
+    return spans
+
+
+def _line_range_spans(text: str, edit: dict) -> List[Span]:
+    offsets = _line_offsets(text)
+    start_line, end_line = int(edit["start_line"]), int(edit["end_line"])
+    # end_line is start_line - 1 to insert before start_line
+    if not 1 <= start_line <= end_line + 1 <= len(offsets):
+        raise EditError(
+            f"Invalid line range {start_line}-{end_line}, the file has {len(offsets) - 1} lines."
+        )
+    replacement = edit.get("replace", "")
+    if replacement and not replacement.endswith(("\n", "\r")):
+        replacement += _newline(text)
+    return [Span(offsets[start_line - 1], offsets[end_line], replacement)]
+
+
+def _diff_spans(text: str, edit: dict) -> List[Span]:
+    offsets = _line_offsets(text)
+    lines = [x.rstrip("\r\n") for x in text.splitlines()]
+    newline = _newline(text)
+    hunks: List[Tuple[int, List[str], List[str]]] = []
+    for line in edit["diff"].splitlines():
+        if match := _HUNK_HEADER.match(line):
+            hunks.append((int(match.group(1)), [], []))
+        # File headers come before the first hunk, "--- x" in a hunk is a removed line
+        elif not hunks or line.startswith("\\"):
+            continue
+        elif line.startswith("-"):
+            hunks[-1][1].append(line[1:])
+        elif line.startswith("+"):
+            hunks[-1][2].append(line[1:])
+        else:
+            # Context lines, some tools strip the space of empty ones
+            hunks[-1][1].append(line[1:])
+            hunks[-1][2].append(line[1:])
+    if not hunks:
+        raise EditError("The diff has no hunks.")
+
+    spans = []
+    for old_start, old, new in hunks:
+        # Use the line number of the hunk if it matches, otherwise the only match
+        candidates = [old_start - 1 if old else old_start]
+        candidates += [
+            i for i in range(len(lines) - len(old) + 1) if i != candidates[0]
+        ]
+        found = [
+            i
+            for i in candidates
+            if 0 <= i <= len(lines) - len(old) and lines[i : i + len(old)] == old
+        ]
+        if not found or (found[0] != candidates[0] and len(found) > 1):
+            raise EditError(
+                f"Hunk at line {old_start} {'matches more than one place' if found else 'does not match the file'}."
+            )
+        i = found[0]
+        replacement = "".join(x + newline for x in new)
+        # Keep a missing newline at the end of the file
+        if i + len(old) == len(lines) and not text.endswith(("\n", "\r")):
+            replacement = replacement.removesuffix(newline)
+        spans.append(Span(offsets[i], offsets[i + len(old)], replacement))
+    return spans
+
+
+def apply_spans(text: str, spans: List[Span]) -> str:
+    """Apply non-overlapping replacements to a text in a single pass.
+
+    Args:
+        text (str): The original text.
+        spans (List[Span]): The replacements, with offsets into the original text.
+
+    Returns:
+        str: The edited text.
+
+    Raises:
+        EditError: If replacements overlap.
+
+    """
+    parts = []
+    position = 0
+    for span in sorted(spans, key=lambda x: (x.start, x.end)):
+        if span.start < position:
+            raise EditError("Edits overlap.")
+        parts += [text[position : span.start], span.replacement]
+        position = span.end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def apply_edits(edits: List[dict]) -> str:
+    """Apply edits to one or more files, each file is read and written once.
+
+    Every edit is a dict with a `path` and one of:
+
+    * `search`, `replace` and optionally `count`: Replace exact matches, there must be `count` (default 1) of them.
+    * `start_line`, `end_line` and `replace`: Replace a range of lines, numbered from 1 and inclusive.
+    * `diff`: Apply the hunks of a unified diff.
+    * `content`: Write the whole file, e.g. to create it.
+
+    All edits are checked before any file is written. The new contents of all files
+    are written to temporary files first, which then replace the files, so files
+    are only changed once all of them have been written.
+
+    Args:
+        edits (List[dict]): The edits, offsets and line numbers refer to the files before any edit.
+
+    Returns:
+        str: A unified diff of the changes.
+
+    Raises:
+        EditError: If an edit can't be applied.
+
+    """
+    by_path: Dict[Path, List[dict]] = {}
+    for edit in edits:
+        if not edit.get("path"):
+            raise EditError(f"Edit without a path: {edit}")
+        by_path.setdefault(Path(edit["path"]), []).append(edit)
+
+    changes = []
+    for path, file_edits in by_path.items():
+        if any("content" in x for x in file_edits):
+            if len(file_edits) > 1:
+                raise EditError(f"{path}: content can't be combined with other edits.")
+            old = _read_text(path)[0] if path.is_file() else ""
+            encoding = "utf-8"
+            new = file_edits[0]["content"]
+        else:
+            if not path.is_file():
+                raise EditError(f"File not found: {path}")
+            old, encoding = _read_text(path)
+            spans = []
+            for edit in file_edits:
+                try:
+                    if "search" in edit:
+                        spans += _replace_spans(old, edit)
+                    elif "start_line" in edit:
+                        spans += _line_range_spans(old, edit)
+                    elif "diff" in edit:
+                        spans += _diff_spans(old, edit)
+                    else:
+                        raise EditError(f"Unknown edit: {edit}")
+                except EditError as e:
+                    raise EditError(f"{path}: {e}") from e
+            try:
+                new = apply_spans(old, spans)
+            except EditError as e:
+                raise EditError(f"{path}: {e}") from e
+        if old == new:
+            continue
+        # Encode every file before writing any, the new text may not fit the encoding
+        try:
+            data = new.encode(encoding)
+        except UnicodeEncodeError as e:
+            raise EditError(
+                f"{path}: The edited text can't be encoded as {encoding}."
+            ) from e
+        changes.append((path, old, new, data))
+
+    written = []
+    try:
+        for path, _, _, data in changes:
+            written.append(_write_temporary(path, data))
+    except BaseException:
+        for _, temp_path in written:
+            temp_path.unlink(missing_ok=True)
+        raise
+    _replace_all(written)
+
+    diff = []
+    for path, old, new, _ in changes:
+        logger.debug(f"Applied {len(by_path[path])} edit(s) to {path}.")
+        diff += difflib.unified_diff(
+            old.splitlines(keepends=True),
+            new.splitlines(keepends=True),
+            fromfile=f"a/{path}",
+            tofile=f"b/{path}",
+            n=1,
+        )
+    # Lines at the end of files without a newline
+    return "".join(x if x.endswith("\n") else x + "\n" for x in diff)
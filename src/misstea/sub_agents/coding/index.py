@@ -0,0 +1,206 @@
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from misstea.constants import CODE_INDEX_MAX_FILE_BYTES, CODE_INDEX_PATH
+from misstea.sub_agents.coding.reader import SNIFF_BYTES, decode_text, is_binary
+from misstea.sub_agents.coding.walker import walk
+
+logger = logging.getLogger(__name__)
+
+CHUNK_LINES = 50
+# Rowids of chunks are the file ID shifted by this, plus the chunk number
+_CHUNK_BITS = 20
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """A line found by `CodeIndex.search()`."""
+
+    path: str
+    line: int
+    snippet: str
+
+
+def _best_line(content: str, start_line: int, terms: List[str]) -> Tuple[int, str]:
+    # The line of a chunk containing the most terms, matching is case insensitive
+    lines = content.splitlines() or [""]
+    scores = [sum(x in line.lower() for x in terms) for line in lines]
+    i = scores.index(max(scores))
+    return start_line + i, lines[i].strip()[:200]
+
+
+class CodeIndex:
+    """SQLite FTS5 index of the text files in directory trees, for searching code."""
+
+    def __init__(self, path: Path):
+        """Open (and create if required) a code index.
+
+        Args:
+            path (Path): Path of the SQLite database file.
+
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            )
+            """
+        )
+        # Trigrams match any substring of 3 or more characters, e.g. parts of identifiers
+        self._con.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                start_line UNINDEXED, content, tokenize = 'trigram'
+            )
+            """
+        )
+        self._con.commit()
+
+    def _delete_chunks(self, file_id: int) -> None:
+        self._con.execute(
+            "DELETE FROM chunks WHERE rowid BETWEEN ? AND ?",
+            [file_id << _CHUNK_BITS, ((file_id + 1) << _CHUNK_BITS) - 1],
+        )
+
+    def _index_file(self, path: str, size: int, mtime_ns: int) -> None:
+        file_id = self._con.execute(
+            """
+            INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns
+            RETURNING id
+            """,
+            [path, size, mtime_ns],
+        ).fetchone()[0]
+        self._delete_chunks(file_id)
+        try:
+            data = Path(path).read_bytes()
+        except OSError as e:
+            logger.warning(f"Unable to index {path}: {e}")
+            return
+        # Binary files are recorded without chunks, so they aren't read again
+        if is_binary(data[:SNIFF_BYTES]):
+            return
+        lines = decode_text(data, key=(path, size, mtime_ns)).splitlines()
+        self._con.executemany(
+            "INSERT INTO chunks (rowid, start_line, content) VALUES (?, ?, ?)",
+            [
+                (
+                    (file_id << _CHUNK_BITS) + i // CHUNK_LINES,
+                    i + 1,
+                    "\n".join(lines[i : i + CHUNK_LINES]),
+                )
+                for i in range(0, len(lines), CHUNK_LINES)
+            ],
+        )
+
+    def update(self, root: Path) -> Tuple[int, int]:
+        """Index new and changed files in a directory tree and remove deleted files.
+
+        Files are compared by size and modification time, so only changed files are
+        read. Files ignored by `walker.walk()` are not indexed.
+
+        Args:
+            root (Path): The directory.
+
+        Returns:
+            Tuple[int, int]: The number of files indexed and removed.
+
+        """
+        root = root.resolve()
+        prefix = f"{root}/"
+        with self._lock:
+            indexed: Dict[str, Tuple[int, int, int]] = {
+                path: (file_id, size, mtime_ns)
+                for file_id, path, size, mtime_ns in self._con.execute(
+                    "SELECT id, path, size, mtime_ns FROM files WHERE path > ? AND path < ?",
+                    [prefix, prefix + "\U0010ffff"],
+                )
+            }
+            seen = set()
+            changed = 0
+            for item in walk(root):
+                if item.is_dir:
+                    continue
+                try:
+                    stat = item.entry.stat()
+                except OSError:
+                    continue
+                if stat.st_size > CODE_INDEX_MAX_FILE_BYTES:
+                    continue
+                path = prefix + item.path
+                seen.add(path)
+                if indexed.get(path, (None,))[1:] != (stat.st_size, stat.st_mtime_ns):
+                    self._index_file(path, stat.st_size, stat.st_mtime_ns)
+                    changed += 1
+
+            removed = [x for x in indexed if x not in seen]
+            for path in removed:
+                self._delete_chunks(indexed[path][0])
+                self._con.execute("DELETE FROM files WHERE id = ?", [indexed[path][0]])
+            self._con.commit()
+        if changed or removed:
+            logger.debug(
+                f"Indexed {changed} files and removed {len(removed)} from the index of {root}."
+            )
+        return changed, len(removed)
+
+    def search(self, root: Path, query: str, limit: int = 20) -> List[SearchResult]:
+        """Search the files in a directory tree, the index should be updated first.
+
+        Args:
+            root (Path): The directory.
+            query (str): Words that must all appear within a few lines of each other, each at least 3 characters.
+            limit (int): The maximum number of results.
+
+        Returns:
+            List[SearchResult]: The results, most relevant first.
+
+        Raises:
+            ValueError: If the query has no words of at least 3 characters.
+
+        """
+        terms = [x.lower() for x in query.split() if len(x) >= 3]
+        if not terms:
+            raise ValueError("The query needs words of at least 3 characters.")
+        match = " ".join('"' + x.replace('"', '""') + '"' for x in terms)
+        prefix = f"{root.resolve()}/"
+        with self._lock:
+            rows = self._con.execute(
+                f"""
+                SELECT files.path, chunks.start_line, chunks.content
+                FROM chunks
+                JOIN files ON files.id = chunks.rowid >> {_CHUNK_BITS}
+                WHERE chunks MATCH ? AND files.path > ? AND files.path < ?
+                ORDER BY chunks.rank
+                LIMIT ?
+                """,  # noqa: S608
+                [match, prefix, prefix + "\U0010ffff", limit],
+            ).fetchall()
+        return [
+            SearchResult(path, *_best_line(content, start_line, terms))
+            for path, start_line, content in rows
+        ]
+
+
+@cache
+def get_code_index() -> CodeIndex:
+    """Return the code index, it is shared by everything in the process.
+
+    Returns:
+        CodeIndex: The code index stored in CODE_INDEX_PATH.
+
+    """
+    return CodeIndex(CODE_INDEX_PATH)
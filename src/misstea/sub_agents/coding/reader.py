@@ -0,0 +1,222 @@
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Tuple
+
+import chardet
+
+from misstea.constants import READ_DIRECTORY_THREADS
+from misstea.sub_agents.coding.walker import matches_glob, walk
+
+logger = logging.getLogger(__name__)
+
+ENCODING_CACHE_SIZE = 4096
+SNIFF_BYTES = 8192
+# Bytes that don't appear in text files, i.e. control characters other than \t, \n, \f, \r and ESC
+_NON_TEXT_BYTES = bytes(set(range(32)) - {8, 9, 10, 12, 13, 27}) + b"\x7f"
+_BINARY_SIGNATURES = (
+    b"\x7fELF",
+    b"\x89PNG",
+    b"\xff\xd8\xff",
+    b"GIF8",
+    b"PK\x03\x04",
+    b"%PDF",
+    b"\x1f\x8b",
+    b"BZh",
+    b"\xfd7zXZ",
+    b"PAR1",
+    b"SQLite format 3",
+)
+
+# Encodings detected by chardet, keyed by path, size and modification time
+_encodings: OrderedDict[Tuple[str, int, int], str] = OrderedDict()
+_encodings_lock = threading.Lock()
+
+
+@cache
+def _get_executor() -> ThreadPoolExecutor:
+    # Separate from misstea.offload's pool, read_directory itself runs in that one
+    return ThreadPoolExecutor(
+        max_workers=READ_DIRECTORY_THREADS, thread_name_prefix="misstea-read"
+    )
+
+
+def is_binary(head: bytes) -> bool:
+    """Return if the start of a file looks like binary data rather than text.
+
+    Args:
+        head (bytes): The first bytes of the file, see `SNIFF_BYTES`.
+
+    Returns:
+        bool: True if the file is likely binary.
+
+    """
+    if not head:
+        return False
+    if head.startswith(_BINARY_SIGNATURES) or b"\x00" in head:
+        return True
+    # UTF-16/32 text has NUL bytes, but is caught by the check above, which is fine
+    non_text = len(head) - len(head.translate(None, _NON_TEXT_BYTES))
+    return non_text / len(head) > 0.1
+
+
+def detect_encoding(data: bytes, key: Optional[Tuple[str, int, int]] = None) -> str:
+    """Detect the encoding of a file with chardet, caching the result.
+
+    Args:
+        data (bytes): The contents, only the first 4KB are used.
+        key (Optional[Tuple[str, int, int]]): The path, size and `st_mtime_ns` of the file, so unchanged files are only detected once.
+
+    Returns:
+        str: The encoding, "utf-8" if it could not be detected.
+
+    """
+    if key is not None:
+        with _encodings_lock:
+            if (encoding := _encodings.get(key)) is not None:
+                _encodings.move_to_end(key)
+                return encoding
+
+    result = chardet.detect(data[:4096])
+    encoding = result["encoding"] or "utf-8"
+    logger.debug(
+        f"Detected encoding: '{encoding}' with confidence: {result['confidence']:.2f}"
+    )
+    if key is not None:
+        with _encodings_lock:
+            _encodings[key] = encoding
+            if len(_encodings) > ENCODING_CACHE_SIZE:
+                _encodings.popitem(last=False)
+    return encoding
+
+
+def decode_text(
+    data: bytes,
+    truncated: bool = False,
+    key: Optional[Tuple[str, int, int]] = None,
+) -> str:
+    """Decode the contents of a text file, trying UTF-8 before detecting the encoding.
+
+    Most files are UTF-8, or ASCII, so chardet only runs when strict UTF-8 decoding fails.
+
+    Args:
+        data (bytes): The contents.
+        truncated (bool): Whether the contents were cut short, possibly within a character.
+        key (Optional[Tuple[str, int, int]]): The path, size and `st_mtime_ns` of the file, see `detect_encoding()`.
+
+    Returns:
+        str: The decoded text.
+
+    """
+    # utf-8-sig drops the byte order mark some editors write, e.g. so JSON parses
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        # Only the last character was cut in half
+        if truncated and e.reason == "unexpected end of data":
+            return data[: e.start].decode("utf-8-sig")
+    return data.decode(detect_encoding(data, key), errors="replace")
+
+
+def allocate_budget(sizes: List[int], max_bytes: int) -> int:
+    """Return the number of bytes each file may use, so their total fits a budget.
+
+    The largest files are truncated first: all files larger than the returned cap
+    are truncated to it, smaller files are read in full.
+
+    Args:
+        sizes (List[int]): The size of every file, in bytes.
+        max_bytes (int): The budget.
+
+    Returns:
+        int: The cap per file.
+
+    """
+    remaining = max(max_bytes, 0)
+    ordered = sorted(sizes)
+    for i, size in enumerate(ordered):
+        # Split what's left evenly between this file and all larger ones
+        cap = remaining // (len(ordered) - i)
+        if size > cap:
+            return cap
+        remaining -= size
+    return max(ordered, default=0)
+
+
+@dataclass
+class FileContent:
+    """A file read by `iter_file_contents()`."""
+
+    path: str  # Relative to the directory read
+    size: int
+    content: Optional[str] = None
+    truncated: bool = False
+    skipped: Optional[str] = None  # Reason the file was not read, e.g. "binary"
+
+
+def _read(root: Path, path: str, size: int, mtime_ns: int, cap: int) -> FileContent:
+    try:
+        with (root / path).open("rb") as f:
+            # Sniffed whatever the cap, so binary files are skipped even if none of them fits
+            head = f.read(SNIFF_BYTES)
+            if is_binary(head):
+                return FileContent(path, size, skipped="binary")
+            data = head + f.read(cap - len(head)) if cap > len(head) else head[:cap]
+    except OSError as e:
+        return FileContent(path, size, skipped=str(e))
+    truncated = len(data) < size
+    content = decode_text(data, truncated, (str(root / path), size, mtime_ns))
+    return FileContent(path, size, content, truncated)
+
+
+def iter_file_contents(
+    root: Path, pattern: str = "", max_bytes: int = 0, window: int = 64
+) -> Iterator[FileContent]:
+    """Read the text files in a directory tree concurrently, in walk order.
+
+    Files are found with `walker.walk()`, so ignored files are skipped, and read
+    by a thread pool. At most `window` files are read ahead of the consumer,
+    which bounds memory use. Binary files are detected by their content and
+    skipped.
+
+    Args:
+        root (Path): The directory.
+        pattern (str): Optional glob pattern files must match, see `walker.matches_glob()`.
+        max_bytes (int): Total bytes to read, the largest files are truncated first to fit. If 0 or less, there is no limit.
+        window (int): Maximum number of files read ahead.
+
+    Yields:
+        FileContent: The files.
+
+    """
+    files = []
+    for item in walk(root):
+        if item.is_dir or (pattern and not matches_glob(pattern, item.path)):
+            continue
+        try:
+            stat = item.entry.stat()
+            files.append((item.path, stat.st_size, stat.st_mtime_ns))
+        except OSError as e:
+            logger.warning(f"Unable to stat {item.path}: {e}")
+
+    cap = allocate_budget([x[1] for x in files], max_bytes) if max_bytes > 0 else None
+    executor = _get_executor()
+    pending: Deque[Future] = deque()
+    try:
+        for path, size, mtime_ns in files:
+            pending.append(
+                executor.submit(
+                    _read, root, path, size, mtime_ns, size if cap is None else cap
+                )
+            )
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,145 +1,482 @@
+import glob
 import json
 import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 
-import chardet
 import duckdb
 import yaml
 
+from misstea.constants import (
+    LIST_DIRECTORY_LIMIT,
+    PARQUET_ROW_LIMIT,
+    PROFILE_DATASET_SAMPLE_BYTES,
+    PROFILE_DATASET_SAMPLE_ROWS,
+    QUERY_FILES_MAX_BYTES,
+    QUERY_FILES_MAX_ROWS,
+    QUERY_FILES_TIMEOUT_SECONDS,
+    READ_DIRECTORY_MAX_BYTES,
+    SEARCH_CODE_LIMIT,
+)
+from misstea.sub_agents.coding import editor
+from misstea.sub_agents.coding.database import (
+    check_select,
+    get_connection,
+    quote_identifier,
+)
+from misstea.sub_agents.coding.editor import atomic_write, read_text
+from misstea.sub_agents.coding.index import get_code_index
+from misstea.sub_agents.coding.reader import decode_text, iter_file_contents
+from misstea.sub_agents.coding.walker import matches_glob, walk
+
 logger = logging.getLogger(__name__)
 
 
+def apply_edits(edits: list[dict]) -> str:
+    """Apply several edits to one or more files in a single call.
+
+    Every edit is an object with a `path` and one of:
+
+    * `search`, `replace` and optionally `count`: Replace exact matches of `search`, the call fails unless there are exactly `count` (default 1) of them.
+    * `start_line`, `end_line` and `replace`: Replace a range of lines, numbered from 1 and inclusive. Use `end_line` = `start_line` - 1 to insert lines.
+    * `diff`: Apply the hunks of a unified diff.
+    * `content`: Write the whole file, e.g. to create it.
+
+    Line numbers and hunks refer to the files before any edit. If any edit can't
+    be applied, no file is changed.
+
+    Args:
+        edits (list[dict]): The edits.
+
+    Returns:
+        str: JSON with a unified diff of the changes.
+
+    """
+    try:
+        diff = editor.apply_edits(edits)
+    except editor.EditError as e:
+        logger.error(f"Unable to apply edits: {e}")
+        return json.dumps({"status": "failure", "report": str(e)})
+    except OSError as e:
+        logger.error(f"Unable to write edits: {e}")
+        return json.dumps({"status": "failure", "report": str(e)})
+    return json.dumps({"status": "success", "diff": diff})
+
+
 def list_directory_contents(
-    directory_path: str, include_subdirectories: str = "yes", type_filter: str = "all"
+    directory_path: str,
+    include_subdirectories: str = "yes",
+    type_filter: str = "all",
+    pattern: str = "",
+    max_depth: int = 0,
+    limit: int = LIST_DIRECTORY_LIMIT,
+    cursor: str = "",
+    include_details: str = "no",
 ) -> str:
-    """Recursively traverses a directory and its subdirectories, returning a list of objects based on the specified type_filter.
+    """List the files and directories in a directory, a page at a time.
+
+    Entries matching `.gitignore` files or common build, cache and dependency
+    directories (e.g. `.git`, `node_modules`, `.venv`, `target`) are skipped.
 
     Args:
         directory_path (str): The path to the directory to scan.
-        include_subdirectories: (Optional(str)): An optional string argument that can be "yes" or "no". Defaults to "yes".
-        type_filter (Optional(str)): An optional string argument that can be "files", "directories", or "all". Defaults to "all".
+        include_subdirectories (str): "yes" to list subdirectories recursively, "no" to only list the directory itself. Defaults to "yes".
+        type_filter (str): "files", "directories", or "all". Defaults to "all".
+        pattern (str): Optional glob pattern entries must match, e.g. "*.py" or "src/**/test_*.py". Patterns without a "/" match the name of an entry.
+        max_depth (int): How many levels of subdirectories to list, 1 only lists the directory itself. If 0, there is no limit.
+        limit (int): Maximum number of entries to return, at most 500. If 0, defaults to 500.
+        cursor (str): The `next_cursor` of the previous page, to list the next page.
+        include_details (str): "yes" to include the size in bytes and modification time of every entry. Defaults to "no".
 
     Returns:
-        str: List of objects matching the type_filter.
+        str: JSON with the entries, relative to `directory`, and `next_cursor` if there are more. Directories end with "/".
 
     Raises:
-        ValueError: If an invalid include_subdirectories or type_filter is provided.
+        ValueError: If an invalid include_subdirectories, type_filter or include_details is provided.
 
     """
+    if include_subdirectories not in ["yes", "no"]:
+        raise ValueError(
+            f"include_subdirectories must be 'yes' or 'no'. Instead for `{include_subdirectories}`."
+        )
+    if type_filter not in ["files", "directories", "all"]:
+        raise ValueError(
+            f"Invalid type_filter: {type_filter}. Must be 'files', 'directories', or 'all'."
+        )
+    if include_details not in ["yes", "no"]:
+        raise ValueError(
+            f"include_details must be 'yes' or 'no'. Instead for `{include_details}`."
+        )
+
+    # A page must have at least one entry, otherwise the cursor never advances
+    limit = min(limit, LIST_DIRECTORY_LIMIT) if limit > 0 else LIST_DIRECTORY_LIMIT
+
     path = Path(directory_path)
     if not path.is_dir():
         logger.error(f"Directory not found: {directory_path}")
+        return json.dumps(
+            {"status": "failure", "report": f"Directory not found: {directory_path}"}
+        )
 
-    if include_subdirectories == "yes":
-        iter_item = path.rglob("*")
-    elif include_subdirectories == "no":
-        iter_item = path.iterdir()
+    entries: list = []
+    last_path = next_cursor = None
+    for item in walk(
+        path,
+        max_depth=1 if include_subdirectories == "no" else max_depth,
+        after=cursor,
+    ):
+        if (type_filter == "files" and item.is_dir) or (
+            type_filter == "directories" and not item.is_dir
+        ):
+            continue
+        if pattern and not matches_glob(pattern, item.path):
+            continue
+        if len(entries) == limit:
+            next_cursor = last_path
+            break
+        last_path = item.path
+        name = item.path + "/" if item.is_dir else item.path
+        if include_details == "yes":
+            stat = item.entry.stat(follow_symlinks=False)
+            entries.append(
+                {
+                    "path": name,
+                    "size": stat.st_size,
+                    "modified": datetime.fromtimestamp(
+                        stat.st_mtime, timezone.utc
+                    ).isoformat(timespec="seconds"),
+                }
+            )
+        else:
+            entries.append(name)
+
+    return json.dumps(
+        {
+            "status": "success",
+            "directory": str(path.absolute()),
+            "entries": entries,
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+# DuckDB table functions that read each type of data file
+_TABLE_FUNCTIONS = {
+    ".csv": "read_csv",
+    ".tsv": "read_csv",
+    ".json": "read_json",
+    ".jsonl": "read_json",
+    ".ndjson": "read_json",
+    ".parquet": "read_parquet",
+    ".pq": "read_parquet",
+}
+# Types quantiles are calculated for, other than DECIMAL(p, s)
+_ORDERED_TYPES = {
+    "TINYINT",
+    "SMALLINT",
+    "INTEGER",
+    "BIGINT",
+    "HUGEINT",
+    "UTINYINT",
+    "USMALLINT",
+    "UINTEGER",
+    "UBIGINT",
+    "FLOAT",
+    "DOUBLE",
+    "DATE",
+    "TIMESTAMP",
+    "TIMESTAMP WITH TIME ZONE",
+}
+
+
+def _profile_expressions(name: str, column_type: str, top_k: int) -> list[str]:
+    column = quote_identifier(name)
+    expressions = [f"count({column})", f"approx_count_distinct({column})"]
+    # Nested values, e.g. STRUCT and lists, are only counted
+    if column_type.startswith(("STRUCT", "MAP", "UNION")) or column_type.endswith("]"):
+        return [*expressions, "NULL", "NULL", "NULL", "NULL"]
+    expressions += [f"min({column})::VARCHAR", f"max({column})::VARCHAR"]
+    if column_type in _ORDERED_TYPES or column_type.startswith("DECIMAL"):
+        expressions.append(f"approx_quantile({column}, [0.25, 0.5, 0.75])::VARCHAR[]")
     else:
-        raise ValueError(
-            f"include_subdirectories must be 'yes' or 'no'. Instead for `{include_subdirectories}`."
+        expressions.append("NULL")
+    expressions.append(f"approx_top_k({column}, {int(top_k)})::VARCHAR[]")
+    return expressions
+
+
+def profile_dataset(path: str, top_k: int = 5) -> str:
+    """Summarise a CSV, NDJSON, JSON or Parquet dataset without reading its rows.
+
+    Returns the number of rows and, for each column, its type, the ratio of nulls,
+    an estimate of the number of distinct values, the minimum, maximum and
+    quartiles, and the most common values. All statistics are calculated in a
+    single pass, files larger than 256MB are profiled on a random sample of 1
+    million rows, `sample_rows` is the number of rows profiled.
+
+    Args:
+        path (str): The path to the file, may be a glob of files with the same columns, e.g. "/data/*.csv".
+        top_k (int): The number of most common values to return for each column.
+
+    Returns:
+        str: JSON with the statistics.
+
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in _TABLE_FUNCTIONS:
+        return json.dumps(
+            {
+                "status": "failure",
+                "report": f"Unsupported file type, expected one of: {', '.join(_TABLE_FUNCTIONS)}.",
+            }
+        )
+    # Path.glob only accepts relative patterns
+    if not (files := glob.glob(path, recursive=True)):  # noqa: PTH207
+        logger.error(f"The file '{path}' was not found.")
+        return json.dumps({"status": "failure", "report": f"File not found: {path}"})
+
+    source = table = f"{_TABLE_FUNCTIONS[suffix]}($1)"
+    sampled = sum(Path(x).stat().st_size for x in files) > PROFILE_DATASET_SAMPLE_BYTES
+    if sampled:
+        # Reservoir sampling keeps memory constant, REPEATABLE makes profiles comparable
+        source = f"(SELECT * FROM {source} USING SAMPLE reservoir({PROFILE_DATASET_SAMPLE_ROWS} ROWS) REPEATABLE (0))"  # noqa: S608
+
+    con = get_connection()
+    try:
+        schema = con.execute(f"DESCRIBE SELECT * FROM {source}", [path]).fetchall()  # noqa: S608
+        expressions = ["count(*)"]
+        for name, column_type, *_ in schema:
+            expressions += _profile_expressions(name, column_type, top_k)
+        values = con.execute(
+            f"SELECT {', '.join(expressions)} FROM {source}",  # noqa: S608
+            [path],
+        ).fetchone()
+        sample_rows = values[0]
+        # Parquet files are counted from their metadata, other files are scanned
+        rows = (
+            con.execute(f"SELECT count(*) FROM {table}", [path]).fetchone()[0]  # noqa: S608
+            if sampled
+            else sample_rows
         )
+    except duckdb.Error as e:
+        logger.error(f"Error profiling '{path}': {e}")
+        return json.dumps({"status": "failure", "report": str(e)})
+
+    columns = {}
+    for i, (name, column_type, *_) in enumerate(schema):
+        count, distinct, minimum, maximum, quartiles, top = values[
+            1 + i * 6 : 7 + i * 6
+        ]
+        columns[name] = {
+            "type": column_type,
+            "null_ratio": round(1 - count / sample_rows, 4) if sample_rows else 0,
+            "distinct": distinct,
+            "min": minimum,
+            "max": maximum,
+            "quartiles": quartiles,
+            "top": top,
+        }
+    logger.debug(f"Profiled {len(columns)} columns of {path}, {sampled=}.")
+    return json.dumps(
+        {
+            "status": "success",
+            "rows": rows,
+            "sampled": sampled,
+            "sample_rows": sample_rows,
+            "columns": columns,
+        }
+    )
+
+
+def query_files(sql: str, max_rows: int = 0) -> str:
+    """Run a read-only DuckDB SQL query over local data files.
+
+    Files are queried with DuckDB's table functions, which accept globs, e.g.
+    `SELECT client, count(*) FROM read_csv('/data/*.csv') GROUP BY client`,
+    `read_json('logs/*.ndjson')` or `read_parquet('data/**/*.parquet')`. Only a
+    single SELECT statement is allowed, including DESCRIBE and SUMMARIZE.
 
-    results = []
-    for item in iter_item:
-        if type_filter == "files":
-            if item.is_file():
-                results.append(item)
-        elif type_filter == "directories":
-            if item.is_dir():
-                results.append(item)
-        elif type_filter == "all":
-            results.append(item)
-        else:
-            raise ValueError(
-                f"Invalid type_filter: {type_filter}. Must be 'files', 'directories', or 'all'."
-            )
-    return json.dumps([str(x.absolute()) for x in results])
+    Args:
+        sql (str): The query.
+        max_rows (int): The maximum number of rows to return. If 0, defaults to 1000.
 
+    Returns:
+        str: JSON with the column names, the rows and whether rows were left out due to `max_rows` or the size of the result.
 
-def read_directory(path: str) -> str:
-    """Read the contents of all files at the specified path.
+    """
+    try:
+        check_select(sql)
+    except ValueError as e:
+        return json.dumps({"status": "failure", "report": str(e)})
+
+    # Each query gets its own cursor, so a timer firing as a query ends can't
+    # interrupt the next one
+    con = get_connection().cursor()
+    max_rows = max_rows or QUERY_FILES_MAX_ROWS
+    # Cancel queries that run too long, DuckDB checks for interrupts while executing
+    timer = threading.Timer(QUERY_FILES_TIMEOUT_SECONDS, con.interrupt)
+    timer.start()
+    try:
+        result = con.execute(sql)
+        columns = [x[0] for x in result.description]
+        rows = result.fetchmany(max_rows + 1)
+    except duckdb.InterruptException:
+        logger.error(f"Query timed out after {QUERY_FILES_TIMEOUT_SECONDS}s: {sql}")
+        return json.dumps(
+            {
+                "status": "failure",
+                "report": f"Query timed out after {QUERY_FILES_TIMEOUT_SECONDS} seconds.",
+            }
+        )
+    except duckdb.Error as e:
+        logger.error(f"Query failed: {e}")
+        return json.dumps({"status": "failure", "report": str(e)})
+    finally:
+        timer.cancel()
+        # Waits for an interrupt that is already running, before the cursor is closed
+        timer.join()
+        con.close()
+
+    truncated = len(rows) > max_rows
+    encoded = []
+    size = 0
+    for row in rows[:max_rows]:
+        encoded.append(json.dumps(row, default=str))
+        size += len(encoded[-1])
+        if size > QUERY_FILES_MAX_BYTES:
+            encoded.pop()
+            truncated = True
+            break
+
+    logger.debug(f"Query returned {len(encoded)} rows, {truncated=}.")
+    return (
+        f'{{"status": "success", "columns": {json.dumps(columns)}, '
+        f'"rows": [{", ".join(encoded)}], "truncated": {json.dumps(truncated)}}}'
+    )
+
+
+def read_directory(path: str, pattern: str = "", max_bytes: int = 0) -> str:
+    """Read the contents of all text files at the specified path.
+
+    Files matching `.gitignore` files or in build, cache and dependency directories
+    are skipped, as are binary files. If the files are larger than `max_bytes` in
+    total, the largest files are truncated.
 
     Args:
         path (str): The path to read.
+        pattern (str): Optional glob pattern files must match, e.g. "*.py" or "src/**/*.sql".
+        max_bytes (int): Total number of bytes to read, about 4 bytes per token. If 0 or less, defaults to 400,000.
 
     Returns:
-        dict[str, str]: The path to the file and the contents of the file.
+        str: JSON with the contents of each file keyed by its path relative to `path`, the paths of truncated files and the number of skipped files.
 
     """
-    data = {}
-    for file_path in Path(path).glob("**/*"):
-        if file_path.is_file() and file_path.suffix not in [
-            ".0",
-            ".1",
-            ".2",
-            ".3",
-            ".4",
-            ".5",
-            ".6",
-            ".7",
-            ".8",
-            ".9",
-            ".10",
-            ".11",
-            ".12",
-            ".a",
-            ".ani",
-            ".bz2",
-            ".dat",
-            ".exe",
-            ".fits",
-            ".gz",
-            ".gzip",
-            ".ico",
-            ".idx",
-            ".jpg",
-            ".jpeg",
-            ".lzma",
-            ".mat",
-            ".mo",
-            ".nc",
-            ".npy",
-            ".npz",
-            ".obj",
-            ".pack",
-            ".pkl",
-            ".png",
-            ".pyc",
-            ".rev",
-            ".sav",
-            ".so",
-            ".testcase",
-            ".wav",
-            ".webp",
-            ".whl",
-            ".woff2",
-            ".xz",
-            ".z",
-            "",
-        ]:
-            try:
-                data[str(file_path.absolute())] = read_file(str(file_path.absolute()))
-            except UnicodeDecodeError:
-                logger.error(f"Failed to read {file_path.suffix}")
-                data[str(file_path.absolute())] = (
-                    "Unable to read due to UnicodeDecodeError."
-                )
-
-    logger.debug(f"{data=}")
-    return json.dumps(data)
-
-
-def read_file(file_path: str, encoding: str = "") -> str | dict | list | None:
+    root = Path(path)
+    if not root.is_dir():
+        logger.error(f"Directory not found: {path}")
+        return json.dumps(
+            {"status": "failure", "report": f"Directory not found: {path}"}
+        )
+
+    files = {}
+    truncated = []
+    skipped = 0
+    for file in iter_file_contents(
+        root, pattern, max_bytes if max_bytes > 0 else READ_DIRECTORY_MAX_BYTES
+    ):
+        if file.skipped is not None:
+            logger.debug(f"Skipped {file.path}: {file.skipped}")
+            skipped += 1
+            continue
+        files[file.path] = file.content
+        if file.truncated:
+            truncated.append(file.path)
+
+    logger.debug(
+        f"Read {len(files)} files from {path}, {len(truncated)} truncated and {skipped} skipped."
+    )
+    return json.dumps(
+        {
+            "status": "success",
+            "directory": str(root.absolute()),
+            "files": files,
+            "truncated": truncated,
+            "skipped": skipped,
+        }
+    )
+
+
+def _read_parquet(
+    file_path: str,
+    columns: str,
+    where: str,
+    limit: int,
+    offset: int,
+    schema_only: bool,
+) -> dict:
+    con = get_connection()
+    num_rows = con.execute(
+        "SELECT sum(num_rows) FROM parquet_file_metadata($1)", [file_path]
+    ).fetchone()[0]
+    if schema_only:
+        schema = con.execute(
+            "DESCRIBE SELECT * FROM read_parquet($1)", [file_path]
+        ).fetchall()
+        return {"num_rows": num_rows, "schema": {x[0]: x[1] for x in schema}}
+
+    selection = (
+        ", ".join(quote_identifier(x.strip()) for x in columns.split(",") if x.strip())
+        or "*"
+    )
+    condition = f"WHERE ({where})" if where.strip() else ""
+    # Columns, filter and limit are pushed down, so only the rows returned are read.
+    # The filter is SQL written by the agent, so the query must still be a SELECT
+    sql = f"SELECT {selection} FROM read_parquet($1) {condition} LIMIT $2 OFFSET $3"  # noqa: S608
+    check_select(sql)
+    result = con.execute(sql, [file_path, limit or PARQUET_ROW_LIMIT, offset])
+    names = [x[0] for x in result.description]
+    rows = result.fetchall()
+    return json.loads(
+        json.dumps(
+            {
+                "num_rows": num_rows,
+                "offset": offset,
+                "columns": {
+                    name: [row[i] for row in rows] for i, name in enumerate(names)
+                },
+            },
+            default=str,
+        )
+    )
+
+
+def read_file(
+    file_path: str,
+    encoding: str = "",
+    columns: str = "",
+    where: str = "",
+    limit: int = 0,
+    offset: int = 0,
+    schema_only: str = "no",
+) -> str | dict | list | None:
     """Read a file, attempt to auto-detect encoding if not specified.
 
     Handles common file types such as YAML, JSON, and Parquet, returning their parsed content.
+    For Parquet files only the requested columns and rows are read.
 
     Args:
         file_path (str): The path to the file.
-        encoding (str): The encoding to use. If empty, chardet will attempt detection.
+        encoding (str): The encoding to use. If empty, UTF-8 is tried first, then chardet will attempt detection.
+        columns (str): Parquet only, comma separated names of the columns to return. If empty, all columns are returned.
+        where (str): Parquet only, a DuckDB SQL expression rows must match, e.g. "amount > 100 AND country = 'NL'".
+        limit (int): Parquet only, the maximum number of rows to return. If 0, defaults to 100.
+        offset (int): Parquet only, the number of rows to skip.
+        schema_only (str): Parquet only, "yes" to only return the column names and types, or "no".
 
     Returns:
-        str | dict | list | None: The content of the file if successful, parsed if YAML/JSON/Parquet, otherwise None.
+        str | dict | list | None: The content of the file if successful, parsed if YAML/JSON, for Parquet the total number of rows and the values of each column, otherwise None.
 
     """
     path_obj = Path(file_path)
@@ -147,65 +484,28 @@ def read_file(file_path: str, encoding: str = "") -> str | dict | list | None:
         logger.error(f"The file '{file_path}' was not found.")
         return None
 
-    # If encoding is not provided (""), attempt to detect it
-    if not encoding:  # Do not change, needs to handle empty strings and not None due to google-adk limitation
-        try:
-            with path_obj.open(mode="rb") as f:
-                raw_data = f.read(4096)  # Read up to 4KB for detection
-            detection_result = chardet.detect(raw_data)
-            if detected_encoding := detection_result["encoding"]:  #
-                confidence = detection_result["confidence"]
-
-                logger.debug(
-                    f"Detected encoding: '{detected_encoding}' with confidence: {confidence:.2f}"
-                )
-                encoding = detected_encoding
-            else:
-                logger.debug(
-                    f"Could not reliably detect encoding for '{file_path}'. Falling back to 'utf-8'."
-                )
-                encoding = "utf-8"
-        except Exception as e:
-            logger.debug(
-                f"Error during encoding detection for '{file_path}': {e}. Falling back to 'utf-8'."
-            )
-            encoding = "utf-8"
-
-    # YAML
-    if path_obj.suffix in [".yaml", ".yml"]:  #
-        try:
-            with path_obj.open(mode="r", encoding=encoding) as f:
-                content = f.read()
-                return yaml.safe_load(content)
-        except yaml.YAMLError as e:
-            logger.error(f"Error parsing YAML file '{file_path}': {e}")
-            return None
-    # JSON
-    elif path_obj.suffix == ".json":
-        try:
-            with path_obj.open(mode="r", encoding=encoding) as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON file '{file_path}': {e}")
-            return None
     # Parquet
-    elif path_obj.suffix in [".parquet", ".pq"]:  #
+    if path_obj.suffix in [".parquet", ".pq"]:  #
         try:
-            # Using duckdb to read parquet
-            con = duckdb.connect(database=":memory:")
-            return (
-                con.execute("SELECT * FROM read_parquet($1)", [file_path])
-                .fetch_arrow_table()
-                .to_pylist()
+            return _read_parquet(
+                file_path, columns, where, limit, offset, schema_only == "yes"
             )
         except Exception as e:
             logger.error(f"Error reading Parquet file '{file_path}': {e}")
             return None
 
-    # Default: read as plain text
+    # The file is read once, then decoded in memory
     try:
-        with path_obj.open(mode="r", encoding=encoding) as f:
-            return f.read()
+        with path_obj.open(mode="rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        # If encoding is not provided (""), attempt to detect it
+        if not encoding:  # Do not change, needs to handle empty strings and not None due to google-adk limitation
+            content = decode_text(
+                data, key=(str(path_obj.absolute()), stat.st_size, stat.st_mtime_ns)
+            )
+        else:
+            content = data.decode(encoding)
     except UnicodeDecodeError:
         logger.error(
             f"Could not decode file '{file_path}' with encoding '{encoding}'. Please ensure the correct encoding is specified or auto-detection failed."  #
@@ -217,6 +517,66 @@ def read_file(file_path: str, encoding: str = "") -> str | dict | list | None:
         )
         return None
 
+    # YAML
+    if path_obj.suffix in [".yaml", ".yml"]:  #
+        try:
+            return yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            logger.error(f"Error parsing YAML file '{file_path}': {e}")
+            return None
+    # JSON
+    elif path_obj.suffix == ".json":
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing JSON file '{file_path}': {e}")
+            return None
+
+    # Default: plain text
+    return content
+
+
+def search_code(query: str, path: str, limit: int = 0) -> str:
+    """Search the text files in a directory tree, e.g. to find where a dbt model or Terraform resource is defined.
+
+    Uses a full-text index, which is updated with files changed since the last
+    search. Files ignored by `.gitignore` files are not searched.
+
+    Args:
+        query (str): Words that must all appear within a few lines of each other, matched case insensitively anywhere in a word, e.g. "resource aws_s3_bucket" or "stg_orders". Words must be at least 3 characters.
+        path (str): The directory to search, e.g. a repository.
+        limit (int): The maximum number of results to return. If 0, defaults to 20.
+
+    Returns:
+        str: JSON with the matching lines, most relevant first, as the path of the file, the line number and the line.
+
+    """
+    root = Path(path)
+    if not root.is_dir():
+        logger.error(f"Directory not found: {path}")
+        return json.dumps(
+            {"status": "failure", "report": f"Directory not found: {path}"}
+        )
+
+    index = get_code_index()
+    try:
+        index.update(root)
+        results = index.search(root, query, limit or SEARCH_CODE_LIMIT)
+    except ValueError as e:
+        return json.dumps({"status": "failure", "report": str(e)})
+    except sqlite3.OperationalError as e:
+        # E.g. a query SQLite's full-text search can't parse, or a locked index
+        logger.error(f"Search for {query!r} in {path} failed: {e}")
+        return json.dumps({"status": "failure", "report": f"Search failed: {e}"})
+    return json.dumps(
+        {
+            "status": "success",
+            "results": [
+                {"path": x.path, "line": x.line, "snippet": x.snippet} for x in results
+            ],
+        }
+    )
+
 
 def write_to_file(path: str, content: str) -> str:
     """Write content to a file at the specified path.
@@ -231,7 +591,7 @@ def write_to_file(path: str, content: str) -> str:
         str: A confirmation message.
 
     """
-    Path(path).write_text(content)
+    atomic_write(Path(path), content.encode("utf-8"))
     return f"Successfully wrote to {path}."
 
 
@@ -247,7 +607,7 @@ def replace_in_file(path: str, search: str, replace: str) -> str:
         str: A confirmation message.
 
     """
-    content = Path(path).read_text()
+    content, encoding = read_text(Path(path))
     new_content = content.replace(search, replace)
-    Path(path).write_text(new_content)
+    atomic_write(Path(path), new_content.encode(encoding))
     return f"Successfully replaced text in {path}."
@@ -0,0 +1,232 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from misstea.constants import DIRECTORY_IGNORE_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Compile a glob pattern, as used by `.gitignore` files, to a regex.
+
+    `*` and `?` don't match `/`, `**` matches any number of directories. Patterns
+    are matched against paths relative to a base directory, separated by `/`.
+
+    Args:
+        pattern (str): The glob pattern, e.g. "*.py" or "src/**/test_*.py".
+
+    Returns:
+        re.Pattern: The compiled regex.
+
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[" and (end := pattern.find("]", i + 1)) != -1:
+            group = pattern[i + 1 : end]
+            if group.startswith("!"):
+                group = "^" + group[1:]
+            regex += f"[{group}]"
+            i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return re.compile(regex + r"\Z")
+
+
+def matches_glob(pattern: str, relative_path: str) -> bool:
+    """Return if a path matches a glob pattern.
+
+    Patterns without a `/` are matched against the name only, like in `.gitignore` files.
+
+    Args:
+        pattern (str): The glob pattern, see `compile_pattern()`.
+        relative_path (str): The path, relative to the directory being walked.
+
+    Returns:
+        bool: True if the path matches.
+
+    """
+    if "/" not in pattern:
+        relative_path = relative_path.rsplit("/", 1)[-1]
+    return compile_pattern(pattern.lstrip("/")).match(relative_path) is not None
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    """A single pattern of a `.gitignore` file."""
+
+    base: str  # Directory of the .gitignore file, relative to the walked root
+    regex: re.Pattern
+    anchored: bool  # Matched against the full path rather than any name
+    directory_only: bool
+    negated: bool
+
+    @classmethod
+    def parse(cls, line: str, base: str = "") -> Optional["IgnoreRule"]:
+        """Parse a line of a `.gitignore` file.
+
+        Args:
+            line (str): The line.
+            base (str): Directory of the .gitignore file, relative to the walked root.
+
+        Returns:
+            Optional[IgnoreRule]: The rule, None for blank lines and comments.
+
+        """
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            return None
+        negated = line.startswith("!")
+        line = line.removeprefix("!").removeprefix("\\")
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        return cls(
+            base=base,
+            regex=compile_pattern(line.lstrip("/")),
+            anchored=anchored,
+            directory_only=directory_only,
+            negated=negated,
+        )
+
+    def matches(self, relative_path: str, is_dir: bool) -> bool:
+        """Return if a path matches the rule, ignoring negation.
+
+        Args:
+            relative_path (str): The path, relative to the walked root.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the path matches.
+
+        """
+        if self.directory_only and not is_dir:
+            return False
+        if self.base:
+            if not relative_path.startswith(self.base + "/"):
+                return False
+            relative_path = relative_path[len(self.base) + 1 :]
+        if not self.anchored:
+            relative_path = relative_path.rsplit("/", 1)[-1]
+        return self.regex.match(relative_path) is not None
+
+
+def is_ignored(rules: Tuple[IgnoreRule, ...], relative_path: str, is_dir: bool) -> bool:
+    """Return if a path is ignored, the last matching rule wins.
+
+    Args:
+        rules (Tuple[IgnoreRule, ...]): The rules, in the order they were read.
+        relative_path (str): The path, relative to the walked root.
+        is_dir (bool): Whether the path is a directory.
+
+    Returns:
+        bool: True if the path is ignored.
+
+    """
+    for rule in reversed(rules):
+        if rule.matches(relative_path, is_dir):
+            return not rule.negated
+    return False
+
+
+def _read_gitignore(directory: str, base: str) -> List[IgnoreRule]:
+    # Plain strings rather than Path objects, this runs for every directory walked
+    try:
+        with open(  # noqa: PTH123
+            os.path.join(directory, ".gitignore"),  # noqa: PTH118
+            encoding="utf-8",
+        ) as f:
+            return [x for line in f if (x := IgnoreRule.parse(line, base))]
+    except (OSError, UnicodeDecodeError):
+        return []
+
+
+@dataclass(frozen=True)
+class WalkEntry:
+    """An entry found by `walk()`."""
+
+    path: str  # Relative to the walked root, separated by `/`
+    entry: os.DirEntry
+    is_dir: bool
+    depth: int
+
+
+def walk(
+    root: Path,
+    max_depth: int = 0,
+    respect_gitignore: bool = True,
+    after: str = "",
+) -> Iterator[WalkEntry]:
+    """Walk a directory tree with `os.scandir`, skipping ignored entries.
+
+    Ignored directories are never entered. Entries are yielded depth-first in
+    sorted order, so a walk can be resumed after any entry. Symbolic links to
+    directories are listed but not followed.
+
+    Args:
+        root (Path): The directory to walk.
+        max_depth (int): Depth to descend to, 1 only lists `root`. 0 for no limit.
+        respect_gitignore (bool): Skip entries matching `DIRECTORY_IGNORE_PATTERNS` or `.gitignore` files.
+        after (str): Only yield entries after this relative path, to resume a walk.
+
+    Yields:
+        WalkEntry: The entries.
+
+    """
+    default_rules = tuple(
+        x for line in DIRECTORY_IGNORE_PATTERNS if (x := IgnoreRule.parse(line))
+    )
+    cursor = tuple(after.strip("/").split("/")) if after else ()
+
+    def scan(
+        directory: str, prefix: str, depth: int, rules: Tuple[IgnoreRule, ...]
+    ) -> Iterator[WalkEntry]:
+        if respect_gitignore:
+            rules = rules + tuple(_read_gitignore(directory, prefix))
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda x: x.name)
+        except OSError as e:
+            logger.warning(f"Unable to list {directory}: {e}")
+            return
+
+        for entry in entries:
+            relative_path = f"{prefix}/{entry.name}" if prefix else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if respect_gitignore and is_ignored(rules, relative_path, is_dir):
+                continue
+
+            # Entries are walked depth-first in sorted order, i.e. in order of their parts
+            parts = tuple(relative_path.split("/"))
+            if not cursor or parts > cursor:
+                yield WalkEntry(relative_path, entry, is_dir, depth)
+            elif not (is_dir and cursor[: len(parts)] == parts):
+                # Skip subtrees entirely before the cursor
+                continue
+            if is_dir and (not max_depth or depth < max_depth):
+                yield from scan(entry.path, relative_path, depth + 1, rules)
+
+    yield from scan(str(root), "", 1, default_rules if respect_gitignore else ())
@@ -7,7 +7,7 @@ from google.adk.tools.mcp_tool.mcp_toolset import (
     StdioServerParameters,
 )
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
 
 
 def get_filesystem_agent() -> LlmAgent:
@@ -18,7 +18,7 @@ def get_filesystem_agent() -> LlmAgent:
 
     """
     return LlmAgent(
-        model=AGENT_MODEL,
+        model=get_model("filesystem"),
         name="filesystem_agent",
         instruction=f"""
         You are a helpful filesystem assistant that can help users manage their files.
@@ -4,10 +4,10 @@ from google.adk.agents import Agent
 from google.adk.tools.mcp_tool import McpToolset
 from google.adk.tools.mcp_tool.mcp_session_manager import StreamableHTTPServerParams
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
 
 root_agent = Agent(
-    model=AGENT_MODEL,
+    model=get_model("github"),
     name="github_agent",
     instruction="Help users get information from GitHub",
     tools=[
@@ -1,7 +1,7 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import google_search
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
 
 
 def get_google_search_agent() -> LlmAgent:
@@ -12,7 +12,7 @@ def get_google_search_agent() -> LlmAgent:
 
     """
     return LlmAgent(
-        model=AGENT_MODEL,
+        model=get_model("google_search"),
         name="google_search_agent",
         instruction="You are a helpful search assistant. You must use the google_search tool to answer questions.",
         tools=[google_search],
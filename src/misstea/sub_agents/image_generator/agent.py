@@ -3,19 +3,28 @@ import logging
 import os
 from io import BytesIO
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 from google import genai
 from google.adk.agents import Agent
-from google.genai.types import GenerateContentConfig, Modality
+from google.genai.types import GenerateContentConfig, HttpOptions, Modality
 from PIL import Image
 
-from misstea.constants import AGENT_MODEL
+from misstea.deadlines import remaining_time
+from misstea.models import get_model
+from misstea.offload import run_in_thread
+from misstea.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
-def generate_image(prompt: str) -> Dict[str, str]:
+def _save_image(data: bytes, output_filename: str, extensions: List[str]) -> None:
+    image = Image.open(BytesIO(data))
+    for ext in extensions:
+        image.save(f"{output_filename}.{ext}")
+
+
+async def generate_image(prompt: str) -> Dict[str, str]:
     """Generate an image based on a prompt and save it directly without external image processing packages.
 
     Args:
@@ -28,22 +37,27 @@ def generate_image(prompt: str) -> Dict[str, str]:
     extensions = ["jpeg", "png"]
     output_filename = f"{os.environ['IMAGE_GENERATION_DIR']}/generated_image_{datetime.datetime.now(datetime.timezone.utc).timestamp()}"
     Path(output_filename).parent.mkdir(exist_ok=True, parents=True)
-    client = genai.Client()
-    response = client.models.generate_content(
-        model="gemini-3-pro-image-preview",
-        contents=(prompt),
-        config=GenerateContentConfig(
-            response_modalities=[Modality.IMAGE],
-        ),
+    timeout = remaining_time()
+    client = genai.Client(
+        http_options=HttpOptions(timeout=int(timeout * 1000)) if timeout else None
     )
+    with span("gemini-3-pro-image-preview", "model", agent_name="generate_image"):
+        response = await client.aio.models.generate_content(
+            model="gemini-3-pro-image-preview",
+            contents=(prompt),
+            config=GenerateContentConfig(
+                response_modalities=[Modality.IMAGE],
+            ),
+        )
     if not response.candidates:
         logger.error("No candidates returned from the image generation model.")
         return {"status": "failure", "report": "No candidates returned."}
     for part in response.candidates[0].content.parts:
         if part.inline_data:
-            image = Image.open(BytesIO(part.inline_data.data))
-            for ext in extensions:
-                image.save(f"{output_filename}.{ext}")
+            # Decoding and encoding images is CPU bound, so it's kept off the event loop
+            await run_in_thread(
+                _save_image, part.inline_data.data, output_filename, extensions
+            )
 
     logger.info(f"Image saved to {output_filename} ({', '.join(extensions)}).")
     return {"status": "success", "report": f"Saved to {output_filename}"}
@@ -57,7 +71,7 @@ def get_image_generator_agent() -> Agent:
 
     """
     return Agent(
-        model=AGENT_MODEL,
+        model=get_model("image_generator"),
         name="image_generator_agent",
         instruction=""""
             Generate an image.
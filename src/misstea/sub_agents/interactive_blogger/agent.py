@@ -4,7 +4,9 @@ from google.adk.agents import Agent, LoopAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools import FunctionTool, google_search
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
+from misstea.offload import offload
+from misstea.scheduler import Priority
 from misstea.sub_agents.interactive_blogger.validation_checkers import (
     BlogPostValidationChecker,
     OutlineValidationChecker,
@@ -24,7 +26,7 @@ def suppress_output_callback(callback_context: CallbackContext) -> None:  # noqa
 
 
 blog_editor = Agent(
-    model=AGENT_MODEL,
+    model=get_model("blog_editor", priority=Priority.BACKGROUND),
     name="blog_editor",
     description="Edits a technical blog post based on user feedback.",
     instruction="""
@@ -37,7 +39,7 @@ blog_editor = Agent(
 )
 
 blog_planner = Agent(
-    model=AGENT_MODEL,
+    model=get_model("blog_planner", priority=Priority.BACKGROUND),
     name="blog_planner",
     description="Generates a blog post outline.",
     instruction="""
@@ -68,7 +70,7 @@ robust_blog_planner = LoopAgent(
 
 
 blog_writer = Agent(
-    model=AGENT_MODEL,
+    model=get_model("blog_writer", priority=Priority.BACKGROUND),
     name="blog_writer",
     description="Writes a technical blog post.",
     instruction="""
@@ -100,7 +102,7 @@ robust_blog_writer = LoopAgent(
 
 interactive_blogger_agent = Agent(
     name="interactive_blogger_agent",
-    model=AGENT_MODEL,
+    model=get_model("interactive_blogger"),
     description="The primary technical blogging assistant. It collaborates with the user to create a blog post.",
     instruction=f"""
     You are a technical blogging assistant. Your primary function is to help users create technical blog posts.
@@ -132,8 +134,8 @@ interactive_blogger_agent = Agent(
         blog_editor,
     ],
     tools=[
-        FunctionTool(analyze_codebase),
-        FunctionTool(save_blog_post_to_file),
+        FunctionTool(offload(analyze_codebase)),
+        FunctionTool(offload(save_blog_post_to_file)),
     ],
     output_key="blog_outline",
 )
@@ -8,14 +8,17 @@ from zoneinfo import ZoneInfo
 
 from google.adk.agents import Agent
 from O365 import Account
+from O365.connection import Connection
 from O365.utils import FileSystemTokenBackend
 
 from misstea.constants import (
-    AGENT_MODEL,
     MEETING_ROOMS,
     MY_EMAIL_ADDRESS,
     OUTLOOK_TOKEN_PATH,
 )
+from misstea.deadlines import remaining_time
+from misstea.models import get_model
+from misstea.offload import offload
 from misstea.utils import get_current_date, get_current_time, json_serial
 
 logger = logging.getLogger(__name__)
@@ -134,6 +137,29 @@ def get_my_email_address() -> Dict[str, str]:
     return {"status": "success", "report": MY_EMAIL_ADDRESS}
 
 
+class DeadlineConnection(Connection):
+    """O365 connection whose Graph requests are bounded by the deadline of the current call.
+
+    The deadline is a context variable, so concurrent calls sharing the cached
+    account each time out at their own deadline.
+    """
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """Seconds until the current deadline, otherwise the timeout the connection was created with."""
+        return remaining_time(self._timeout)
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]) -> None:
+        self._timeout = value
+
+
+class DeadlineAccount(Account):
+    """O365 account that uses `DeadlineConnection`."""
+
+    connection_constructor = DeadlineConnection
+
+
 @cache
 def get_outlook_account() -> Account:
     """Return an Outlook Account object.
@@ -154,7 +180,7 @@ def get_outlook_account() -> Account:
             "MICROSOFT_CLIENT_ID and MICROSOFT_CLIENT_SECRET environment variables must be set."
         )
 
-    account = Account(
+    account = DeadlineAccount(
         credentials=(client_id, client_secret),
         token_backend=FileSystemTokenBackend(
             token_filename="o365_token.txt",  # noqa: S106
@@ -205,7 +231,7 @@ def get_outlook_agent() -> Agent:
 
     """
     return Agent(
-        model=AGENT_MODEL,
+        model=get_model("outlook"),
         name="outlook_agent",
         instruction="""
     You are a calendar organiser, you can check which rooms are available, check when calendars are free, when people are available and create meetings with room.
@@ -239,12 +265,13 @@ def get_outlook_agent() -> Agent:
         * A screen is also referred to as a TV or a monitor.
     """,
         tools=[
-            create_a_meeting,
-            get_availability,
+            # O365 is blocking, so its calls run in the thread pool
+            offload(create_a_meeting),
+            offload(get_availability),
             get_current_date,
             get_current_time,
             get_meeting_rooms,
-            get_my_calendar,
+            offload(get_my_calendar),
             get_my_email_address,
         ],
     )
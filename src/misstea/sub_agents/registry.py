@@ -0,0 +1,92 @@
+"""Lazy registry of MissTea sub-agents.
+
+Importing this module does not import any of the sub-agent modules (and therefore
+none of their heavy dependencies or MCP toolsets). Each agent is imported the first
+time it is requested via `get_agent()`, or up-front via `preload_agents()`.
+"""
+
+import importlib
+import logging
+import os
+from typing import TYPE_CHECKING, Iterable, List
+
+if TYPE_CHECKING:
+    from google.adk.agents import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+AGENT_MODULES = {
+    "calculator": "misstea.sub_agents.calculator.agent",
+    "coding": "misstea.sub_agents.coding.agent",
+    "filesystem": "misstea.sub_agents.filesystem.agent",
+    "github": "misstea.sub_agents.github.agent",
+    "google_search": "misstea.sub_agents.google_search.agent",
+    "image_generator": "misstea.sub_agents.image_generator.agent",
+    "interactive_blogger": "misstea.sub_agents.interactive_blogger.agent",
+    "outlook": "misstea.sub_agents.outlook.agent",
+    "terraform": "misstea.sub_agents.terraform.agent",
+    "web_scraper": "misstea.sub_agents.web_scraper.agent",
+}
+
+_loaded_agents: dict[str, "BaseAgent"] = {}
+
+
+def get_agent(agent_name: str) -> "BaseAgent":
+    """Return a sub-agent, importing its module on first use.
+
+    Args:
+        agent_name (str): The name of the sub-agent, e.g. "calculator".
+
+    Returns:
+        BaseAgent: The root agent of the sub-agent module.
+
+    Raises:
+        ValueError: If the agent name is not known.
+
+    """
+    if agent_name not in _loaded_agents:
+        if agent_name not in AGENT_MODULES:
+            raise ValueError(
+                f"Unknown sub-agent: {agent_name}. Must be one of {', '.join(AGENT_MODULES)}."
+            )
+        logger.debug(f"Loading sub-agent: {agent_name}")
+        module = importlib.import_module(AGENT_MODULES[agent_name])
+        _loaded_agents[agent_name] = module.root_agent
+    return _loaded_agents[agent_name]
+
+
+def preload_agents(agent_names: Iterable[str] | None = None) -> List[str]:
+    """Import a subset of sub-agents up-front.
+
+    Args:
+        agent_names (Iterable[str] | None): The sub-agents to load. If None, the
+            comma-separated `MISSTEA_PRELOAD_AGENTS` environment variable is used,
+            where "all" loads every sub-agent.
+
+    Returns:
+        List[str]: The names of the sub-agents that were loaded.
+
+    """
+    if agent_names is None:
+        agent_names = [
+            x.strip()
+            for x in os.getenv("MISSTEA_PRELOAD_AGENTS", "").split(",")
+            if x.strip()
+        ]
+    agent_names = list(agent_names)
+    if "all" in agent_names:
+        agent_names = list(AGENT_MODULES)
+
+    for agent_name in agent_names:
+        get_agent(agent_name)
+    return agent_names
+
+
+def loaded_agents() -> List[str]:
+    """Return the names of the sub-agents that have been loaded so far.
+
+    Returns:
+        List[str]: The names of the loaded sub-agents.
+
+    """
+    return list(_loaded_agents)
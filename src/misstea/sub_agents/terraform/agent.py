@@ -5,7 +5,7 @@ from google.adk.tools.mcp_tool.mcp_toolset import (
     StdioServerParameters,
 )
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
 
 
 def terraform_mcp() -> MCPToolset:
@@ -34,7 +34,7 @@ def get_terraform_agent() -> Agent:
 
     """
     return Agent(
-        model=AGENT_MODEL,
+        model=get_model("terraform"),
         name="terraform_agent",
         instruction=""""
         You are a data engineer doing research on how to use Terraform modules. You always use Terraform's documentation to answer questions but you never return code examples.
@@ -1,6 +1,6 @@
 from google.adk.agents import Agent
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model
 from misstea.sub_agents.web_scraper.tools import (
     fetch_web_page_contents,
 )
@@ -14,7 +14,7 @@ def get_web_scraper_agent() -> Agent:
 
     """
     return Agent(
-        model=AGENT_MODEL,
+        model=get_model("web_scraper"),
         name="web_scraper_agent",
         instruction="""You are a helpful web scraper assistant. You can:
 
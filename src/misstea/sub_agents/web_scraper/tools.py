@@ -2,16 +2,15 @@ import asyncio
 import logging
 from typing import Any
 
-import nest_asyncio
-
+from misstea.deadlines import remaining_time
 from misstea.sub_agents.web_scraper.tools_async import scrape_generic_webpage_to_json
 
 logger = logging.getLogger(__name__)
 
-nest_asyncio.apply()
-
 
-def fetch_web_page_contents(url: str) -> dict[str, str | dict[str, Any] | None] | None:
+async def fetch_web_page_contents(
+    url: str,
+) -> dict[str, str | dict[str, Any] | None] | None:
     """Fetch detailed content of a web page given its URL.
 
     Args:
@@ -23,8 +22,14 @@ def fetch_web_page_contents(url: str) -> dict[str, str | dict[str, Any] | None]
     """
     logger.info(f"Fetching content from {url}...")
     try:
-        content = asyncio.run(scrape_generic_webpage_to_json(url))
+        # Bound the crawl by the caller's deadline, cancelling it closes the browser
+        content = await asyncio.wait_for(
+            scrape_generic_webpage_to_json(url), remaining_time()
+        )
         return {"status": "success", "content": content}
+    except TimeoutError:
+        logger.warning(f"Timed out fetching content from {url}.")
+        return {"status": "timeout", "content": None}
     except Exception as e:
         logger.warning(f"Error fetching content from {url} using LLM: {e}")
         return {"status": "success", "content": None}
@@ -6,11 +6,37 @@ from typing import Any
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, LLMConfig
 from crawl4ai.extraction_strategy import LLMExtractionStrategy
 
-from misstea.constants import AGENT_MODEL
+from misstea.models import get_model_name
+from misstea.scheduler import Priority, get_scheduler
+from misstea.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+class ScheduledExtractionStrategy(LLMExtractionStrategy):
+    """LLM extraction that takes an LLM scheduler slot only while calling the model.
+
+    The crawl itself (navigation and page loads) doesn't use a slot, so slow pages
+    don't hold up model calls of other agents.
+    """
+
+    async def arun(self, url: str, sections: list[str]) -> list[dict[str, Any]]:
+        """Extract content from the sections of a crawled page.
+
+        Args:
+            url (str): The URL of the page.
+            sections (list[str]): The chunks of the page.
+
+        Returns:
+            list[dict[str, Any]]: The extracted blocks.
+
+        """
+        # The extraction calls a Gemini model, so share its rate limits
+        async with get_scheduler().slot(Priority.INTERACTIVE):
+            return await super().arun(url, sections)
+
+
+@traced()
 async def scrape_generic_webpage_to_json(url: str) -> dict[str, Any] | None:
     """Scrapes a generic webpage using an LLM to extract its main content into a JSON object based on broad instructions.
 
@@ -26,8 +52,10 @@ async def scrape_generic_webpage_to_json(url: str) -> dict[str, Any] | None:
     """
     logger.info(f"Scraping webpage: {url}")
     api_token = os.environ["GOOGLE_API_KEY"]
-    llm_config = LLMConfig(provider=AGENT_MODEL, api_token=api_token)
-    extraction_strategy = LLMExtractionStrategy(
+    llm_config = LLMConfig(
+        provider=get_model_name("web_scraper_extractor"), api_token=api_token
+    )
+    extraction_strategy = ScheduledExtractionStrategy(
         llm_config=llm_config,
         instruction="""
             Extract the comprehensive and detailed content of the entire webpage.
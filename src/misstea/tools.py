@@ -1,187 +1,436 @@
-from typing import Any
+import asyncio
+import logging
+from typing import Any, Dict, List
 
+from google.adk.agents import BaseAgent
+from google.adk.agents.run_config import StreamingMode
 from google.adk.tools import ToolContext
 from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.base_toolset import BaseToolset
 
-from misstea.sub_agents import (
-    calculator_agent,
-    coding_agent,
-    filesystem_agent,
-    github_agent,
-    google_search_agent,
-    image_generator_agent,
-    interactive_blogger_agent,
-    outlook_agent,
-    terraform_agent,
-    web_scraper_agent,
-)
+from misstea.cache import get_cache_ttl, get_response_cache
+from misstea.deadlines import deadline, get_agent_timeout
+from misstea.models import get_model_name
+from misstea.offload import run_in_thread
+from misstea.state import get_state_value, set_state_value
+from misstea.streaming import streaming_to
+from misstea.sub_agents import AGENT_MODULES, get_agent
+from misstea.sub_agents.calculator.evaluator import evaluate_expression
+from misstea.tracing import payload_size, span
+
+logger = logging.getLogger(__name__)
+
+# Agents whose questions can often be answered locally, without a model call
+_LOCAL_EVALUATORS = {"calculator": evaluate_expression}
+
+
+async def _close_toolsets(agent: BaseAgent) -> None:
+    """Close the toolsets of an agent, aborting in-flight MCP requests.
+
+    MCP sessions are re-created the next time the agent uses the toolset.
+
+    Args:
+        agent (BaseAgent): The agent.
+
+    """
+    for tool in getattr(agent, "tools", []):
+        if isinstance(tool, BaseToolset):
+            try:
+                await tool.close()
+            except Exception as e:
+                logger.warning(f"Failed to close toolset of {agent.name}: {e}")
 
 
 async def _call_agent_helper(
-    agent_obj: Any,
     agent_name: str,
     question: str,
     tool_context: ToolContext,
+    state_key: str | None = None,
+    timeout_seconds: float = 0,
 ) -> Any:
     """Call an agent, store its output in tool_context.state, and return the output.
 
+    The agent is resolved from the lazy sub-agent registry, so its module is only
+    imported the first time it is called. Responses from agents with a cache TTL
+    (see `AGENT_CACHE_TTLS`) are served from the response cache when possible.
+    Large outputs are spilled to the blob store, `get_agent_output()` reads them back
+    from the state. Questions a local evaluator can answer (see
+    `_LOCAL_EVALUATORS`) skip the agent, it is only called if evaluation fails.
+
+    If the client of the session streams responses, the events of the agent are
+    streamed to it as they happen (see `misstea.streaming`).
+
+    The call is cancelled once its deadline passes. The deadline propagates to the
+    tools of the agent (see `misstea.deadlines.remaining_time()`) and a structured
+    timeout result is returned instead of the output.
+
     Args:
-        agent_obj: The agent object to call.
         agent_name: The name of the agent.
         question: The question to pass to the agent.
         tool_context: The tool context object.
+        state_key: The key to store the output under. Defaults to `<agent_name>_agent_output`.
+        timeout_seconds: Seconds the call may take. If 0, the agent's configured timeout is used.
 
     Returns:
         The output from the agent.
 
     """
-    agent_tool = AgentTool(agent=agent_obj)
-    agent_output = await agent_tool.run_async(
-        args={"request": question}, tool_context=tool_context
-    )
-    tool_context.state[f"{agent_name}_agent_output"] = agent_output
+    state_key = state_key or f"{agent_name}_agent_output"
+    with span(
+        f"{agent_name}_agent", "agent", input_bytes=payload_size(question)
+    ) as agent_span:
+        if evaluator := _LOCAL_EVALUATORS.get(agent_name):
+            try:
+                # In a thread, so evaluating a large expression doesn't block other sessions
+                with deadline(
+                    timeout_seconds or get_agent_timeout(agent_name)
+                ) as remaining:
+                    async with asyncio.timeout(remaining):
+                        agent_output = await run_in_thread(evaluator, question)
+            except (ValueError, TimeoutError) as e:
+                logger.debug(f"Falling back to {agent_name} agent: {e!r}")
+            else:
+                agent_span.attributes["local"] = True
+                set_state_value(tool_context.state, state_key, agent_output)
+                return agent_output
+
+        if cache_ttl := get_cache_ttl(agent_name):
+            is_cached, agent_output = get_response_cache().get(agent_name, question)
+            agent_span.attributes["cache_hit"] = is_cached
+            if is_cached:
+                set_state_value(tool_context.state, state_key, agent_output)
+                return agent_output
+
+        agent = get_agent(agent_name)
+        agent_span.attributes["model"] = get_model_name(agent_name)
+        timeout_seconds = timeout_seconds or get_agent_timeout(agent_name)
+        run_config = getattr(tool_context, "run_config", None)
+        is_streaming = (
+            run_config is not None and run_config.streaming_mode == StreamingMode.SSE
+        )
+        try:
+            with (
+                deadline(timeout_seconds) as remaining,
+                streaming_to(tool_context.session.id if is_streaming else None),
+            ):
+                async with asyncio.timeout(remaining):
+                    agent_output = await AgentTool(agent=agent).run_async(
+                        args={"request": question}, tool_context=tool_context
+                    )
+        except TimeoutError:
+            logger.warning(
+                f"Call to {agent_name} agent timed out after {timeout_seconds} seconds."
+            )
+            agent_span.attributes["timeout"] = True
+            await _close_toolsets(agent)
+            agent_output = {
+                "status": "timeout",
+                "agent": agent_name,
+                "timeout_seconds": timeout_seconds,
+                "report": f"The {agent_name} agent did not respond within {timeout_seconds} seconds.",
+            }
+            set_state_value(tool_context.state, state_key, agent_output)
+            return agent_output
+
+        agent_span.attributes["output_bytes"] = payload_size(agent_output)
+        if cache_ttl and agent_output:
+            get_response_cache().set(agent_name, question, agent_output, cache_ttl)
+        set_state_value(tool_context.state, state_key, agent_output)
     return agent_output
 
 
+def get_agent_output(state_key: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """Tool to read the full output of an earlier agent call, e.g. one made by call_agents_parallel.
+
+    Args:
+        state_key (str): The state key of the call, `<agent>_agent_output` or the `state_key` returned by call_agents_parallel.
+        tool_context (ToolContext): The tool context object.
+
+    Returns:
+        Dict[str, Any]: The status and the output.
+
+    """
+    if state_key not in tool_context.state:
+        return {
+            "status": "failure",
+            "report": f"No agent output stored as {state_key}.",
+        }
+    return {
+        "status": "success",
+        "output": get_state_value(tool_context.state, state_key),
+    }
+
+
 async def call_calculator_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
-    """Tool to call Calculator agent.
+    """Tool to call Calculator agent. Plain mathematical expressions are evaluated locally, which is much faster.
+
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
 
     Returns:
         Any: The output from the Calculator agent.
 
     """
     return await _call_agent_helper(
-        calculator_agent, "calculator", question, tool_context
+        "calculator", question, tool_context, timeout_seconds=timeout_seconds
     )
 
 
 async def call_coding_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Coding agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Coding agent.
 
     """
-    return await _call_agent_helper(coding_agent, "coding", question, tool_context)
+    return await _call_agent_helper(
+        "coding", question, tool_context, timeout_seconds=timeout_seconds
+    )
 
 
 async def call_filesystem_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Filesystem agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Filesystem agent.
 
     """
     return await _call_agent_helper(
-        filesystem_agent, "filesystem", question, tool_context
+        "filesystem", question, tool_context, timeout_seconds=timeout_seconds
     )
 
 
 async def call_github_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call GitHub agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the GitHub agent.
 
     """
-    return await _call_agent_helper(github_agent, "github", question, tool_context)
+    return await _call_agent_helper(
+        "github", question, tool_context, timeout_seconds=timeout_seconds
+    )
 
 
 async def call_google_search_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Google Search agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Google Search agent.
 
     """
     return await _call_agent_helper(
-        google_search_agent, "google_search", question, tool_context
+        "google_search", question, tool_context, timeout_seconds=timeout_seconds
     )
 
 
 async def call_image_generator_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Image Generator agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Image Generator agent.
 
     """
     return await _call_agent_helper(
-        image_generator_agent, "image_generator", question, tool_context
+        "image_generator", question, tool_context, timeout_seconds=timeout_seconds
     )
 
 
 async def call_interactive_blogger_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call interactive_blogger_agent agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the interactive_blogger_agent agent.
 
     """
     return await _call_agent_helper(
-        interactive_blogger_agent, "interactive_blogger", question, tool_context
+        "interactive_blogger", question, tool_context, timeout_seconds=timeout_seconds
     )
 
 
 async def call_outlook_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Outlook agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Outlook agent.
 
     """
-    return await _call_agent_helper(outlook_agent, "outlook", question, tool_context)
+    return await _call_agent_helper(
+        "outlook", question, tool_context, timeout_seconds=timeout_seconds
+    )
 
 
 async def call_terraform_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Terraform agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Terraform agent.
 
     """
     return await _call_agent_helper(
-        terraform_agent, "terraform", question, tool_context
+        "terraform", question, tool_context, timeout_seconds=timeout_seconds
     )
 
 
 async def call_web_scraper_agent(
     question: str,
     tool_context: ToolContext,
+    timeout_seconds: int = 0,
 ) -> Any:
     """Tool to call Web Scraper agent.
 
+    Args:
+        question (str): The question to pass to the agent.
+        tool_context (ToolContext): The tool context object.
+        timeout_seconds (int): Seconds to wait for the agent before giving up. If 0, the agent's default timeout is used.
+
     Returns:
         Any: The output from the Web Scraper agent.
 
     """
     return await _call_agent_helper(
-        web_scraper_agent, "web_scraper", question, tool_context
+        "web_scraper", question, tool_context, timeout_seconds=timeout_seconds
+    )
+
+
+async def call_agents_parallel(
+    requests: List[Dict[str, str]],
+    tool_context: ToolContext,
+) -> Dict[str, Any]:
+    """Tool to call several agents concurrently. Use this when a question needs information from more than one agent and the calls do not depend on each other.
+
+    Args:
+        requests (List[Dict[str, str]]): One item per call, each with an "agent" key (one of calculator, coding, filesystem, github, google_search, image_generator, interactive_blogger, outlook, terraform, web_scraper) and a "question" key. An optional "timeout_seconds" key overrides the agent's default timeout.
+        tool_context (ToolContext): The tool context object.
+
+    Returns:
+        Dict[str, Any]: The status and output of every call, in the order requested. The status is "partial" if only some calls failed.
+
+    """
+    invalid = [x for x in requests if x.get("agent") not in AGENT_MODULES]
+    if invalid:
+        return {
+            "status": "failure",
+            "report": f"Unknown agents requested: {invalid}. Must be one of {', '.join(AGENT_MODULES)}.",
+        }
+
+    # Give repeated agents their own state key so concurrent outputs don't overwrite each other
+    agent_names = [x["agent"] for x in requests]
+    state_keys = [
+        f"{name}_agent_output"
+        if agent_names.count(name) == 1
+        else f"{name}_agent_output_{agent_names[:i].count(name)}"
+        for i, name in enumerate(agent_names)
+    ]
+
+    outputs = await asyncio.gather(
+        *[
+            _call_agent_helper(
+                x["agent"],
+                x.get("question", ""),
+                tool_context,
+                state_key=state_key,
+                timeout_seconds=float(x.get("timeout_seconds") or 0),
+            )
+            for x, state_key in zip(requests, state_keys, strict=True)
+        ],
+        return_exceptions=True,
+    )
+
+    results = []
+    for request, state_key, output in zip(requests, state_keys, outputs, strict=True):
+        result = {
+            "agent": request["agent"],
+            "question": request.get("question", ""),
+            "state_key": state_key,
+        }
+        if isinstance(output, BaseException):
+            logger.error(f"Call to {request['agent']} agent failed: {output}")
+            result.update({"status": "failure", "error": str(output)})
+        else:
+            result.update({"status": "success", "output": output})
+        results.append(result)
+
+    failed = sum(x["status"] == "failure" for x in results)
+    status = (
+        "success" if not failed else "failure" if failed == len(results) else "partial"
     )
+    return {"status": status, "results": results}
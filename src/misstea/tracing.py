@@ -0,0 +1,462 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from misstea.constants import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+TRACE_PATH = Path(os.getenv("MISSTEA_TRACE_PATH", CACHE_DIR / "traces.jsonl"))
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "misstea_current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """A timed unit of work, e.g. a sub-agent call, tool call or model call."""
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _start_counter: float = field(default_factory=time.perf_counter, repr=False)
+
+    def end(self, status: str | None = None) -> None:
+        """End the span and export it.
+
+        Args:
+            status (str | None): Overrides the status of the span, e.g. "error".
+
+        """
+        self.duration_ms = (time.perf_counter() - self._start_counter) * 1000
+        if status:
+            self.status = status
+        if exporter := get_exporter():
+            exporter.on_end(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the span as a JSON serialisable dict.
+
+        Returns:
+            Dict[str, Any]: The span.
+
+        """
+        data = asdict(self)
+        data.pop("_start_counter")
+        return data
+
+
+class JsonlExporter:
+    """Append finished spans to a JSONL file."""
+
+    def __init__(self, path: Path):
+        """Initialise a JSONL exporter.
+
+        Args:
+            path (Path): The file to append spans to.
+
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = path.open("a")
+
+    def on_start(self, span: Span) -> None:
+        """Do nothing, spans are only written once they end."""
+
+    def on_end(self, span: Span) -> None:
+        """Write a finished span."""
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+class OpenTelemetryExporter:
+    """Mirror spans to the globally configured OpenTelemetry tracer provider."""
+
+    def __init__(self):
+        """Initialise an OpenTelemetry exporter."""
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("misstea")
+        self._otel_spans: Dict[str, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        """Start the matching OpenTelemetry span."""
+        parent = self._otel_spans.get(span.parent_id or "")
+        self._otel_spans[span.span_id] = self._tracer.start_span(
+            span.name,
+            context=self._trace.set_span_in_context(parent) if parent else None,
+            start_time=int(span.start_time * 1e9),
+        )
+
+    def on_end(self, span: Span) -> None:
+        """Copy the attributes to and end the matching OpenTelemetry span."""
+        otel_span = self._otel_spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attribute("misstea.kind", span.kind)
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(f"misstea.{key}", value)
+        if span.status != "ok":
+            otel_span.set_status(self._trace.StatusCode.ERROR)
+        otel_span.end()
+
+
+@cache
+def get_exporter() -> JsonlExporter | OpenTelemetryExporter | None:
+    """Return the span exporter selected by the `MISSTEA_TRACE` environment variable.
+
+    `MISSTEA_TRACE` can be "jsonl" (spans are appended to `MISSTEA_TRACE_PATH`),
+    "otel" (spans are sent to the configured OpenTelemetry tracer provider) or
+    unset to disable tracing.
+
+    Returns:
+        JsonlExporter | OpenTelemetryExporter | None: The exporter, None if tracing is disabled.
+
+    Raises:
+        ValueError: If `MISSTEA_TRACE` is not a known exporter.
+
+    """
+    exporter = os.getenv("MISSTEA_TRACE", "").lower()
+    if exporter in ["", "off"]:
+        return None
+    elif exporter == "jsonl":
+        return JsonlExporter(TRACE_PATH)
+    elif exporter == "otel":
+        return OpenTelemetryExporter()
+    raise ValueError(
+        f"MISSTEA_TRACE must be 'jsonl', 'otel' or 'off'. Got `{exporter}`."
+    )
+
+
+def start_span(name: str, kind: str, **attributes: Any) -> Span:
+    """Start a span as a child of the current span.
+
+    Args:
+        name (str): The name of the span, e.g. the agent or tool name.
+        kind (str): The kind of span, e.g. "agent", "tool", "model" or "function".
+        **attributes (Any): Attributes to record on the span.
+
+    Returns:
+        Span: The started span, call `end()` to finish it.
+
+    """
+    parent = _current_span.get()
+    span = Span(
+        name=name,
+        kind=kind,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    if exporter := get_exporter():
+        exporter.on_start(span)
+    return span
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+    """Trace a block of code, spans started within the block are nested under it.
+
+    Args:
+        name (str): The name of the span.
+        kind (str): The kind of span.
+        **attributes (Any): Attributes to record on the span.
+
+    Yields:
+        Span: The span, attributes can be added while the block runs.
+
+    """
+    current = start_span(name, kind, **attributes)
+    previous = _current_span.get()
+    _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = repr(e)
+        current.end(status="error")
+        raise
+    else:
+        current.end()
+    finally:
+        _current_span.set(previous)
+
+
+def payload_size(value: Any) -> int:
+    """Return the size of a payload in bytes when serialised as JSON.
+
+    Args:
+        value (Any): The payload.
+
+    Returns:
+        int: The size in bytes.
+
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+def traced(
+    kind: str = "function",
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Trace every call to a sync or async function.
+
+    Args:
+        kind (str): The kind of span.
+
+    Returns:
+        Callable: The decorator.
+
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(func.__name__, kind) as s:
+                    result = await func(*args, **kwargs)
+                    s.attributes["output_bytes"] = payload_size(result)
+                    return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(func.__name__, kind) as s:
+                result = func(*args, **kwargs)
+                s.attributes["output_bytes"] = payload_size(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class TracingPlugin(BasePlugin):
+    """ADK plugin that traces every turn, model call and tool call.
+
+    Plugins are propagated to the runners of sub-agents called via AgentTool, so
+    model and tool calls made by sub-agents are nested under the tool call that
+    invoked them.
+    """
+
+    def __init__(self):
+        """Initialise the tracing plugin."""
+        super().__init__(name="misstea_tracing")
+        self._spans: Dict[Any, Span] = {}
+        self._previous: Dict[Any, Optional[Span]] = {}
+
+    def _enter(self, key: Any, current: Span) -> None:
+        self._spans[key] = current
+        self._previous[key] = _current_span.get()
+        _current_span.set(current)
+
+    def _exit(self, key: Any, status: str | None = None) -> Optional[Span]:
+        current = self._spans.pop(key, None)
+        if current is not None:
+            current.end(status=status)
+            _current_span.set(self._previous.pop(key, None))
+        return current
+
+    def _discard(self, invocation_id: str) -> None:
+        # End the spans of a turn that were never ended, e.g. when it was cancelled
+        for key in [x for x in list(self._spans) if x[1] == invocation_id]:
+            self._previous.pop(key, None)
+            if current := self._spans.pop(key, None):
+                current.end(status="cancelled")
+
+    async def before_run_callback(self, *, invocation_context: Any) -> None:
+        """Start a span for the turn."""
+        # after_run_callback isn't called if the turn fails or is cancelled
+        weakref.finalize(
+            invocation_context, self._discard, invocation_context.invocation_id
+        )
+        self._enter(
+            ("run", invocation_context.invocation_id),
+            start_span(
+                invocation_context.agent.name,
+                "turn",
+                invocation_id=invocation_context.invocation_id,
+                session_id=invocation_context.session.id,
+            ),
+        )
+
+    async def after_run_callback(self, *, invocation_context: Any) -> None:
+        """End the span for the turn."""
+        self._exit(("run", invocation_context.invocation_id))
+        self._discard(invocation_context.invocation_id)
+
+    async def before_model_callback(
+        self, *, callback_context: Any, llm_request: Any
+    ) -> None:
+        """Start a span for a model call."""
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        self._spans[key] = start_span(
+            llm_request.model or "model",
+            "model",
+            agent_name=callback_context.agent_name,
+            input_bytes=sum(
+                payload_size(p.text or "")
+                for c in llm_request.contents
+                for p in c.parts or []
+            ),
+        )
+
+    async def after_model_callback(
+        self, *, callback_context: Any, llm_response: Any
+    ) -> None:
+        """Record token counts and end the span for a model call."""
+        if llm_response.partial:
+            return
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        if (current := self._spans.pop(key, None)) is None:
+            return
+        if usage := llm_response.usage_metadata:
+            current.attributes.update(
+                {
+                    "prompt_tokens": usage.prompt_token_count or 0,
+                    "output_tokens": usage.candidates_token_count or 0,
+                    "total_tokens": usage.total_token_count or 0,
+                }
+            )
+        if llm_response.model_version:
+            # The model version that actually served the request, e.g. a dated release
+            current.attributes["model_version"] = llm_response.model_version
+        if llm_response.content:
+            current.attributes["output_bytes"] = sum(
+                payload_size(p.text or "") for p in llm_response.content.parts or []
+            )
+        current.end()
+
+    async def on_model_error_callback(
+        self,
+        *,
+        callback_context: Any,
+        llm_request: Any,  # noqa: ARG002
+        error: Exception,
+    ) -> None:
+        """End the span for a failed model call."""
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        if current := self._spans.pop(key, None):
+            current.attributes["error"] = repr(error)
+            current.end(status="error")
+
+    async def before_tool_callback(
+        self, *, tool: Any, tool_args: Dict[str, Any], tool_context: Any
+    ) -> None:
+        """Start a span for a tool call."""
+        self._enter(
+            ("tool", tool_context.invocation_id, tool_context.function_call_id),
+            start_span(
+                tool.name,
+                "tool",
+                agent_name=tool_context.agent_name,
+                input_bytes=payload_size(tool_args),
+            ),
+        )
+
+    async def after_tool_callback(
+        self,
+        *,
+        tool: Any,  # noqa: ARG002
+        tool_args: Dict[str, Any],  # noqa: ARG002
+        tool_context: Any,
+        result: Any,
+    ) -> None:
+        """End the span for a tool call."""
+        key = ("tool", tool_context.invocation_id, tool_context.function_call_id)
+        if current := self._spans.get(key):
+            current.attributes["output_bytes"] = payload_size(result)
+        self._exit(key)
+
+    async def on_tool_error_callback(
+        self,
+        *,
+        tool: Any,  # noqa: ARG002
+        tool_args: Dict[str, Any],  # noqa: ARG002
+        tool_context: Any,
+        error: Exception,
+    ) -> None:
+        """End the span for a failed tool call."""
+        key = ("tool", tool_context.invocation_id, tool_context.function_call_id)
+        if current := self._spans.get(key):
+            current.attributes["error"] = repr(error)
+        self._exit(key, status="error")
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(percentile * (len(ordered) - 1)))]
+
+
+def summarize_traces(path: Path = TRACE_PATH) -> Dict[str, List[Dict[str, Any]]]:
+    """Summarise the latency and token usage of traced spans.
+
+    Args:
+        path (Path): A JSONL file written by the JSONL exporter.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: For every kind of span, one row per span name with count, p50, p95 and max latency and total tokens. Empty if nothing was traced yet.
+
+    """
+    if not path.exists():
+        return {}
+    durations: Dict[tuple[str, str], List[float]] = defaultdict(list)
+    tokens: Dict[tuple[str, str], int] = defaultdict(int)
+    errors: Dict[tuple[str, str], int] = defaultdict(int)
+    with path.open() as f:
+        for line in f:
+            record = json.loads(line)
+            # Model spans are grouped by the agent that called the model
+            name = (
+                f"{record['attributes'].get('agent_name')} ({record['name']})"
+                if record["kind"] == "model"
+                else record["name"]
+            )
+            key = (record["kind"], name)
+            durations[key].append(record["duration_ms"])
+            tokens[key] += record["attributes"].get("total_tokens", 0)
+            errors[key] += record["status"] != "ok"
+
+    summary: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for (kind, name), values in sorted(durations.items()):
+        summary[kind].append(
+            {
+                "name": name,
+                "count": len(values),
+                "errors": errors[kind, name],
+                "p50_ms": round(_percentile(values, 0.5), 1),
+                "p95_ms": round(_percentile(values, 0.95), 1),
+                "max_ms": round(max(values), 1),
+                "total_tokens": tokens[kind, name],
+            }
+        )
+    return dict(summary)
@@ -0,0 +1,114 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Iterator, List
+
+import pytest
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+from pydantic import Field
+
+from misstea.sub_agents import get_agent
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+BENCHMARKED_SUB_AGENTS = ["calculator", "coding", "interactive_blogger"]
+
+
+class StubLlm(BaseLlm):
+    """Deterministic local model that replays a scripted trajectory.
+
+    Each step of the script is either `{"call": <tool name>, "args": {...}}` or
+    `{"text": ...}`. The step is chosen by the number of tool responses since the
+    last user message, so the same script serves every turn and every session.
+    """
+
+    model: str = "gemini-2.5-flash"
+    script: List[Dict[str, Any]] = Field(default_factory=lambda: [{"text": "Done."}])
+    model_calls: int = 0
+    tool_calls: int = 0
+
+    async def generate_content_async(  # noqa: D102
+        self,
+        llm_request,
+        stream=False,  # noqa: ARG002
+    ) -> AsyncGenerator[LlmResponse, None]:
+        step = 0
+        for content in reversed(llm_request.contents):
+            parts = content.parts or []
+            if content.role == "user" and any(p.text for p in parts):
+                break
+            step += sum(1 for p in parts if p.function_response)
+
+        action = self.script[min(step, len(self.script) - 1)]
+        self.model_calls += 1
+        if "call" in action:
+            self.tool_calls += 1
+            part = types.Part.from_function_call(
+                name=action["call"], args=action.get("args", {})
+            )
+        else:
+            part = types.Part.from_text(text=action["text"])
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=100, candidates_token_count=10, total_token_count=110
+            ),
+        )
+
+
+def iter_llm_agents(agent: BaseAgent) -> Iterator[LlmAgent]:
+    """Yield an agent and all its descendants that call a model.
+
+    Yields:
+        LlmAgent: The agents with a model.
+
+    """
+    if isinstance(agent, LlmAgent):
+        yield agent
+    for sub_agent in agent.sub_agents:
+        yield from iter_llm_agents(sub_agent)
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    # Replaces the model of the root agent and its sub-agents with a `StubLlm`. Scripts
+    # are keyed by agent name ("root" for the root agent), agents without a script
+    # answer "Done.". The stubs are returned keyed the same way.
+    from misstea.agent import root_agent
+
+    def apply(scripts: Dict[str, List[Dict[str, Any]]]) -> Dict[str, StubLlm]:
+        stubs = {}
+        # MCP backed agents are left out, listing their tools starts a server
+        agents = [root_agent] + [get_agent(x) for x in BENCHMARKED_SUB_AGENTS]
+        for agent in agents:
+            for llm_agent in iter_llm_agents(agent):
+                name = "root" if llm_agent is root_agent else llm_agent.name
+                stub = StubLlm(script=scripts.get(name, [{"text": "Done."}]))
+                monkeypatch.setattr(llm_agent, "model", stub)
+                stubs[name] = stub
+        return stubs
+
+    return apply
+
+
+@pytest.fixture(scope="session")
+def baselines() -> Iterator[Dict[str, Dict[str, float]]]:
+    # Results are written back as the new baselines if MISSTEA_UPDATE_BASELINES is set
+    results = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    yield results
+    if os.getenv("MISSTEA_UPDATE_BASELINES"):
+        BASELINES_PATH.write_text(json.dumps(results, indent=4, sort_keys=True) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    results = [
+        (name, value)
+        for report in terminalreporter.getreports("passed")
+        + terminalreporter.getreports("failed")
+        for name, value in report.user_properties
+    ]
+    if results:
+        terminalreporter.section("benchmarks")
+        for name, value in sorted(results):
+            terminalreporter.write_line(f"{name}: {value}")
@@ -0,0 +1,197 @@
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+import pytest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+REPEATS = 20
+TOLERANCE = float(os.getenv("MISSTEA_BENCHMARK_TOLERANCE", 3))
+# Timings and memory depend on the machine, so are only checked by `make benchmark`
+CHECK_PERFORMANCE = bool(
+    os.getenv("MISSTEA_BENCHMARK_PERFORMANCE") or os.getenv("MISSTEA_UPDATE_BASELINES")
+)
+
+
+@pytest.fixture
+def runner():
+    from misstea.agent import app
+
+    return InMemoryRunner(app=app)
+
+
+async def run_turn(runner: InMemoryRunner, question: str) -> int:
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="benchmark"
+    )
+    events = 0
+    async for _ in runner.run_async(
+        user_id="benchmark",
+        session_id=session.id,
+        new_message=types.Content(
+            role="user", parts=[types.Part.from_text(text=question)]
+        ),
+    ):
+        events += 1
+    return events
+
+
+async def benchmark(
+    runner: InMemoryRunner, question: str, stubs: Dict
+) -> Dict[str, Any]:
+    # Warm up, so lazy imports and caches aren't measured
+    await run_turn(runner, question)
+    for stub in stubs.values():
+        stub.model_calls = stub.tool_calls = 0
+
+    tracemalloc.start()
+    events = await run_turn(runner, question)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    model_calls = sum(x.model_calls for x in stubs.values())
+    tool_calls = sum(x.tool_calls for x in stubs.values())
+
+    result = {
+        "events": events,
+        "model_calls": model_calls,
+        "tool_calls": tool_calls,
+        "peak_kb": round(peak / 1024),
+    }
+    if not CHECK_PERFORMANCE:
+        return result
+
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await run_turn(runner, question)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        **result,
+        "turn_p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "turn_p95_ms": round(timings[int(len(timings) * 0.95)] * 1000, 2),
+    }
+
+
+@pytest.fixture
+def check_baseline(baselines, record_property) -> Callable[[str, Dict[str, Any]], None]:
+    def check(name: str, result: Dict[str, Any]) -> None:
+        # Shown in the terminal summary, see conftest.py
+        record_property(name, result)
+        if os.getenv("MISSTEA_UPDATE_BASELINES"):
+            baselines[name] = result
+            return
+
+        baseline = baselines.get(name)
+        if baseline is None:
+            pytest.fail(f"No baseline for {name}, run with MISSTEA_UPDATE_BASELINES=1.")
+        for key in ["events", "model_calls", "tool_calls"]:
+            assert result[key] == baseline[key], f"{key} changed from {baseline[key]}."
+        if CHECK_PERFORMANCE:
+            assert result["turn_p50_ms"] <= baseline["turn_p50_ms"] * TOLERANCE + 10
+            assert result["peak_kb"] <= baseline["peak_kb"] * 1.5 + 256
+
+    return check
+
+
+@pytest.mark.asyncio
+async def test_calculator_fast_path(runner, stub_models, check_baseline):
+    stubs = stub_models(
+        {
+            "root": [
+                {"call": "call_calculator_agent", "args": {"question": "2 + 2"}},
+                {"text": "4"},
+            ]
+        }
+    )
+    result = await benchmark(runner, "What is 2 + 2?", stubs)
+    assert stubs["calculator_agent"].model_calls == 0
+    check_baseline("calculator_fast_path", result)
+
+
+@pytest.mark.asyncio
+async def test_calculator_agent(runner, stub_models, check_baseline):
+    question = "How many seconds are there in a leap year?"
+    stubs = stub_models(
+        {
+            "root": [
+                {"call": "call_calculator_agent", "args": {"question": question}},
+                {"text": "31622400"},
+            ],
+            "calculator_agent": [{"text": "31622400"}],
+        }
+    )
+    result = await benchmark(runner, question, stubs)
+    check_baseline("calculator_agent", result)
+
+
+@pytest.mark.asyncio
+async def test_coding_agent(runner, stub_models, check_baseline, tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("# Notes\n\nMrs Doyle makes the tea.\n" * 100)
+    question = f"Summarise {path}"
+    stubs = stub_models(
+        {
+            "root": [
+                {"call": "call_coding_agent", "args": {"question": question}},
+                {"text": "Mrs Doyle makes the tea."},
+            ],
+            "coding_agent": [
+                {"call": "read_file", "args": {"file_path": str(path)}},
+                {"text": "Mrs Doyle makes the tea."},
+            ],
+        }
+    )
+    result = await benchmark(runner, question, stubs)
+    check_baseline("coding_agent", result)
+
+
+@pytest.mark.asyncio
+async def test_agents_parallel(runner, stub_models, check_baseline, tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("Mrs Doyle makes the tea.\n")
+    requests = [
+        {"agent": "calculator", "question": "How many cups of tea in a year?"},
+        {"agent": "calculator", "question": "1 + 1"},
+        {"agent": "coding", "question": f"Read {path}"},
+    ]
+    stubs = stub_models(
+        {
+            "root": [
+                {"call": "call_agents_parallel", "args": {"requests": requests}},
+                {"text": "Done."},
+            ],
+            "coding_agent": [
+                {"call": "read_file", "args": {"file_path": str(path)}},
+                {"text": "Mrs Doyle makes the tea."},
+            ],
+        }
+    )
+    result = await benchmark(runner, "Tea and sums", stubs)
+    check_baseline("agents_parallel", result)
+
+
+@pytest.mark.parametrize("stage", ["robust_blog_planner", "robust_blog_writer"])
+@pytest.mark.asyncio
+async def test_interactive_blogger(runner, stub_models, check_baseline, stage):
+    question = "Write a blog post about making tea."
+    stubs = stub_models(
+        {
+            "root": [
+                {
+                    "call": "call_interactive_blogger_agent",
+                    "args": {"question": question},
+                },
+                {"text": "Here you go."},
+            ],
+            "interactive_blogger_agent": [
+                {"call": "transfer_to_agent", "args": {"agent_name": stage}},
+            ],
+            "blog_planner": [{"text": "# Making tea\n\n1. Boil the kettle"}],
+            "blog_writer": [{"text": "# Making tea\n\nFirst, boil the kettle."}],
+        }
+    )
+    result = await benchmark(runner, question, stubs)
+    check_baseline(f"interactive_blogger_{stage}", result)
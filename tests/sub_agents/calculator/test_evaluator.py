@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from misstea.sub_agents.calculator.evaluator import evaluate_expression
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("2+2", "4"),
+        ("What is 2 + 2?", "4"),
+        ("Calculate: 2^10", "1024"),
+        ("0.1 + 0.2", "0.3"),
+        ("10 / 4", "2.5"),
+        ("7 // 2", "3"),
+        ("-7 % 3", "2"),
+        ("1 / 3", "0." + "3" * 50),
+        ("factorial(25)", "15511210043330985984000000"),
+        ("2 ** 200", str(2**200)),
+        ("factorial(60)", str(math.factorial(60))),
+        ("factorial(100) // factorial(98)", "9900"),
+        ("10 ** 60 + 1 - 10 ** 60", "1"),
+        ("2 ** -2", "0.25"),
+        ("10 ** 100 * 1.5", "1.5E+100"),
+        ("10 ** 5000", "1E+5000"),
+        ("10 ** 3000 * 10 ** 3000", "1E+6000"),
+        ("(10 ** 4000 + 1) * 10 ** 4000 - 10 ** 8000", "0"),
+        ("7 // -2", "-4"),
+        ("-7 % -3", "-1"),
+        ("7 % -3", "-2"),
+        ("-7.5 // 2", "-4"),
+        ("-7.5 % 2", "0.5"),
+        ("7 % 2.5", "2"),
+        ("[-7, 7] // 2", "[-4, 3]"),
+        ("sqrt(16)", "4"),
+        ("log(8, 2)", "3"),
+        ("round(pi, 5)", "3.14159"),
+        ("round(2.5)", "3"),
+        ("round(-2.5)", "-3"),
+        ("round(2.675, 2)", "2.68"),
+        ("round([0.5, 1.5, 2.5])", "[1, 2, 3]"),
+        ("gcd(12, 18)", "6"),
+        ("lcm(4, 6.0)", "12"),
+        ("max(3, 7, 5)", "7"),
+        ("mean([1, 2, 3, 4])", "2.5"),
+        ("median(1, 5, 3)", "3"),
+        ("sum(range(1, 101))", "5050"),
+        ("count(range(0, 1, 0.25))", "4"),
+        ("sqrt([1, 4, 9])", "[1, 2, 3]"),
+        ("[1, 2, 3] * 2 + 1", "[3, 5, 7]"),
+    ],
+)
+def test_evaluate_expression(expression, expected):
+    assert evaluate_expression(expression) == expected
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "",
+        "How tall is Mount Everest?",
+        "__import__('os').system('ls')",
+        "x + 1",
+        "(1).__class__",
+        "2 ** 100000",
+        "1 / 0",
+        "sqrt(-1)",
+        "range(10 ** 9)",
+        "range(10 ** 6)",
+        "1 +" * 1000 + "1",
+        "-" * 998 + "1",
+        "(" * 400 + "1" + ")" * 400,
+    ],
+)
+def test_evaluate_expression_unsupported(expression):
+    with pytest.raises(ValueError, match=r"Unsupported|Unknown|Unable|too"):
+        evaluate_expression(expression)
+
+
+@pytest.mark.parametrize("expression", ["gcd(4.5, 3)", "lcm(2, 0.5)"])
+def test_evaluate_expression_non_integers(expression):
+    with pytest.raises(ValueError, match="integers"):
+        evaluate_expression(expression)
@@ -0,0 +1,306 @@
+import json
+import threading
+
+import duckdb
+import pytest
+
+from misstea.sub_agents.coding import tools
+from misstea.sub_agents.coding.database import get_connection
+from misstea.sub_agents.coding.index import CodeIndex
+from misstea.sub_agents.coding.tools import (
+    apply_edits,
+    list_directory_contents,
+    profile_dataset,
+    query_files,
+    read_directory,
+    read_file,
+    search_code,
+)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for path in ["a.py", "b.txt", "node_modules/x.js", "src/c.py", "src/d/e.py"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("print('hello')")
+    return tmp_path
+
+
+def test_list_directory_contents(repo):
+    result = json.loads(list_directory_contents(str(repo)))
+    assert result["entries"] == [
+        "a.py",
+        "b.txt",
+        "src/",
+        "src/c.py",
+        "src/d/",
+        "src/d/e.py",
+    ]
+    assert result["next_cursor"] is None
+
+    result = json.loads(
+        list_directory_contents(str(repo), type_filter="files", pattern="*.py")
+    )
+    assert result["entries"] == ["a.py", "src/c.py", "src/d/e.py"]
+
+    result = json.loads(
+        list_directory_contents(
+            str(repo), include_subdirectories="no", include_details="yes"
+        )
+    )
+    assert [x["path"] for x in result["entries"]] == ["a.py", "b.txt", "src/"]
+    assert result["entries"][0]["size"] == 14
+
+
+def test_list_directory_contents_pages(repo, monkeypatch):
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        result = json.loads(list_directory_contents(str(repo), limit=4, cursor=cursor))
+        pages.append(result["entries"])
+        cursor = result["next_cursor"]
+    assert pages == [["a.py", "b.txt", "src/", "src/c.py"], ["src/d/", "src/d/e.py"]]
+
+    # Out of range limits are clamped
+    for limit in [0, -1, 10**6]:
+        result = json.loads(list_directory_contents(str(repo), limit=limit))
+        assert len(result["entries"]) == 6
+        assert result["next_cursor"] is None
+    monkeypatch.setattr(tools, "LIST_DIRECTORY_LIMIT", 2)
+    result = json.loads(list_directory_contents(str(repo), limit=4))
+    assert result["entries"] == ["a.py", "b.txt"]
+
+
+def test_list_directory_contents_invalid(tmp_path):
+    with pytest.raises(ValueError, match="type_filter"):
+        list_directory_contents(str(tmp_path), type_filter="links")
+    result = json.loads(list_directory_contents(str(tmp_path / "missing")))
+    assert result["status"] == "failure"
+
+
+def test_read_directory(repo):
+    (repo / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(100))
+    (repo / "big.txt").write_text("x" * 1000)
+
+    result = json.loads(read_directory(str(repo)))
+    assert result["status"] == "success"
+    assert list(result["files"]) == [
+        "a.py",
+        "b.txt",
+        "big.txt",
+        "src/c.py",
+        "src/d/e.py",
+    ]
+    assert result["truncated"] == []
+    assert result["skipped"] == 1
+
+    result = json.loads(read_directory(str(repo), pattern="*.txt", max_bytes=100))
+    assert result["files"]["b.txt"] == "print('hello')"
+    assert result["files"]["big.txt"] == "x" * 86
+    assert result["truncated"] == ["big.txt"]
+
+    # Negative budgets use the default instead of reading whole files
+    result = json.loads(read_directory(str(repo), pattern="*.txt", max_bytes=-1))
+    assert result["files"]["big.txt"] == "x" * 1000
+    assert result["truncated"] == []
+
+    result = json.loads(read_directory(str(repo / "missing")))
+    assert result["status"] == "failure"
+
+
+def test_read_file(tmp_path):
+    (tmp_path / "a.txt").write_text("héllo wörld", encoding="latin-1")
+    (tmp_path / "b.json").write_text('{"a": "é"}')
+    (tmp_path / "c.yml").write_text("a: [1, 2]")
+    (tmp_path / "d.json").write_bytes(b'\xef\xbb\xbf{"a": 1}')
+    (tmp_path / "e.txt").write_bytes(b"\xef\xbb\xbfhello")
+
+    assert read_file(str(tmp_path / "a.txt")) == "héllo wörld"
+    assert read_file(str(tmp_path / "a.txt"), encoding="latin-1") == "héllo wörld"
+    assert read_file(str(tmp_path / "a.txt"), encoding="utf-8") is None
+    assert read_file(str(tmp_path / "b.json")) == {"a": "é"}
+    assert read_file(str(tmp_path / "c.yml")) == {"a": [1, 2]}
+    assert read_file(str(tmp_path / "d.json")) == {"a": 1}
+    assert read_file(str(tmp_path / "e.txt")) == "hello"
+    assert read_file(str(tmp_path / "missing.txt")) is None
+
+
+@pytest.fixture
+def parquet_file(tmp_path):
+    path = tmp_path / "data.parquet"
+    duckdb.sql(
+        "SELECT range AS id, 'name ' || range AS name, range % 3 AS category "
+        "FROM range(1000)"
+    ).write_parquet(str(path))
+    return path
+
+
+def test_read_file_parquet(parquet_file):
+    result = read_file(str(parquet_file))
+    assert result["num_rows"] == 1000
+    assert list(result["columns"]) == ["id", "name", "category"]
+    assert len(result["columns"]["id"]) == 100
+
+    result = read_file(
+        str(parquet_file), columns="id, name", where="category = 1", limit=2, offset=1
+    )
+    assert result["columns"] == {"id": [4, 7], "name": ["name 4", "name 7"]}
+
+    result = read_file(str(parquet_file), schema_only="yes")
+    assert result == {
+        "num_rows": 1000,
+        "schema": {"id": "BIGINT", "name": "VARCHAR", "category": "BIGINT"},
+    }
+
+    assert read_file(str(parquet_file), where="1 = 1; DROP TABLE x") is None
+
+
+def test_query_files(tmp_path, monkeypatch):
+    (tmp_path / "a.csv").write_text("client,amount\na,1\nb,2\n")
+    (tmp_path / "b.csv").write_text("client,amount\na,3\n")
+
+    files = f"read_csv('{tmp_path}/*.csv')"
+    result = json.loads(
+        query_files(
+            f"SELECT client, sum(amount) AS total FROM {files} GROUP BY 1 ORDER BY 1"  # noqa: S608
+        )
+    )
+    assert result == {
+        "status": "success",
+        "columns": ["client", "total"],
+        "rows": [["a", 4], ["b", 2]],
+        "truncated": False,
+    }
+
+    result = json.loads(query_files("SELECT * FROM range(10)", max_rows=3))
+    assert result["rows"] == [[0], [1], [2]]
+    assert result["truncated"]
+
+    # Each row is 3 bytes of JSON
+    monkeypatch.setattr(tools, "QUERY_FILES_MAX_BYTES", 10)
+    result = json.loads(query_files("SELECT * FROM range(10)"))
+    assert result["rows"] == [[0], [1], [2]]
+    assert result["truncated"]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "COPY (SELECT 1) TO 'out.csv'",
+        "SELECT 1; SELECT 2",
+        "CREATE TABLE x AS SELECT 1",
+        "SELEC 1",
+        "ATTACH 'other.db'",
+        "INSTALL httpfs",
+        "SET autoload_known_extensions = true",
+        # Extensions are not loaded automatically, so there is no access to URLs
+        "SELECT * FROM read_csv('https://example.com/data.csv')",
+    ],
+)
+def test_query_files_rejects(sql):
+    assert json.loads(query_files(sql))["status"] == "failure"
+
+
+def test_query_files_timeout(monkeypatch):
+    monkeypatch.setattr(tools, "QUERY_FILES_TIMEOUT_SECONDS", 0.1)
+    result = json.loads(query_files("SELECT count(*) FROM range(10000000000) a"))
+    assert result["status"] == "failure"
+    assert "timed out" in result["report"]
+
+
+def test_query_files_own_cursor(monkeypatch):
+    timers = []
+
+    class Timer(threading.Timer):
+        def __init__(self, interval, function):
+            super().__init__(interval, function)
+            timers.append(self)
+
+    monkeypatch.setattr(tools.threading, "Timer", Timer)
+    assert json.loads(query_files("SELECT 1"))["rows"] == [[1]]
+    # A late interrupt can't reach the cursor other queries of the thread use
+    cursor = timers[0].function.__self__
+    assert cursor is not get_connection()
+    with pytest.raises(duckdb.ConnectionException):
+        cursor.execute("SELECT 1")
+
+
+def test_profile_dataset(tmp_path, monkeypatch):
+    path = tmp_path / "data.csv"
+    path.write_text("id,name,amount\n1,a,1.5\n2,b,\n3,a,4.5\n4,a,2.5\n")
+
+    result = json.loads(profile_dataset(str(path), top_k=1))
+    assert result["status"] == "success"
+    assert result["rows"] == 4
+    assert not result["sampled"]
+    assert result["columns"]["name"] == {
+        "type": "VARCHAR",
+        "null_ratio": 0,
+        "distinct": 2,
+        "min": "a",
+        "max": "b",
+        "quartiles": None,
+        "top": ["a"],
+    }
+    assert result["columns"]["amount"]["null_ratio"] == pytest.approx(0.25)
+    assert result["columns"]["amount"]["min"] == "1.5"
+    assert len(result["columns"]["id"]["quartiles"]) == 3
+
+    monkeypatch.setattr(tools, "PROFILE_DATASET_SAMPLE_BYTES", 0)
+    monkeypatch.setattr(tools, "PROFILE_DATASET_SAMPLE_ROWS", 2)
+    result = json.loads(profile_dataset(str(tmp_path / "*.csv")))
+    assert result["sampled"]
+    assert result["rows"] == 4
+    assert result["sample_rows"] == 2
+
+
+def test_profile_dataset_parquet(parquet_file, monkeypatch):
+    result = json.loads(profile_dataset(str(parquet_file)))
+    assert result["rows"] == 1000
+
+    monkeypatch.setattr(tools, "PROFILE_DATASET_SAMPLE_BYTES", 0)
+    monkeypatch.setattr(tools, "PROFILE_DATASET_SAMPLE_ROWS", 10)
+    result = json.loads(profile_dataset(str(parquet_file)))
+    assert (result["rows"], result["sample_rows"]) == (1000, 10)
+    assert result["columns"]["category"]["min"] == "0"
+    assert result["columns"]["category"]["max"] == "2"
+    assert sorted(result["columns"]["category"]["top"]) == ["0", "1", "2"]
+
+
+def test_profile_dataset_fails(tmp_path):
+    assert json.loads(profile_dataset(str(tmp_path / "a.txt")))["status"] == "failure"
+    assert json.loads(profile_dataset(str(tmp_path / "a.csv")))["status"] == "failure"
+
+
+def test_apply_edits(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("a\nb\n")
+
+    result = json.loads(
+        apply_edits([{"path": str(path), "search": "b", "replace": "c"}])
+    )
+    assert result["status"] == "success"
+    assert "-b\n+c\n" in result["diff"]
+
+    result = json.loads(apply_edits([{"path": str(path), "search": "b"}]))
+    assert result["status"] == "failure"
+
+
+def test_search_code(repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "get_code_index", lambda: CodeIndex(tmp_path / "i"))
+
+    result = json.loads(search_code("hello", str(repo)))
+    assert result["status"] == "success"
+    assert {x["path"] for x in result["results"]} == {
+        str(repo / x) for x in ["a.py", "b.txt", "src/c.py", "src/d/e.py"]
+    }
+    assert result["results"][0]["line"] == 1
+
+    assert json.loads(search_code("hi", str(repo)))["status"] == "failure"
+    assert json.loads(search_code("hello", str(repo / "x")))["status"] == "failure"
+    # Full-text search can't parse queries with a NUL character
+    result = json.loads(search_code("hello\x00", str(repo)))
+    assert result == {
+        "status": "failure",
+        "report": "Search failed: unterminated string",
+    }
@@ -0,0 +1,183 @@
+import pytest
+
+from misstea.sub_agents.coding import editor
+from misstea.sub_agents.coding.editor import EditError, apply_edits, atomic_write
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("def f():\n    return 1\n\n\ndef g():\n    return 1\n")
+    return path
+
+
+def test_apply_edits_search(source):
+    diff = apply_edits(
+        [
+            {"path": str(source), "search": "return 1", "replace": "pass", "count": 2},
+            {"path": str(source), "search": "def g", "replace": "def h"},
+        ]
+    )
+    assert source.read_text() == "def f():\n    pass\n\n\ndef h():\n    pass\n"
+    assert "-    return 1\n+    pass\n" in diff
+
+
+def test_apply_edits_lines(source):
+    apply_edits(
+        [
+            {"path": str(source), "start_line": 2, "end_line": 2, "replace": "    x"},
+            # Insert before line 5, line numbers refer to the original file
+            {"path": str(source), "start_line": 5, "end_line": 4, "replace": "# g"},
+        ]
+    )
+    assert source.read_text() == "def f():\n    x\n\n\n# g\ndef g():\n    return 1\n"
+
+
+def test_apply_edits_diff(source):
+    diff = """--- a/a.py
++++ b/a.py
+@@ -5,2 +5,3 @@
+ def g():
+-    return 1
++    # Two
++    return 2
+"""
+    original = source.read_text()
+    apply_edits([{"path": str(source), "diff": diff}])
+    assert source.read_text().endswith("def g():\n    # Two\n    return 2\n")
+
+    # Line numbers may be off, as long as the hunk matches one place
+    source.write_text(original)
+    apply_edits([{"path": str(source), "diff": diff.replace("-5,2", "-1,2")}])
+    assert source.read_text().endswith("def g():\n    # Two\n    return 2\n")
+
+
+def test_apply_edits_diff_dashes(tmp_path):
+    path = tmp_path / "a.md"
+    path.write_text("title\n-- comment\n---\nbody\n")
+    diff = """--- a/a.md
++++ b/a.md
+@@ -1,4 +1,4 @@
++---
+ title
+--- comment
+ ---
+ body
+"""
+    apply_edits([{"path": str(path), "diff": diff}])
+    assert path.read_text() == "---\ntitle\n---\nbody\n"
+
+
+def test_apply_edits_content(tmp_path):
+    path = tmp_path / "new" / "b.txt"
+    diff = apply_edits([{"path": str(path), "content": "hello\n"}])
+    assert path.read_text() == "hello\n"
+    assert "+hello\n" in diff
+
+
+def test_apply_edits_keeps_line_endings_and_encoding(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes("café\r\nbar\r\n".encode("latin-1"))
+    apply_edits([{"path": str(path), "start_line": 2, "end_line": 2, "replace": "é"}])
+    assert path.read_bytes() == "café\r\né\r\n".encode("latin-1")
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        {"search": "return 1", "replace": "pass"},
+        {"search": "missing", "replace": "pass"},
+        {"start_line": 3, "end_line": 10, "replace": ""},
+        {"diff": "@@ -1,1 +1,1 @@\n-missing\n+x\n"},
+        {"unknown": "x"},
+    ],
+)
+def test_apply_edits_fails_without_changes(source, edit):
+    original = source.read_text()
+    with pytest.raises(EditError):
+        apply_edits(
+            [
+                {"path": str(source), "search": "def f", "replace": "def x"},
+                {"path": str(source), **edit},
+            ]
+        )
+    assert source.read_text() == original
+
+
+def test_apply_edits_unencodable(source, tmp_path):
+    path = tmp_path / "b.txt"
+    path.write_bytes("café\n".encode("latin-1"))
+    with pytest.raises(EditError, match="encoded"):
+        apply_edits(
+            [
+                {"path": str(source), "search": "def f", "replace": "def x"},
+                {"path": str(path), "search": "café", "replace": "€"},
+            ]
+        )
+    assert path.read_bytes() == "café\n".encode("latin-1")
+    assert "def f" in source.read_text()
+
+
+def test_apply_edits_write_fails(source, tmp_path, monkeypatch):
+    path = tmp_path / "b.txt"
+    path.write_text("hello\n")
+    fsync = editor.os.fsync
+    calls = []
+
+    def fail_second(fd):
+        calls.append(fd)
+        if len(calls) == 2:
+            raise OSError("No space left on device")
+        fsync(fd)
+
+    monkeypatch.setattr(editor.os, "fsync", fail_second)
+    with pytest.raises(OSError, match="No space"):
+        apply_edits(
+            [
+                {"path": str(source), "search": "def f", "replace": "def x"},
+                {"path": str(path), "search": "hello", "replace": "bye"},
+            ]
+        )
+    assert "def f" in source.read_text()
+    assert path.read_text() == "hello\n"
+    assert sorted(tmp_path.iterdir()) == [source, path]
+
+
+def test_apply_edits_undecodable(tmp_path, monkeypatch):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"\xff\n")
+    monkeypatch.setattr(editor, "detect_encoding", lambda *_: "ascii")
+    with pytest.raises(EditError, match="decode"):
+        apply_edits([{"path": str(path), "search": "x", "replace": "y"}])
+
+
+def test_apply_edits_overlap(source):
+    with pytest.raises(EditError, match="overlap"):
+        apply_edits(
+            [
+                {"path": str(source), "search": "def f():", "replace": ""},
+                {"path": str(source), "start_line": 1, "end_line": 2, "replace": ""},
+            ]
+        )
+
+
+def test_atomic_write_keeps_permissions(source):
+    source.chmod(0o755)
+    atomic_write(source, b"x")
+    assert source.read_bytes() == b"x"
+    assert source.stat().st_mode & 0o777 == 0o755
+    assert list(source.parent.iterdir()) == [source]
+
+
+def test_atomic_write_new_file_permissions(tmp_path, monkeypatch):
+    monkeypatch.setattr(editor, "_UMASK", 0o027)
+    atomic_write(tmp_path / "a.txt", b"x")
+    assert (tmp_path / "a.txt").stat().st_mode & 0o777 == 0o640
+
+
+def test_atomic_write_symlink(source, tmp_path):
+    link = tmp_path / "link.py"
+    link.symlink_to(source)
+    atomic_write(link, b"x")
+    assert link.is_symlink()
+    assert source.read_bytes() == b"x"
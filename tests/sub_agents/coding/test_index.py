@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from misstea.sub_agents.coding.index import CHUNK_LINES, CodeIndex
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "workspace"
+    (root / "models").mkdir(parents=True)
+    (root / "models" / "stg_orders.sql").write_text(
+        "select *\nfrom {{ source('shop', 'orders') }}\n"
+    )
+    (root / "main.tf").write_text(
+        "\n" * CHUNK_LINES + 'resource "aws_s3_bucket" "data" {\n  bucket = "x"\n}\n'
+    )
+    (root / "ignored").mkdir()
+    (root / "ignored" / "orders.sql").write_text("source orders")
+    (root / ".gitignore").write_text("ignored/\n")
+    (root / "image.png").write_bytes(b"\x89PNG\r\n\x1a\norders")
+    return root
+
+
+@pytest.fixture
+def index(tmp_path):
+    return CodeIndex(tmp_path / "index.sqlite")
+
+
+def test_search(index, workspace):
+    assert index.update(workspace) == (4, 0)
+
+    results = index.search(workspace, "SOURCE orders")
+    assert [(x.path, x.line) for x in results] == [
+        (str(workspace / "models" / "stg_orders.sql"), 2)
+    ]
+    assert results[0].snippet == "from {{ source('shop', 'orders') }}"
+
+    results = index.search(workspace, "resource s3_bucket")
+    assert [(x.path, x.line) for x in results] == [
+        (str(workspace / "main.tf"), CHUNK_LINES + 1)
+    ]
+
+    assert index.search(workspace / "models", "bucket") == []
+    with pytest.raises(ValueError, match="3 characters"):
+        index.search(workspace, "tf")
+
+
+def test_update_is_incremental(index, workspace):
+    index.update(workspace)
+    assert index.update(workspace) == (0, 0)
+
+    path = workspace / "models" / "stg_orders.sql"
+    path.write_text("select 1 as customers")
+    os.utime(path, ns=(0, 1))
+    (workspace / "main.tf").unlink()
+    assert index.update(workspace) == (1, 1)
+
+    assert index.search(workspace, "orders") == []
+    assert [x.line for x in index.search(workspace, "customers")] == [1]
+    assert index.search(workspace, "bucket") == []
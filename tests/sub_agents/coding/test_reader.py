@@ -0,0 +1,75 @@
+from misstea.sub_agents.coding import reader
+from misstea.sub_agents.coding.reader import (
+    allocate_budget,
+    decode_text,
+    is_binary,
+    iter_file_contents,
+)
+
+
+def test_is_binary():
+    assert not is_binary(b"")
+    assert not is_binary("print('héllo')\n\tx = 1\r\n".encode())
+    assert is_binary(b"\x89PNG\r\n\x1a\n")
+    assert is_binary(b"abc\x00def")
+    assert is_binary(bytes(range(1, 8)) * 10)
+
+
+def test_decode_text():
+    assert decode_text("héllo".encode()) == "héllo"
+    # A multi-byte character cut in half by truncation is dropped
+    assert decode_text("héllo".encode()[:2], truncated=True) == "h"
+    assert decode_text("héllo wörld".encode("latin-1")) == "héllo wörld"
+
+
+def test_allocate_budget():
+    assert allocate_budget([], 100) == 0
+    assert allocate_budget([10, 20], 100) == 20
+    # The small files fit, the large ones share what is left
+    assert allocate_budget([10, 500, 1000], 110) == 50
+    assert allocate_budget([100, 100], 100) == 50
+    assert allocate_budget([100, 100], -1) == 0
+
+
+def test_iter_file_contents(tmp_path):
+    for name in ["b.txt", "a.txt", "c/d.txt"]:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(name * 10)
+    (tmp_path / "e.bin").write_bytes(b"\x00" * 10)
+
+    files = list(iter_file_contents(tmp_path, window=2))
+    assert [x.path for x in files] == ["a.txt", "b.txt", "c/d.txt", "e.bin"]
+    assert files[0].content == "a.txt" * 10
+    assert files[3].skipped == "binary"
+
+    files = list(iter_file_contents(tmp_path, pattern="*.txt", max_bytes=150))
+    # "c/d.txt" has 70 bytes, but only 50 are left after the others
+    assert [len(x.content) for x in files] == [50, 50, 50]
+    assert [x.truncated for x in files] == [False, False, True]
+
+    # Binary files are still detected when the budget leaves nothing to read of them
+    files = list(iter_file_contents(tmp_path, max_bytes=1))
+    assert [x.content for x in files[:3]] == ["", "", ""]
+    assert files[3].skipped == "binary"
+
+
+def test_detect_encoding_is_cached(monkeypatch):
+    calls = []
+
+    def detect(data):
+        calls.append(data)
+        return {"encoding": "latin-1", "confidence": 0.9}
+
+    monkeypatch.setattr(reader.chardet, "detect", detect)
+    data = "héllo".encode("latin-1")
+    key = ("cached.txt", len(data), 1)
+
+    assert decode_text(data, key=key) == "héllo"
+    assert decode_text(data, key=key) == "héllo"
+    assert len(calls) == 1
+    # A modified file is detected again
+    decode_text(data, key=(key[0], key[1], 2))
+    assert len(calls) == 2
+    # UTF-8 files are never detected
+    decode_text("héllo".encode())
+    assert len(calls) == 2
@@ -0,0 +1,77 @@
+import pytest
+
+from misstea.sub_agents.coding.walker import IgnoreRule, is_ignored, matches_glob, walk
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for path in [
+        ".git/HEAD",
+        ".gitignore",
+        "README.md",
+        "build/output.txt",
+        "node_modules/left-pad/index.js",
+        "src/app.py",
+        "src/app.log",
+        "src/keep.log",
+        "src/utils/helpers.py",
+        "src/utils/.gitignore",
+        "src/utils/generated.py",
+    ]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    (tmp_path / ".gitignore").write_text("# Build output\n/build/\n*.log\n!keep.log\n")
+    (tmp_path / "src/utils/.gitignore").write_text("generated.py\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "expected"),
+    [
+        ("*.py", "src/app.py", True),
+        ("*.py", "src/app.pyc", False),
+        ("src/*.py", "src/utils/helpers.py", False),
+        ("src/**/*.py", "src/utils/helpers.py", True),
+        ("src/**/*.py", "src/app.py", True),
+        ("test_?.py", "tests/test_1.py", True),
+        ("[!a]*.md", "README.md", True),
+    ],
+)
+def test_matches_glob(pattern, path, expected):
+    assert matches_glob(pattern, path) is expected
+
+
+def test_is_ignored():
+    rules = tuple(IgnoreRule.parse(x) for x in ["logs/", "*.log", "!keep.log"])
+    assert is_ignored(rules, "logs", is_dir=True)
+    assert not is_ignored(rules, "logs", is_dir=False)
+    assert is_ignored(rules, "src/app.log", is_dir=False)
+    assert not is_ignored(rules, "src/keep.log", is_dir=False)
+    assert IgnoreRule.parse("# comment") is None
+
+
+def test_walk(repo):
+    assert [x.path for x in walk(repo)] == [
+        ".gitignore",
+        "README.md",
+        "src",
+        "src/app.py",
+        "src/keep.log",
+        "src/utils",
+        "src/utils/.gitignore",
+        "src/utils/helpers.py",
+    ]
+    assert [x.path for x in walk(repo, max_depth=1)] == [
+        ".gitignore",
+        "README.md",
+        "src",
+    ]
+    assert "node_modules/left-pad/index.js" in [
+        x.path for x in walk(repo, respect_gitignore=False)
+    ]
+
+
+def test_walk_resumes_after_cursor(repo):
+    paths = [x.path for x in walk(repo)]
+    for i, path in enumerate(paths):
+        assert [x.path for x in walk(repo, after=path)] == paths[i + 1 :]
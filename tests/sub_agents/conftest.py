@@ -0,0 +1,36 @@
+import pytest
+
+from misstea.cassettes import get_cassette_mode, use_cassette
+from misstea.sub_agents import AGENT_MODULES, get_agent
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):  # noqa: ARG001
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"report_{report.when}", report)
+
+
+@pytest.fixture(autouse=True)
+def cassette(request):
+    # Eval tests, e.g. tests/sub_agents/coding/test_coding_agent.py, replay the model
+    # and tool traffic recorded in tests/sub_agents/coding/cassettes/, see MISSTEA_CASSETTE_MODE
+    agent_name = request.path.parent.name
+    if agent_name not in AGENT_MODULES or not request.path.name.startswith(
+        f"test_{agent_name}_agent"
+    ):
+        yield None
+        return
+
+    path = request.path.parent / "cassettes" / f"{request.node.name}.json"
+    # CI only replays, evals are recorded locally with credentials and committed
+    if get_cassette_mode() == "replay" and not path.exists():
+        pytest.skip(
+            f"No cassette in {path}, record it with MISSTEA_CASSETTE_MODE=auto."
+        )
+    with use_cassette(get_agent(agent_name), path) as cassette:
+        yield cassette
+        # Only keep recordings of runs that passed the evaluation
+        report = getattr(request.node, "report_call", None)
+        if cassette is not None and (report is None or report.failed):
+            cassette.modified = False
@@ -0,0 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from misstea.deadlines import deadline
+from misstea.sub_agents.outlook.agent import DeadlineConnection
+
+
+def test_connection_timeout_follows_deadline():
+    connection = DeadlineConnection(("client_id", "client_secret"), timeout=30)
+    assert connection.timeout == 30
+
+    def timeout_within(seconds):
+        with deadline(seconds):
+            return connection.timeout
+
+    # Concurrent calls sharing the connection each see their own deadline
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        short, long = executor.map(timeout_within, [5, 100])
+    assert 0 < short <= 5
+    assert 5 < long <= 100
+    assert connection.timeout == 30
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+from misstea.sub_agents import AGENT_MODULES, get_agent, loaded_agents, preload_agents
+
+
+def test_importing_tools_does_not_import_sub_agents():
+    modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, misstea.tools; print(','.join(sys.modules))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split(",")
+    assert not [x for x in AGENT_MODULES.values() if x in modules]
+
+
+def test_get_agent_is_cached():
+    agent = get_agent("calculator")
+    assert agent.name == "calculator_agent"
+    assert get_agent("calculator") is agent
+    assert "calculator" in loaded_agents()
+
+
+def test_get_agent_unknown():
+    with pytest.raises(ValueError, match="Unknown sub-agent"):
+        get_agent("kettle")
+
+
+def test_preload_agents_from_env(monkeypatch):
+    monkeypatch.setenv("MISSTEA_PRELOAD_AGENTS", "calculator, google_search")
+    assert preload_agents() == ["calculator", "google_search"]
+    assert {"calculator", "google_search"} <= set(loaded_agents())
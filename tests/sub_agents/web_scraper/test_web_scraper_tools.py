@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+from crawl4ai import LLMConfig
+from crawl4ai.extraction_strategy import LLMExtractionStrategy
+
+from misstea import scheduler
+from misstea.sub_agents.web_scraper import tools_async
+
+
+@pytest.mark.asyncio
+async def test_extraction_takes_a_scheduler_slot(monkeypatch):
+    llm_scheduler = scheduler.LlmScheduler(max_concurrency=1)
+    monkeypatch.setattr(tools_async, "get_scheduler", lambda: llm_scheduler)
+    active = []
+
+    async def fake_arun(self, url, sections):  # noqa: ARG001
+        active.append(llm_scheduler.active)
+        await asyncio.sleep(0)
+        return [{"content": x} for x in sections]
+
+    monkeypatch.setattr(LLMExtractionStrategy, "arun", fake_arun)
+    strategy = tools_async.ScheduledExtractionStrategy(
+        llm_config=LLMConfig(provider="gemini/gemini-2.5-flash")
+    )
+    result = await strategy.arun("https://example.com", ["a"])
+    assert result == [{"content": "a"}]
+    assert active == [1]
+    assert llm_scheduler.active == 0
@@ -0,0 +1,93 @@
+import json
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from misstea.batch import read_prompts, run_batch
+
+
+class EchoLlm(BaseLlm):
+    """Answer with the prompt in upper case, or fail if asked to."""
+
+    async def generate_content_async(  # noqa: D102
+        self,
+        llm_request,
+        stream=False,  # noqa: ARG002
+    ) -> AsyncGenerator[LlmResponse, None]:
+        prompt = llm_request.contents[-1].parts[0].text
+        if prompt == "fail":
+            raise RuntimeError("Model unavailable")
+        yield LlmResponse(
+            content=types.Content(
+                role="model", parts=[types.Part.from_text(text=prompt.upper())]
+            )
+        )
+
+
+@pytest.fixture
+def runner():
+    return InMemoryRunner(agent=LlmAgent(name="echo", model=EchoLlm(model="echo")))
+
+
+def write_prompts(path, prompts):
+    path.write_text("".join(json.dumps(x) + "\n" for x in prompts))
+
+
+def read_results(path):
+    return {x["id"]: x for x in map(json.loads, path.read_text().splitlines())}
+
+
+@pytest.mark.asyncio
+async def test_run_batch(runner, tmp_path):
+    input_path, output_path = tmp_path / "prompts.jsonl", tmp_path / "results.jsonl"
+    write_prompts(
+        input_path,
+        [{"id": "tea", "prompt": "tea"}, {"prompt": "fail"}]
+        + [{"prompt": f"cup {i}"} for i in range(10)],
+    )
+
+    summary = await run_batch(input_path, output_path, concurrency=3, runner=runner)
+    assert summary["total"] == 12
+    assert summary["succeeded"] == 11
+    assert summary["failed"] == 1
+    results = read_results(output_path)
+    assert results["tea"]["response"] == "TEA"
+    assert results["3"]["response"] == "CUP 0"
+    assert results["2"]["status"] == "failure"
+    assert "Model unavailable" in results["2"]["error"]
+    sessions = await runner.session_service.list_sessions(
+        app_name=runner.app_name, user_id="batch"
+    )
+    assert sessions.sessions == []
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resume(runner, tmp_path):
+    input_path, output_path = tmp_path / "prompts.jsonl", tmp_path / "results.jsonl"
+    write_prompts(input_path, [{"prompt": "milk"}, {"prompt": "sugar"}])
+    # A previous run completed the first prompt and crashed while writing the second
+    output_path.write_text(
+        json.dumps({"id": "1", "status": "success", "response": "MILK"}) + '\n{"id": "2'
+    )
+
+    summary = await run_batch(input_path, output_path, runner=runner)
+    assert summary["skipped"] == 1
+    assert summary["succeeded"] == 1
+    assert read_results(output_path)["2"]["response"] == "SUGAR"
+
+
+def test_read_prompts_invalid(tmp_path):
+    input_path = tmp_path / "prompts.jsonl"
+    write_prompts(
+        input_path, [{"id": "a", "prompt": "tea"}, {"id": "a", "prompt": "milk"}]
+    )
+    with pytest.raises(ValueError, match="not unique"):
+        read_prompts(input_path)
+
+    write_prompts(input_path, [{"id": "a"}])
+    with pytest.raises(ValueError, match="has no prompt"):
+        read_prompts(input_path)
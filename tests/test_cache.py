@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from misstea.cache import ResponseCache, get_cache_ttl, normalise_question
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    return ResponseCache(tmp_path / "responses.sqlite", max_bytes=1000)
+
+
+def test_normalise_question():
+    assert normalise_question("  What is   Terraform?\n") == "what is terraform"
+
+
+def test_get_cache_ttl(monkeypatch):
+    assert get_cache_ttl("terraform") > 0
+    assert get_cache_ttl("outlook") == 0
+    monkeypatch.setenv("MISSTEA_CACHE_TTL_TERRAFORM", "0")
+    assert get_cache_ttl("terraform") == 0
+
+
+def test_response_cache_hit_and_miss(response_cache):
+    assert response_cache.get("google_search", "What is dbt?") == (False, None)
+    response_cache.set("google_search", "What is dbt?", {"answer": "A tool."}, ttl=60)
+    assert response_cache.get("google_search", "what is  dbt") == (
+        True,
+        {"answer": "A tool."},
+    )
+    stats = response_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["agents"]["google_search"]["hit_ratio"] == pytest.approx(0.5)
+
+
+def test_response_cache_expiry(response_cache, monkeypatch):
+    response_cache.set("github", "Latest release?", "v1.0.0", ttl=60)
+    monkeypatch.setattr(time, "time", lambda: 1e12)
+    assert response_cache.get("github", "Latest release?") == (False, None)
+    assert response_cache.stats()["entries"] == 0
+
+
+def test_response_cache_eviction(response_cache):
+    response_cache.set("github", "first", "x" * 400, ttl=60)
+    response_cache.set("github", "second", "x" * 400, ttl=60)
+    response_cache.get("github", "first")
+    response_cache.set("github", "third", "x" * 400, ttl=60)
+    assert response_cache.get("github", "first")[0]
+    assert not response_cache.get("github", "second")[0]
+    assert response_cache.get("github", "third")[0]
+
+
+def test_response_cache_invalidate(response_cache):
+    response_cache.set("github", "a", "1", ttl=60)
+    response_cache.set("terraform", "a", "2", ttl=60)
+    assert response_cache.invalidate("github") == 1
+    assert response_cache.get("terraform", "a")[0]
+    assert response_cache.invalidate() == 1
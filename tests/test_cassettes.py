@@ -0,0 +1,105 @@
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.adk.tools import FunctionTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.genai import types
+
+from misstea.cassettes import CassetteMissError, use_cassette
+
+calls = []
+
+
+class ScriptedLlm(BaseLlm):
+    """Call the `lookup` tool, then answer with its result."""
+
+    async def generate_content_async(  # noqa: D102
+        self,
+        llm_request,
+        stream=False,  # noqa: ARG002
+    ) -> AsyncGenerator[LlmResponse, None]:
+        calls.append("model")
+        last_part = llm_request.contents[-1].parts[0]
+        if last_part.function_response:
+            part = types.Part.from_text(
+                text=f"The answer is {last_part.function_response.response['result']}."
+            )
+        else:
+            part = types.Part.from_function_call(name="lookup", args={"key": "a"})
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def lookup(key: str) -> str:
+    """Look up a key.
+
+    Args:
+        key (str): The key.
+
+    Returns:
+        str: The value.
+
+    """
+    calls.append("lookup")
+    return key.upper()
+
+
+class Toolset(BaseToolset):
+    """Toolset that counts how often its tools are listed, like an MCP server."""
+
+    async def get_tools(self, readonly_context=None):  # noqa: ARG002, D102
+        calls.append("get_tools")
+        return [FunctionTool(lookup)]
+
+
+async def ask(agent: LlmAgent) -> str:
+    runner = InMemoryRunner(agent=agent)
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="user"
+    )
+    async for event in runner.run_async(
+        user_id="user",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part.from_text(text="a?")]),
+    ):
+        if event.is_final_response():
+            return event.content.parts[0].text
+    return ""
+
+
+@pytest.mark.asyncio
+async def test_use_cassette(tmp_path):
+    agent = LlmAgent(
+        name="agent", model=ScriptedLlm(model="scripted"), tools=[Toolset()]
+    )
+    path = tmp_path / "cassette.json"
+
+    calls.clear()
+    with use_cassette(agent, path, mode="record"):
+        assert await ask(agent) == "The answer is A."
+    assert [x for x in calls if x != "get_tools"] == ["model", "lookup", "model"]
+    assert path.exists()
+    assert agent.before_model_callback is None
+    assert isinstance(agent.tools[0], Toolset)
+
+    calls.clear()
+    with use_cassette(agent, path, mode="replay"):
+        assert await ask(agent) == "The answer is A."
+    assert calls == []
+
+    calls.clear()
+    with use_cassette(agent, path, mode="auto"):
+        assert await ask(agent) == "The answer is A."
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_use_cassette_replay_miss(tmp_path):
+    agent = LlmAgent(name="agent", model=ScriptedLlm(model="scripted"), tools=[lookup])
+    with (
+        pytest.raises(CassetteMissError, match="No recording of a model request"),
+        use_cassette(agent, tmp_path / "cassette.json", mode="replay"),
+    ):
+        await ask(agent)
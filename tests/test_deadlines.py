@@ -0,0 +1,27 @@
+import pytest
+
+from misstea.deadlines import deadline, get_agent_timeout, remaining_time
+
+
+def test_get_agent_timeout(monkeypatch):
+    assert get_agent_timeout("calculator") == 60
+    assert get_agent_timeout("outlook") == 300
+    monkeypatch.setenv("MISSTEA_TIMEOUT_OUTLOOK", "2.5")
+    assert get_agent_timeout("outlook") == pytest.approx(2.5)
+
+
+def test_remaining_time_without_deadline():
+    assert remaining_time() is None
+    assert remaining_time(default=10) == 10
+
+
+def test_nested_deadlines_cannot_extend():
+    with deadline(5):
+        assert 4 < remaining_time() <= 5
+        with deadline(60) as remaining:
+            assert remaining <= 5
+            assert remaining_time() <= 5
+        with deadline(1):
+            assert remaining_time() <= 1
+        assert remaining_time() > 1
+    assert remaining_time() is None
@@ -1,47 +1,112 @@
+import asyncio
+import json
 import logging
 import os
+from logging.handlers import QueueHandler
+from types import SimpleNamespace
 
 from misstea import logger
 
 
-def test_custom_formatter():
-    formatter = logger.CustomFormatter(logging.INFO)
-    record = logging.LogRecord(
+def _console_handler() -> logging.Handler:
+    queue_handlers = [
+        h for h in logging.getLogger().handlers if isinstance(h, QueueHandler)
+    ]
+    assert len(queue_handlers) == 1
+    return queue_handlers[0].listener.handlers[0]
+
+
+def _record(level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(
         name="test",
-        level=logging.INFO,
+        level=level,
         pathname="",
         lineno=0,
-        msg="Test message",
-        args=(),
+        msg="Test %s",
+        args=("message",),
         exc_info=None,
     )
-    formatted_message = formatter.format(record)
+
+
+def test_custom_formatter():
+    formatter = logger.CustomFormatter(logging.INFO)
+    formatted_message = formatter.format(_record())
     assert "Test message" in formatted_message
+    assert formatter.format(_record(logging.WARNING)).startswith("\x1b[33;20m")
+
+
+def test_json_formatter():
+    record = _record()
+    record.correlation_id = "e-123"
+    entry = json.loads(logger.JsonFormatter().format(record))
+    assert entry["message"] == "Test message"
+    assert entry["level"] == "INFO"
+    assert entry["correlation_id"] == "e-123"
 
 
 def test_configure_console_logging_default():
     logger.configure_console_logging(verbosity=0)
-    log = logging.getLogger()
-    assert any(
-        isinstance(h, logging.StreamHandler) and h.level == logging.INFO
-        for h in log.handlers
-    )
+    assert isinstance(_console_handler(), logging.StreamHandler)
+    assert _console_handler().level == logging.INFO
+    # DEBUG records are dropped before they are created, let alone formatted
+    assert not logging.getLogger("misstea").isEnabledFor(logging.DEBUG)
 
 
 def test_configure_console_logging_verbose():
     logger.configure_console_logging(verbosity=1)
-    log = logging.getLogger()
-    assert any(
-        isinstance(h, logging.StreamHandler) and h.level == logging.DEBUG
-        for h in log.handlers
-    )
+    assert _console_handler().level == logging.DEBUG
+    assert logging.getLogger("misstea").isEnabledFor(logging.DEBUG)
 
 
 def test_configure_console_logging_env_var():
     os.environ["LOG_LEVEL"] = "DEBUG"
     logger.configure_console_logging(verbosity=0)
-    log = logging.getLogger()
-    assert any(
-        isinstance(h, logging.StreamHandler) and h.level == logging.DEBUG
-        for h in log.handlers
-    )
+    assert _console_handler().level == logging.DEBUG
+
+
+def test_configure_console_logging_json(capsys):
+    logger.configure_console_logging(verbosity=0, log_format="json")
+    assert isinstance(_console_handler().formatter, logger.JsonFormatter)
+
+    plugin = logger.LoggingPlugin()
+    turn = SimpleNamespace(invocation_id="e-turn")
+    sub_agent_turn = SimpleNamespace(invocation_id="e-sub-agent")
+
+    async def run():
+        await plugin.before_run_callback(invocation_context=turn)
+        await plugin.before_run_callback(invocation_context=sub_agent_turn)
+        logging.getLogger("misstea").info("Hello")
+        await plugin.after_run_callback(invocation_context=sub_agent_turn)
+        logging.getLogger("misstea").info("Still in the turn")
+        await plugin.after_run_callback(invocation_context=turn)
+        logging.getLogger("misstea").info("Goodbye")
+
+    asyncio.run(run())
+    logger._stop_listener()
+    entries = [json.loads(x) for x in capsys.readouterr().err.splitlines()]
+    assert [(x["message"], x["correlation_id"]) for x in entries] == [
+        ("Hello", "e-turn"),
+        ("Still in the turn", "e-turn"),
+        ("Goodbye", None),
+    ]
+
+
+def test_configure_console_logging_exception(capsys):
+    logger.configure_console_logging(verbosity=0, log_format="json")
+    try:
+        raise RuntimeError("Boom")
+    except RuntimeError:
+        logging.getLogger("misstea").exception("Failed %s", "task")
+    logger._stop_listener()
+    entry = json.loads(capsys.readouterr().err)
+    assert entry["message"] == "Failed task"
+    assert entry["exception"].startswith("Traceback")
+    assert "RuntimeError: Boom" in entry["exception"]
+
+    logger.configure_console_logging(verbosity=0, log_format="text")
+    try:
+        raise RuntimeError("Boom")
+    except RuntimeError:
+        logging.getLogger("misstea").exception("Failed")
+    logger._stop_listener()
+    assert "RuntimeError: Boom" in capsys.readouterr().err
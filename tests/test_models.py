@@ -0,0 +1,35 @@
+from misstea import models
+from misstea.scheduler import Priority, ScheduledGemini
+
+
+def test_load_model_config(monkeypatch, tmp_path):
+    config_path = tmp_path / "models.toml"
+    config_path.write_text(
+        '[models]\ndefault = "gemini-2.5-pro"\nblog_writer = "gemini-2.5-flash"\n'
+    )
+    monkeypatch.setenv("MISSTEA_MODEL_BLOG_WRITER", "gemini-2.5-flash-lite")
+    monkeypatch.setenv("MISSTEA_MODEL_ROOT", "gemini-2.5-flash")
+
+    config = models.load_model_config(config_path)
+    assert config["default"] == "gemini-2.5-pro"
+    assert config["blog_writer"] == "gemini-2.5-flash-lite"
+    assert config["calculator"] == "gemini-2.5-flash-lite"
+    assert config["root"] == "gemini-2.5-flash"
+    assert "config" not in config
+
+
+def test_get_model(monkeypatch):
+    monkeypatch.setattr(
+        models,
+        "get_model_config",
+        lambda: {"default": "gemini-2.5-flash", "calculator": "gemini-2.5-flash-lite"},
+    )
+
+    model = models.get_model("calculator")
+    assert isinstance(model, ScheduledGemini)
+    assert model.model == "gemini-2.5-flash-lite"
+    assert model.priority == Priority.INTERACTIVE
+
+    model = models.get_model("blog_planner", priority=Priority.BACKGROUND)
+    assert model.model == "gemini-2.5-flash"
+    assert model.priority == Priority.BACKGROUND
@@ -0,0 +1,57 @@
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+from google.adk.tools import FunctionTool
+
+from misstea.deadlines import deadline, remaining_time
+from misstea.offload import offload, run_in_thread
+
+
+def blocking_tool(seconds: float, label: str = "tea") -> dict:
+    """Sleep, like a tool using a blocking library.
+
+    Args:
+        seconds (float): Seconds to sleep for.
+        label (str): Returned in the report.
+
+    Returns:
+        dict: The thread the tool ran in.
+
+    """
+    time.sleep(seconds)
+    return {
+        "status": "success",
+        "report": label,
+        "thread": threading.current_thread().name,
+    }
+
+
+def test_offload_keeps_tool_declaration():
+    tool = offload(blocking_tool)
+    assert inspect.iscoroutinefunction(tool)
+    assert tool.__name__ == "blocking_tool"
+    assert inspect.signature(tool) == inspect.signature(blocking_tool)
+    assert (
+        FunctionTool(tool)._get_declaration()
+        == FunctionTool(blocking_tool)._get_declaration()
+    )
+
+
+@pytest.mark.asyncio
+async def test_offload_runs_concurrently_off_the_loop():
+    tool = offload(blocking_tool)
+    start = time.monotonic()
+    results = await asyncio.gather(*[tool(0.2, label=str(i)) for i in range(4)])
+    assert time.monotonic() - start < 0.6
+    assert [x["report"] for x in results] == ["0", "1", "2", "3"]
+    assert all(x["thread"].startswith("misstea-tool") for x in results)
+
+
+@pytest.mark.asyncio
+async def test_run_in_thread_propagates_deadline():
+    with deadline(60):
+        remaining = await run_in_thread(remaining_time)
+    assert 0 < remaining <= 60
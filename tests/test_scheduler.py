@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai import types
+from google.genai.errors import ClientError
+
+from misstea import scheduler
+
+
+def test_token_bucket():
+    bucket = scheduler.TokenBucket(per_minute=60)
+    assert bucket.delay(1) == 0
+    bucket.consume(60)
+    assert 0.9 < bucket.delay(1) <= 1
+    bucket.consume(-60)
+    assert bucket.delay(60) == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_priority_and_concurrency():
+    llm_scheduler = scheduler.LlmScheduler(max_concurrency=1)
+    order = []
+
+    async def request(name, priority):
+        async with llm_scheduler.slot(priority):
+            order.append(name)
+            assert llm_scheduler.active == 1
+            await asyncio.sleep(0.01)
+
+    async with llm_scheduler.slot():
+        tasks = [
+            asyncio.create_task(request("blog", scheduler.Priority.BACKGROUND)),
+            asyncio.create_task(request("question", scheduler.Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        assert order == []
+        assert llm_scheduler.stats()["waiting"] == 2
+    await asyncio.gather(*tasks)
+
+    assert order == ["question", "blog"]
+    stats = llm_scheduler.stats()
+    assert stats["requests"] == 3
+    assert stats["active"] == 0
+    assert stats["wait_max_ms"] >= 10
+
+
+@pytest.mark.asyncio
+async def test_slot_rate_limit():
+    llm_scheduler = scheduler.LlmScheduler(tokens_per_minute=600)
+    async with llm_scheduler.slot(tokens=600):
+        pass
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    async with llm_scheduler.slot(tokens=5):
+        pass
+    assert loop.time() - start >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_scheduled_gemini_retries_rate_limits(monkeypatch):
+    attempts = []
+
+    async def fake_generate_content_async(self, llm_request, stream=False):  # noqa: ARG001
+        attempts.append(llm_request.model)
+        await asyncio.sleep(0)
+        if len(attempts) == 1:
+            raise ClientError(429, {"error": {"message": "Resource exhausted."}})
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text="4")])
+        )
+
+    llm_scheduler = scheduler.LlmScheduler()
+    monkeypatch.setattr(Gemini, "generate_content_async", fake_generate_content_async)
+    monkeypatch.setattr(scheduler, "get_scheduler", lambda: llm_scheduler)
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda _: 0)
+
+    model = scheduler.ScheduledGemini(model="gemini-2.5-flash")
+    responses = [
+        x
+        async for x in model.generate_content_async(
+            LlmRequest(model="gemini-2.5-flash")
+        )
+    ]
+    assert [x.content.parts[0].text for x in responses] == ["4"]
+    assert len(attempts) == 2
+    assert llm_scheduler.rate_limited == 1
+
+
+def test_backoff_delay():
+    assert all(0 <= scheduler.backoff_delay(x, cap=8) <= 8 for x in range(10))
+
+
+@pytest.mark.asyncio
+async def test_slot_nested_event_loop():
+    llm_scheduler = scheduler.LlmScheduler(max_concurrency=1)
+
+    async def request():
+        async with llm_scheduler.slot():
+            return llm_scheduler.active
+
+    # A request from another event loop, e.g. asyncio.run in a thread, keeps its own queue
+    async with llm_scheduler.slot():
+        assert await asyncio.to_thread(asyncio.run, request()) == 2
+        assert llm_scheduler.active == 1
+    assert llm_scheduler.stats()["active"] == 0
+    assert llm_scheduler.stats()["waiting"] == 0
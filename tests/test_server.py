@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from google.adk.agents import LlmAgent
+from google.adk.tools.base_toolset import BaseToolset
+
+from misstea import server
+
+
+class Toolset(BaseToolset):
+    """Toolset that fails to connect, like an unavailable MCP server, if `fail` is set."""
+
+    def __init__(self, fail: bool = False):  # noqa: D107
+        super().__init__()
+        self.fail = fail
+        self.connected = False
+
+    async def get_tools(self, readonly_context=None):  # noqa: ARG002, D102
+        if self.fail:
+            raise ConnectionError("MCP server unavailable")
+        self.connected = True
+        return []
+
+
+def test_readyz(monkeypatch):
+    async def fake_warm_up(readiness):  # noqa: RUF029
+        readiness["ready"] = True
+
+    monkeypatch.setattr(server, "warm_up", fake_warm_up)
+    app = server.create_app()
+
+    assert TestClient(app).get("/readyz").status_code == 503
+    with TestClient(app) as client:
+        for _ in range(100):
+            response = client.get("/readyz")
+            if response.status_code == 200:
+                break
+            time.sleep(0.01)
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "errors": []}
+
+
+@pytest.mark.asyncio
+async def test_warm_up(monkeypatch):
+    toolsets = [Toolset(), Toolset(fail=True)]
+    agent = LlmAgent(name="github_agent", tools=toolsets)
+    monkeypatch.setattr(server, "preload_agents", lambda _: ["github"])
+    monkeypatch.setattr(server, "get_agent", lambda _: agent)
+
+    readiness = {"ready": False, "errors": []}
+    await server.warm_up(readiness)
+    assert readiness["ready"]
+    assert readiness["agents"] == ["github"]
+    assert readiness["toolsets"] == 2
+    assert toolsets[0].connected
+    assert readiness["errors"] == [
+        "github_agent: ConnectionError('MCP server unavailable')"
+    ]
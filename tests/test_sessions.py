@@ -0,0 +1,132 @@
+import inspect
+import sqlite3
+import time
+
+import pytest
+from google.adk.cli.utils.service_factory import create_session_service_from_options
+from google.adk.events import Event, EventActions
+from google.adk.sessions import sqlite_session_service
+from google.genai import types
+
+from misstea.sessions import SqliteSessionService, get_session_service_uri
+
+
+def test_adk_sqlite_session_service_internals(tmp_path):
+    # SqliteSessionService overrides private parts of ADK's, check they haven't moved
+    service = sqlite_session_service.SqliteSessionService(
+        str(tmp_path / "sessions.sqlite")
+    )
+    assert isinstance(service._db_connect_path, str)
+    assert isinstance(service._db_connect_uri, bool)
+    assert inspect.isfunction(
+        inspect.unwrap(sqlite_session_service.SqliteSessionService._get_db_connection)
+    )
+    for method in ("create_session", "get_session", "list_sessions", "append_event"):
+        source = inspect.getsource(
+            getattr(sqlite_session_service.SqliteSessionService, method)
+        )
+        assert "self._get_db_connection()" in source, method
+    assert "PRAGMA foreign_keys" in sqlite_session_service.PRAGMA_FOREIGN_KEYS
+    for column in ("app_name", "user_id", "session_id", "timestamp", "update_time"):
+        assert column in sqlite_session_service.CREATE_SCHEMA_SQL
+
+
+def _event(text: str, timestamp: float) -> Event:
+    return Event(
+        author="user",
+        invocation_id="invocation",
+        timestamp=timestamp,
+        content=types.Content(role="user", parts=[types.Part.from_text(text=text)]),
+    )
+
+
+@pytest.mark.asyncio
+async def test_sqlite_session_service_wal_and_indexes(tmp_path):
+    service = SqliteSessionService(tmp_path / "sessions.sqlite", ttl_seconds=0)
+    await service.create_session(app_name="misstea", user_id="user")
+
+    con = sqlite3.connect(tmp_path / "sessions.sqlite")
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {
+        x[0] for x in con.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+    assert {"events_by_timestamp", "sessions_by_update_time"} <= indexes
+
+
+@pytest.mark.asyncio
+async def test_sqlite_session_service_pages_events(tmp_path):
+    service = SqliteSessionService(
+        tmp_path / "sessions.sqlite", max_events=2, ttl_seconds=0
+    )
+    session = await service.create_session(
+        app_name="misstea", user_id="user", state={"topic": "tea"}
+    )
+    for i in range(5):
+        await service.append_event(
+            session,
+            _event(f"message {i}", time.time() + i),
+        )
+    await service.append_event(
+        session,
+        Event(
+            author="user",
+            invocation_id="invocation",
+            timestamp=time.time() + 10,
+            actions=EventActions(state_delta={"topic": "coffee"}),
+        ),
+    )
+
+    loaded = await service.get_session(
+        app_name="misstea", user_id="user", session_id=session.id
+    )
+    assert [x.content.parts[0].text for x in loaded.events[:1]] == ["message 4"]
+    assert len(loaded.events) == 2
+    assert loaded.state["topic"] == "coffee"
+
+    older = await service.list_events(
+        app_name="misstea",
+        user_id="user",
+        session_id=session.id,
+        before_timestamp=loaded.events[0].timestamp,
+        limit=3,
+    )
+    assert [x.content.parts[0].text for x in older] == [
+        "message 1",
+        "message 2",
+        "message 3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_session_service_rejects_stale_session(tmp_path):
+    service = SqliteSessionService(tmp_path / "sessions.sqlite", ttl_seconds=0)
+    session = await service.create_session(app_name="misstea", user_id="user")
+    stale = await service.get_session(
+        app_name="misstea", user_id="user", session_id=session.id
+    )
+    await service.append_event(session, _event("first", time.time() + 1))
+
+    with pytest.raises(ValueError, match="stale"):
+        await service.append_event(stale, _event("second", time.time() + 2))
+
+
+@pytest.mark.asyncio
+async def test_sqlite_session_service_expires_sessions(tmp_path, monkeypatch):
+    service = SqliteSessionService(tmp_path / "sessions.sqlite", ttl_seconds=60)
+    old = await service.create_session(app_name="misstea", user_id="user")
+    await service.append_event(old, _event("hello", time.time()))
+    monkeypatch.setattr(time, "time", lambda: 1e12)
+    new = await service.create_session(app_name="misstea", user_id="user")
+
+    assert await service.expire_sessions() == 1
+    sessions = await service.list_sessions(app_name="misstea", user_id="user")
+    assert [x.id for x in sessions.sessions] == [new.id]
+
+
+def test_get_session_service_uri(tmp_path):
+    uri = get_session_service_uri(tmp_path / "sessions.sqlite")
+    service = create_session_service_from_options(
+        base_dir=tmp_path, session_service_uri=uri
+    )
+    assert isinstance(service, SqliteSessionService)
+    assert service.path == tmp_path / "sessions.sqlite"
@@ -0,0 +1,77 @@
+import json
+import os
+import time
+
+import pytest
+
+from misstea import state
+
+
+@pytest.fixture(autouse=True)
+def blob_store(monkeypatch, tmp_path):
+    blob_store = state.BlobStore(tmp_path / "blobs")
+    monkeypatch.setattr(state, "get_blob_store", lambda: blob_store)
+    monkeypatch.setattr(state, "STATE_SPILL_THRESHOLD_BYTES", 100)
+    return blob_store
+
+
+def test_small_values_stay_in_state():
+    session_state = {}
+    state.set_state_value(session_state, "calculator_agent_output", "4")
+    assert session_state == {"calculator_agent_output": "4"}
+    assert state.get_state_value(session_state, "calculator_agent_output") == "4"
+
+
+def test_large_values_are_spilled(blob_store):
+    session_state = {}
+    value = {"/repo/file.py": "x = 1\n" * 1000}
+    state.set_state_value(session_state, "coding_agent_output", value)
+
+    ref = session_state["coding_agent_output"]
+    assert state.is_blob_ref(ref)
+    assert ref["size_bytes"] == len(json.dumps(value))
+    assert len(json.dumps(session_state)) < 500
+    assert (blob_store.root / ref["blob_ref"][:2]).is_dir()
+    assert state.get_state_value(session_state, "coding_agent_output") == value
+
+
+def test_identical_values_share_a_blob(blob_store):
+    session_state = {}
+    state.set_state_value(session_state, "a", "y" * 1000)
+    state.set_state_value(session_state, "b", "y" * 1000)
+    assert session_state["a"]["blob_ref"] == session_state["b"]["blob_ref"]
+    assert len(list(blob_store.root.rglob("*.json"))) == 1
+
+
+def test_get_state_value_default():
+    assert state.get_state_value({}, "missing", "default") == "default"
+
+
+def test_prune_deletes_least_recently_used(tmp_path):
+    blob_store = state.BlobStore(tmp_path / "blobs", ttl_seconds=0)
+    digests = [blob_store.put(json.dumps(x * 1000)) for x in "abc"]
+    blob_store.max_bytes = 2500
+    # Reading a blob marks it as used
+    os.utime(blob_store._path(digests[0]), (0, 0))
+    os.utime(blob_store._path(digests[1]), (1, 1))
+    blob_store.get(digests[0])
+    assert blob_store.prune() == 1
+    assert blob_store.get(digests[0]) == "a" * 1000
+    with pytest.raises(FileNotFoundError):
+        blob_store.get(digests[1])
+
+
+def test_prune_deletes_expired(tmp_path):
+    blob_store = state.BlobStore(tmp_path / "blobs", ttl_seconds=60)
+    old, new = blob_store.put('"old"'), blob_store.put('"new"')
+    expired = time.time() - 120
+    os.utime(blob_store._path(old), (expired, expired))
+    assert blob_store.prune() == 1
+    assert blob_store.get(new) == "new"
+
+
+def test_get_state_value_deleted_blob(blob_store):
+    session_state = {}
+    state.set_state_value(session_state, "a", "y" * 1000)
+    blob_store._path(session_state["a"]["blob_ref"]).unlink()
+    assert state.get_state_value(session_state, "a") == session_state["a"]
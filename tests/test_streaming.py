@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.cli.adk_web_server import RunAgentRequest
+from google.adk.events import Event
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from misstea.streaming import (
+    StreamingPlugin,
+    get_stream_broker,
+    stream_sub_agents,
+    streaming_to,
+)
+
+
+class ChunkedLlm(BaseLlm):
+    """Model that answers in two chunks when streaming."""
+
+    model: str = "gemini-2.5-flash"
+
+    async def generate_content_async(  # noqa: D102
+        self,
+        llm_request,  # noqa: ARG002
+        stream=False,
+    ):
+        if stream:
+            for text in ["Two ", "plus two"]:
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text)]),
+                    partial=True,
+                )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text="Two plus two")])
+        )
+
+
+async def _run(runner: InMemoryRunner) -> None:
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="user"
+    )
+    async for _ in runner.run_async(
+        user_id="user",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text="Hi")]),
+    ):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_streaming_plugin_publishes_sub_agent_events():
+    agent = LlmAgent(name="calculator_agent", model=ChunkedLlm())
+    runner = InMemoryRunner(
+        app=App(name="misstea", root_agent=agent, plugins=[StreamingPlugin()])
+    )
+
+    with get_stream_broker().subscribe("parent") as queue:
+        await _run(runner)
+        assert queue.empty()
+
+        with streaming_to("parent"), streaming_to("nested"):
+            await _run(runner)
+        events = [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert [(x.author, x.partial, x.content.parts[0].text) for x in events] == [
+        ("calculator_agent", True, "Two "),
+        ("calculator_agent", True, "plus two"),
+        ("calculator_agent", None, "Two plus two"),
+    ]
+
+
+def test_stream_sub_agents():
+    app = FastAPI()
+    requests = []
+
+    @app.post("/run_sse")
+    async def run_agent_sse(req: RunAgentRequest) -> StreamingResponse:
+        requests.append(req)
+
+        async def event_generator():
+            yield 'data: {"author": "multi_tool_agent"}\n\n'
+            get_stream_broker().publish(
+                req.session_id, Event(author="calculator_agent", partial=True)
+            )
+            await asyncio.sleep(0)
+            yield 'data: {"author": "multi_tool_agent"}\n\n'
+
+        return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+    stream_sub_agents(app)
+    response = TestClient(app).post(
+        "/run_sse",
+        json={
+            "app_name": "misstea",
+            "user_id": "user",
+            "session_id": "session",
+            "new_message": {"role": "user", "parts": [{"text": "Hi"}]},
+        },
+    )
+
+    assert requests[0].streaming
+    authors = [
+        json.loads(x.removeprefix("data: "))["author"]
+        for x in response.text.split("\n\n")
+        if x
+    ]
+    assert authors == ["multi_tool_agent", "calculator_agent", "multi_tool_agent"]
@@ -0,0 +1,200 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from misstea import state, tools
+from misstea.cache import ResponseCache
+from misstea.deadlines import remaining_time
+
+
+@pytest.fixture
+def fake_agents(monkeypatch):
+    calls = []
+
+    async def fake_call_agent_helper(
+        agent_name,
+        question,
+        tool_context,
+        state_key,
+        timeout_seconds,  # noqa: ARG001
+    ):
+        calls.append(agent_name)
+        await asyncio.sleep(0.1)
+        if agent_name == "github":
+            raise RuntimeError("MCP server unavailable")
+        output = f"{agent_name}: {question}"
+        tool_context.state[state_key] = output
+        return output
+
+    monkeypatch.setattr(tools, "_call_agent_helper", fake_call_agent_helper)
+    return calls
+
+
+@pytest.mark.usefixtures("fake_agents")
+@pytest.mark.asyncio
+async def test_call_agents_parallel():
+    tool_context = SimpleNamespace(state={})
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await tools.call_agents_parallel(
+        [
+            {"agent": "google_search", "question": "a"},
+            {"agent": "web_scraper", "question": "b"},
+            {"agent": "google_search", "question": "c"},
+        ],
+        tool_context,
+    )
+    assert loop.time() - start < 0.25
+    assert result["status"] == "success"
+    assert [x["output"] for x in result["results"]] == [
+        "google_search: a",
+        "web_scraper: b",
+        "google_search: c",
+    ]
+    assert tool_context.state == {
+        "google_search_agent_output_0": "google_search: a",
+        "web_scraper_agent_output": "web_scraper: b",
+        "google_search_agent_output_1": "google_search: c",
+    }
+
+
+@pytest.mark.usefixtures("fake_agents")
+@pytest.mark.asyncio
+async def test_call_agents_parallel_partial_failure():
+    result = await tools.call_agents_parallel(
+        [
+            {"agent": "github", "question": "a"},
+            {"agent": "calculator", "question": "1+1"},
+        ],
+        SimpleNamespace(state={}),
+    )
+    assert result["status"] == "partial"
+    assert result["results"][0]["status"] == "failure"
+    assert "MCP server unavailable" in result["results"][0]["error"]
+    assert result["results"][1]["output"] == "calculator: 1+1"
+
+
+@pytest.mark.usefixtures("fake_agents")
+@pytest.mark.asyncio
+async def test_call_agents_parallel_all_failed():
+    result = await tools.call_agents_parallel(
+        [{"agent": "github", "question": "a"}, {"agent": "github", "question": "b"}],
+        SimpleNamespace(state={}),
+    )
+    assert result["status"] == "failure"
+    assert [x["status"] for x in result["results"]] == ["failure", "failure"]
+
+
+@pytest.mark.asyncio
+async def test_call_agents_parallel_unknown_agent(fake_agents):
+    result = await tools.call_agents_parallel(
+        [{"agent": "kettle", "question": "a"}], SimpleNamespace(state={})
+    )
+    assert result["status"] == "failure"
+    assert fake_agents == []
+
+
+@pytest.mark.asyncio
+async def test_call_agent_helper_uses_response_cache(monkeypatch, tmp_path):
+    calls = []
+
+    class FakeAgentTool:
+        def __init__(self, agent):
+            self.agent = agent
+
+        async def run_async(self, args, tool_context):  # noqa: ARG002
+            calls.append(args["request"])
+            return "Terraform is an infrastructure as code tool."
+
+    response_cache = ResponseCache(tmp_path / "responses.sqlite")
+    monkeypatch.setattr(tools, "AgentTool", FakeAgentTool)
+    monkeypatch.setattr(tools, "get_agent", lambda agent_name: agent_name)
+    monkeypatch.setattr(tools, "get_response_cache", lambda: response_cache)
+
+    for question in ["What is Terraform?", "what is terraform"]:
+        tool_context = SimpleNamespace(state={})
+        output = await tools._call_agent_helper("terraform", question, tool_context)
+        assert output == "Terraform is an infrastructure as code tool."
+        assert tool_context.state["terraform_agent_output"] == output
+    assert calls == ["What is Terraform?"]
+
+    await tools._call_agent_helper("outlook", "Book Nimbus", SimpleNamespace(state={}))
+    await tools._call_agent_helper("outlook", "Book Nimbus", SimpleNamespace(state={}))
+    assert calls.count("Book Nimbus") == 2
+
+
+@pytest.mark.asyncio
+async def test_call_agent_helper_timeout(monkeypatch):
+    remaining = []
+
+    class SlowAgentTool:
+        def __init__(self, agent):
+            self.agent = agent
+
+        async def run_async(self, args, tool_context):  # noqa: ARG002
+            remaining.append(remaining_time())
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(tools, "AgentTool", SlowAgentTool)
+    monkeypatch.setattr(tools, "get_agent", lambda _: SimpleNamespace())
+    tool_context = SimpleNamespace(state={})
+    output = await tools._call_agent_helper(
+        "outlook", "Book Nimbus", tool_context, timeout_seconds=0.1
+    )
+    assert output["status"] == "timeout"
+    assert output["agent"] == "outlook"
+    assert tool_context.state["outlook_agent_output"] == output
+    assert 0 < remaining[0] <= 0.1
+
+
+@pytest.mark.asyncio
+async def test_call_agent_helper_local_evaluator(monkeypatch):
+    calls = []
+
+    class FakeAgentTool:
+        def __init__(self, agent):
+            self.agent = agent
+
+        async def run_async(self, args, tool_context):  # noqa: ARG002
+            calls.append(args["request"])
+            return "1.8"
+
+    monkeypatch.setattr(tools, "AgentTool", FakeAgentTool)
+    monkeypatch.setattr(tools, "get_agent", lambda agent_name: agent_name)
+
+    tool_context = SimpleNamespace(state={})
+    assert await tools.call_calculator_agent("What is 2+2?", tool_context) == "4"
+    assert tool_context.state["calculator_agent_output"] == "4"
+    assert calls == []
+
+    question = "What is the square root of the speed of light in km/s?"
+    assert await tools.call_calculator_agent(question, tool_context) == "1.8"
+    assert calls == [question]
+
+    # Slow evaluations run in a thread and fall back to the agent at the deadline
+    def slow_evaluator(question):
+        time.sleep(0.5)
+        return question
+
+    monkeypatch.setattr(tools, "_LOCAL_EVALUATORS", {"calculator": slow_evaluator})
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    ticks = asyncio.create_task(asyncio.sleep(0.05))
+    output = await tools.call_calculator_agent("1+1", tool_context, timeout_seconds=0.2)
+    assert output == "1.8"
+    assert ticks.done()
+    assert loop.time() - start < 0.45
+
+
+def test_get_agent_output(monkeypatch, tmp_path):
+    blob_store = state.BlobStore(tmp_path / "blobs")
+    monkeypatch.setattr(state, "get_blob_store", lambda: blob_store)
+    tool_context = SimpleNamespace(state={})
+    state.set_state_value(tool_context.state, "coding_agent_output", "x" * 100_000)
+
+    result = tools.get_agent_output("coding_agent_output", tool_context)
+    assert result == {"status": "success", "output": "x" * 100_000}
+    result = tools.get_agent_output("github_agent_output", tool_context)
+    assert result["status"] == "failure"
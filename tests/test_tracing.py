@@ -0,0 +1,200 @@
+import asyncio
+import gc
+import json
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from misstea import tracing
+
+
+class ScriptedLlm(BaseLlm):
+    """Call the `lookup` tool, then answer."""
+
+    async def generate_content_async(  # noqa: D102
+        self,
+        llm_request,
+        stream=False,  # noqa: ARG002
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if llm_request.contents[-1].parts[0].function_response:
+            part = types.Part.from_text(text="Done.")
+        else:
+            part = types.Part.from_function_call(name="lookup", args={"key": "a"})
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=10, candidates_token_count=5, total_token_count=15
+            ),
+        )
+
+
+@pytest.fixture
+def spans(monkeypatch, tmp_path):
+    exporter = tracing.JsonlExporter(tmp_path / "traces.jsonl")
+    monkeypatch.setattr(tracing, "get_exporter", lambda: exporter)
+
+    def read_spans():
+        with exporter.path.open() as f:
+            return [json.loads(line) for line in f]
+
+    return read_spans
+
+
+def test_span_nesting(spans):
+    with tracing.span("outer", "agent"), tracing.span("inner", "tool", input_bytes=3):
+        pass
+    inner, outer = spans()
+    assert inner["parent_id"] == outer["span_id"]
+    assert inner["trace_id"] == outer["trace_id"]
+    assert inner["attributes"] == {"input_bytes": 3}
+    assert outer["parent_id"] is None
+
+
+def test_span_error(spans):
+    with pytest.raises(RuntimeError), tracing.span("failing", "tool"):
+        raise RuntimeError("Boom")
+    (span,) = spans()
+    assert span["status"] == "error"
+    assert "Boom" in span["attributes"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_traced(spans):
+    @tracing.traced()
+    def add(a, b):
+        return a + b
+
+    @tracing.traced()
+    async def greet(name):
+        await asyncio.sleep(0)
+        return f"Hello {name}"
+
+    assert add(1, 2) == 3
+    assert await greet("Mrs Doyle") == "Hello Mrs Doyle"
+    assert [(x["name"], x["attributes"]["output_bytes"]) for x in spans()] == [
+        ("add", 1),
+        ("greet", 15),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tracing_plugin(spans):
+    def lookup(key: str) -> dict:
+        """Look up a key.
+
+        Returns:
+            dict: The value.
+
+        """
+        with tracing.span("inside_lookup", "function"):
+            return {"value": key.upper()}
+
+    agent = LlmAgent(name="root", model=ScriptedLlm(model="scripted"), tools=[lookup])
+    runner = InMemoryRunner(
+        app=App(name="test_app", root_agent=agent, plugins=[tracing.TracingPlugin()])
+    )
+    session = await runner.session_service.create_session(
+        app_name="test_app", user_id="user"
+    )
+    async for _ in runner.run_async(
+        user_id="user",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text="Go on")]),
+    ):
+        pass
+
+    by_name = {x["name"]: x for x in spans()}
+    turn = by_name["root"]
+    assert turn["kind"] == "turn"
+    assert by_name["lookup"]["parent_id"] == turn["span_id"]
+    assert by_name["inside_lookup"]["parent_id"] == by_name["lookup"]["span_id"]
+    model_spans = [x for x in spans() if x["kind"] == "model"]
+    assert len(model_spans) == 2
+    assert all(x["attributes"]["total_tokens"] == 15 for x in model_spans)
+    assert all(x["parent_id"] == turn["span_id"] for x in model_spans)
+
+
+class HangingLlm(BaseLlm):
+    """Never respond."""
+
+    async def generate_content_async(  # noqa: D102
+        self,
+        llm_request,  # noqa: ARG002
+        stream=False,  # noqa: ARG002
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.Event().wait()
+        yield LlmResponse()
+
+
+@pytest.mark.asyncio
+async def test_tracing_plugin_cancelled_turn(spans):
+    plugin = tracing.TracingPlugin()
+    agent = LlmAgent(name="root", model=HangingLlm(model="hanging"))
+    runner = InMemoryRunner(
+        app=App(name="test_app", root_agent=agent, plugins=[plugin])
+    )
+    session = await runner.session_service.create_session(
+        app_name="test_app", user_id="user"
+    )
+
+    async def run():
+        async for _ in runner.run_async(
+            user_id="user",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="Go on")]),
+        ):
+            pass
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0.1)
+    assert plugin._spans
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    del task
+    # The generators of the turn are closed and collected on the next iterations
+    for _ in range(3):
+        gc.collect()
+        await asyncio.sleep(0)
+    assert plugin._spans == {}
+    assert {x["kind"]: x["status"] for x in spans()} == {
+        "turn": "cancelled",
+        "model": "cancelled",
+    }
+
+
+def test_summarize_traces(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    with path.open("w") as f:
+        for duration in [10, 20, 30, 40, 1000]:
+            f.write(
+                json.dumps(
+                    {
+                        "name": "gemini-2.5-flash",
+                        "kind": "model",
+                        "status": "ok",
+                        "duration_ms": duration,
+                        "attributes": {"agent_name": "coding_agent", "total_tokens": 5},
+                    }
+                )
+                + "\n"
+            )
+    (row,) = tracing.summarize_traces(path)["model"]
+    assert row == {
+        "name": "coding_agent (gemini-2.5-flash)",
+        "count": 5,
+        "errors": 0,
+        "p50_ms": 30,
+        "p95_ms": 1000,
+        "max_ms": 1000,
+        "total_tokens": 25,
+    }
+
+
+def test_summarize_traces_missing(tmp_path):
+    assert tracing.summarize_traces(tmp_path / "traces.jsonl") == {}